@@ -1,51 +1,38 @@
 import re
-from bs4 import BeautifulSoup
 from loguru import logger
 
+import config
 from agents.base_agent import BaseAgent
+from agents.category_classifier import category_for
+from agents.extraction import Field, ResultSelectors, extract_results
+from agents.structured_data import extract_script_json
 
 class AjioAgent(BaseAgent):
     """Agent for checking prices on Ajio"""
 
+    DEFAULT_BASE_URL = "https://www.ajio.com"
+
+    # Search result card and the fields read from it
+    RESULT_SELECTORS = ResultSelectors('div.item.rilrtl-products-list__item', {
+        "url": Field('a.rilrtl-products-list__link', attribute='href'),
+        "brand": Field('div.brand'),
+        "name": Field('div.nameCls'),
+        "price": Field('span.price')
+    })
+
+    # Product pages look like /<slug>/p/<code>
+    PRODUCT_URL_PATTERN = re.compile(r'ajio\.com/[^?#]+/p/\w+')
+
     @property
     def retailer_name(self):
         return "Ajio"
 
     def _determine_category(self, product_name):
         """Determine the appropriate Ajio category based on the product name"""
-        product_name = product_name.lower()
-
-        # Map common clothing items to Ajio categories
-        if any(item in product_name for item in ["t-shirt", "tshirt", "t shirt"]):
-            return "830216001"  # Men's T-shirts
-        elif any(item in product_name for item in ["shirt", "oxford", "chambray", "button down", "dress shirt"]):
-            return "830216003"  # Men's Shirts
-        elif any(item in product_name for item in ["jeans", "denim"]):
-            return "830216013"  # Men's Jeans
-        elif any(item in product_name for item in ["trouser", "chino", "pant"]):
-            return "830216005"  # Men's Trousers
-        elif any(item in product_name for item in ["jacket", "bomber", "denim jacket"]):
-            return "830216002"  # Men's Jackets
-        elif "hoodie" in product_name:
-            return "830216011"  # Men's Sweatshirts
-        elif "polo" in product_name:
-            return "830216001"  # Men's T-shirts & Polos
-        elif "suit" in product_name:
-            return "830216004"  # Men's Suits
-        elif "shoe" in product_name or "sneaker" in product_name or "footwear" in product_name:
-            return "830216006"  # Men's Casual Shoes
-        elif "formal shoe" in product_name:
-            return "830216007"  # Men's Formal Shoes
-        elif "boot" in product_name:
-            return "830216008"  # Men's Boots
-        elif "short" in product_name:
-            return "830216014"  # Men's Shorts
-
-        # Default to a general category if no specific match
-        return "men"  # Men's category
-
-    def search_product(self, product_name):
-        """Search for a product on Ajio and return its details"""
+        return category_for(self.retailer_key, product_name)
+
+    def search_products(self, product_name, limit=1):
+        """Search for a product on Ajio and return up to `limit` results"""
         try:
             # Format the search URL with men's clothing specific parameters
 
@@ -58,7 +45,7 @@ class AjioAgent(BaseAgent):
             category = self._determine_category(search_query)
 
             # Ajio uses a different URL structure for categories
-            search_url = f"https://www.ajio.com/s/{category}"
+            search_url = f"{self.base_url}/s/{category}"
             params = {
                 "query": search_query,
                 "gclid": "men",
@@ -68,58 +55,111 @@ class AjioAgent(BaseAgent):
             # Make the request
             response = self._make_request(search_url, params)
             if not response:
-                return None
+                return []
 
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'lxml')
+            return self.parse_search_page(response.content, product_name, limit)
+        except Exception as e:
+            logger.error(f"Error searching for '{product_name}' on Ajio: {e}")
+            return []
 
-            # Find the first product result
-            product_div = soup.select_one('div.item.rilrtl-products-list__item')
-            if not product_div:
+    def parse_search_page(self, content, product_name, limit=1):
+        """Extract up to `limit` products from an Ajio search results page"""
+        try:
+            # Prefer the search state Ajio embeds as JSON; it needs no DOM at all
+            if config.STRUCTURED_DATA_EXTRACTION:
+                results = self._parse_embedded_results(content, limit)
+                if results:
+                    return results
+
+            # Find the top product results
+            cards = extract_results(content, self.RESULT_SELECTORS, limit)
+            if not cards:
                 logger.warning(f"No product results found for '{product_name}' on Ajio")
-                return None
-
-            # Extract product details
-            product_url_element = product_div.select_one('a.rilrtl-products-list__link')
-            if not product_url_element:
-                logger.warning(f"Could not find product URL for '{product_name}' on Ajio")
-                return None
-
-            # Get the product URL
-            product_url = "https://www.ajio.com" + product_url_element['href']
-
-            # Get the product name
-            brand_element = product_div.select_one('div.brand')
-            product_element = product_div.select_one('div.nameCls')
-
-            brand_name = brand_element.text.strip() if brand_element else ""
-            product_desc = product_element.text.strip() if product_element else "Unknown Product"
-            product_name_text = f"{brand_name} {product_desc}".strip()
-
-            # Get the product price
-            price_element = product_div.select_one('span.price')
-            if not price_element:
-                logger.warning(f"Could not find price for '{product_name}' on Ajio")
-                return None
-
-            # Extract the price value
-            price_text = price_element.text.strip()
-            # Remove currency symbol (₹) and commas
-            price_text = price_text.replace('Rs.', '').replace('₹', '').replace(',', '')
-            price_match = re.search(r'(\d+)', price_text)
-            if not price_match:
-                logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Ajio")
-                return None
-
-            price = float(price_match.group(1))
-
-            # Return the product details
+                return []
+
+            results = []
+            for card in cards:
+                # Skip cards without a product link or price (ads, placeholders)
+                if not card["url"] or not card["price"]:
+                    continue
+
+                # Get the product URL
+                product_url = self.base_url + card["url"]
+
+                # Get the product name
+                brand_name = card["brand"].strip() if card["brand"] else ""
+                product_desc = card["name"].strip() if card["name"] else "Unknown Product"
+                product_name_text = f"{brand_name} {product_desc}".strip()
+
+                # Extract the price value
+                price_text = card["price"].strip()
+                # Remove currency symbol (₹) and commas
+                price_text = price_text.replace('Rs.', '').replace('₹', '').replace(',', '')
+                price_match = re.search(r'(\d+)', price_text)
+                if not price_match:
+                    logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Ajio")
+                    continue
+
+                price = float(price_match.group(1))
+
+                results.append({
+                    "price": price,
+                    "url": product_url,
+                    "retailer": self.retailer_name,
+                    "name": product_name_text
+                })
+
+            if not results:
+                logger.warning(f"Could not find a priced product for '{product_name}' on Ajio")
+
+            return results
+        except Exception as e:
+            logger.error(f"Error parsing Ajio results for '{product_name}': {e}")
+            return []
+
+    def parse_product_page(self, content, url):
+        """Extract the price from an Ajio product page, preferring its embedded product state"""
+        state = extract_script_json(content, b"window.__PRELOADED_STATE__") or {}
+        product = (state.get("product") or {}).get("productDetails") or {}
+        price = (product.get("price") or {}).get("value")
+
+        if price:
+            name = f"{product.get('brandName', '')} {product.get('name', '')}".strip()
             return {
-                "price": price,
-                "url": product_url,
+                "price": float(price),
+                "url": url,
                 "retailer": self.retailer_name,
-                "name": product_name_text
+                "name": name or "Unknown Product"
             }
-        except Exception as e:
-            logger.error(f"Error searching for '{product_name}' on Ajio: {e}")
-            return None
+
+        return super().parse_product_page(content, url)
+
+    def _parse_embedded_results(self, content, limit=1):
+        """Read search results from the `window.__PRELOADED_STATE__` embedded in the page"""
+        state = extract_script_json(content, b"window.__PRELOADED_STATE__")
+        if not state:
+            return []
+
+        entities = state.get("grid", {}).get("entities") or {}
+
+        results = []
+        for product in entities.values():
+            price = (product.get("price") or {}).get("value")
+            url = product.get("url")
+            if not price or not url:
+                continue
+
+            brand_name = (product.get("fnlColorVariantData") or {}).get("brandName", "")
+            name = f"{brand_name} {product.get('name', '')}".strip()
+
+            results.append({
+                "price": float(price),
+                "url": f"{self.base_url}/" + url.lstrip("/"),
+                "retailer": self.retailer_name,
+                "name": name or "Unknown Product"
+            })
+
+            if len(results) >= limit:
+                break
+
+        return results
@@ -1,12 +1,37 @@
-import requests
+import re
+import time
 from abc import ABC, abstractmethod
 from loguru import logger
 
 import config
+from agents.extraction import extract_results
+from agents.rate_limiter import get_rate_limiter
+from agents.relevance import cheapest, filter_relevant
+from agents.response_cache import get_response_cache, normalize_url
+from agents.retry_policy import RetryPolicy, get_circuit_breaker
+from agents.single_flight import get_single_flight, normalize_query
+from agents.structured_data import extract_json_ld_product
+from agents.transport import get_transport
 
 class BaseAgent(ABC):
     """Base class for price checking agents"""
 
+    # User agents tried in turn when a retailer answers 403
+    FALLBACK_USER_AGENTS = [
+        'Mozilla/5.0 (Linux; Android 10; SM-G981B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.162 Mobile Safari/537.36',
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15'
+    ]
+
+    # Scheme and host of the retailer's site; config.RETAILER_BASE_URLS can override it
+    DEFAULT_BASE_URL = None
+
+    # Matches the URL of a single product page; agents without one always search
+    PRODUCT_URL_PATTERN = None
+
+    # Selectors for the price (and name) on a product page, tried when it has no JSON-LD
+    PRODUCT_PAGE_SELECTORS = None
+
     def __init__(self):
         """Initialize the agent"""
         # Use a more modern and mobile user agent to avoid detection
@@ -25,22 +50,49 @@ class BaseAgent(ABC):
             'Cache-Control': 'max-age=0'
         }
 
+        # Pooled keep-alive connections shared by every agent in the process
+        self.transport = get_transport()
+
+        # Per-retailer pacing shared by every agent in the process
+        self.rate_limiter = get_rate_limiter()
+
+        # Backoff between retries, and a breaker that skips the retailer while it is down
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = get_circuit_breaker(self.retailer_key)
+
+        # On-disk cache of search pages (None when disabled)
+        self.response_cache = get_response_cache()
+
+        # Identical searches running at the same time share one request
+        self.single_flight = get_single_flight()
+
     @property
     @abstractmethod
     def retailer_name(self):
         """Return the name of the retailer"""
         pass
 
+    @property
+    def retailer_key(self):
+        """Return the lowercase key used for this retailer in config"""
+        return self.retailer_name.lower()
+
+    @property
+    def base_url(self):
+        """Return the retailer's base URL, honouring any override in config"""
+        return config.RETAILER_BASE_URLS.get(self.retailer_key) or self.DEFAULT_BASE_URL
+
     @abstractmethod
-    def search_product(self, product_name):
+    def search_products(self, product_name, limit=1):
         """
-        Search for a product and return its details
+        Search for a product and return the top results
 
         Args:
             product_name (str): The name of the product to search for
+            limit (int): Maximum number of results to return
 
         Returns:
-            dict: Product details with keys:
+            list: Product dicts in the retailer's result order, each with keys:
                 - price (float): The price of the product
                 - url (str): The URL to purchase the product
                 - retailer (str): The name of the retailer
@@ -48,35 +100,174 @@ class BaseAgent(ABC):
         """
         pass
 
+    def search_product(self, product_name):
+        """
+        Search for a product and return the cheapest relevant result
+
+        Args:
+            product_name (str): The name of the product to search for
+
+        Returns:
+            dict: Product details (see search_products), or None if nothing relevant was found
+        """
+        candidates = self.shared_search(product_name, config.SEARCH_RESULTS_PER_RETAILER)
+        return cheapest(filter_relevant(product_name, candidates))
+
+    def shared_search(self, product_name, limit=1):
+        """
+        Run search_products, joining an identical search already in flight
+
+        Callers that overlap (the scheduler, a sheet update and an API request) get
+        the same result list and must not modify it.
+        """
+        key = (self.retailer_key, "search", normalize_query(product_name), limit)
+        return self.single_flight.do(key, self.search_products, product_name, limit)
+
+    def is_product_url(self, url):
+        """Return True if the URL points at a single product page on this retailer"""
+        return bool(url and self.PRODUCT_URL_PATTERN and self.PRODUCT_URL_PATTERN.search(url))
+
+    def fetch_product_page(self, url):
+        """
+        Read the current price from a known product page
+
+        Product pages are smaller than search pages and unambiguous, so callers try
+        this before searching again.
+
+        Args:
+            url (str): The product URL stored for this retailer
+
+        Returns:
+            dict: Product details in the same shape as search_product, or None when the
+                URL is not a product page, the page is gone or has no readable price
+        """
+        if not self.is_product_url(url):
+            return None
+
+        return self.single_flight.do((self.retailer_key, "page", url), self._fetch_product_page, url)
+
+    def _fetch_product_page(self, url):
+        """Fetch and parse a product page once; see fetch_product_page"""
+        try:
+            response = self._make_request(url)
+            if response:
+                result = self.parse_product_page(response.content, url)
+                if result:
+                    return result
+        except Exception as e:
+            logger.error(f"Error refreshing {url} on {self.retailer_name}: {e}")
+
+        logger.info(f"Product page {url} is no longer usable on {self.retailer_name}, searching again")
+        return None
+
+    def refresh_product(self, url, product_name):
+        """Re-read a product from its known page, searching again only if the page cannot be used"""
+        return self.fetch_product_page(url) or self.search_product(product_name)
+
+    def parse_product_page(self, content, url):
+        """Extract the price from a product page, preferring schema.org JSON-LD"""
+        product = extract_json_ld_product(content)
+
+        if product is None and self.PRODUCT_PAGE_SELECTORS:
+            cards = extract_results(content, self.PRODUCT_PAGE_SELECTORS)
+            price = self._parse_price_text(cards[0]["price"]) if cards else None
+            if price is not None:
+                product = {"name": (cards[0].get("name") or "").strip(), "price": price}
+
+        if product is None:
+            logger.warning(f"Could not find price on product page {url} for {self.retailer_name}")
+            return None
+
+        return {
+            "price": product["price"],
+            "url": url,
+            "retailer": self.retailer_name,
+            "name": product["name"] or "Unknown Product"
+        }
+
+    def _parse_price_text(self, price_text):
+        """Parse a displayed price such as '₹1,299' or '$12.99' into a float"""
+        if not price_text:
+            return None
+
+        price_match = re.search(r'\d+(?:\.\d+)?', price_text.replace(',', ''))
+        return float(price_match.group(0)) if price_match else None
+
     def _make_request(self, url, params=None):
-        """Make an HTTP request with error handling and retries"""
-        max_retries = 3
-        retry_count = 0
-
-        while retry_count < max_retries:
-            try:
-                # Add a small delay between retries to avoid rate limiting
-                if retry_count > 0:
-                    import time
-                    time.sleep(2)
-
-                response = requests.get(url, headers=self.headers, params=params, timeout=15)
-
-                # Check for common error status codes
-                if response.status_code == 403:
-                    logger.warning(f"Access forbidden (403) for {url}. Trying with different headers.")
-                    # Try with a different user agent on retry
-                    self.headers['User-Agent'] = 'Mozilla/5.0 (Linux; Android 10; SM-G981B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.162 Mobile Safari/537.36'
-                    retry_count += 1
-                    continue
-
-                response.raise_for_status()
-                return response
-
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error for {url} (attempt {retry_count+1}/{max_retries}): {e}")
-                retry_count += 1
-
-                if retry_count >= max_retries:
-                    logger.error(f"Max retries reached for {url}")
-                    return None
+        """Make an HTTP request with caching, backoff retries and a per-retailer circuit breaker"""
+        cache_key = normalize_url(url, params)
+        cached = self.response_cache.get(cache_key) if self.response_cache else None
+
+        # A fresh cache hit never touches the network
+        if cached and self.response_cache.is_fresh(cached, self.retailer_key):
+            logger.debug(f"Cache hit for {cache_key}")
+            return cached.to_response()
+
+        if not self.circuit_breaker.allow_request():
+            logger.warning(f"Skipping {url}: circuit for {self.retailer_name} is open")
+            return None
+
+        # Stale entries are revalidated with ETag / Last-Modified. The headers are this
+        # request's own copy: the agent serves several threads, so a 403 rotates the
+        # User-Agent here rather than in self.headers
+        headers = {**self.headers, **cached.conditional_headers()} if cached else dict(self.headers)
+        user_agent_index = -1
+
+        # Set once the circuit has been told how this request went. Anything escaping
+        # before that (parsing a response, the cache, the rate limiter) counts as a
+        # failure, or a half-open probe would leave the circuit half-open for good.
+        settled = False
+        try:
+            attempt = 0
+            while True:
+                attempt += 1
+                response = None
+
+                try:
+                    # Every attempt, retries included, is paced by the retailer's rate limit
+                    with self.rate_limiter.limit(self.retailer_key):
+                        response = self.transport.get(url, headers=headers, params=params)
+
+                    if response.status_code == 304 and cached:
+                        self.circuit_breaker.record_success()
+                        settled = True
+                        self.response_cache.revalidated(cache_key)
+                        return cached.to_response()
+
+                    # Check for common error status codes
+                    if response.status_code == 403:
+                        logger.warning(f"Access forbidden (403) for {url}. Trying with different headers.")
+                        user_agent_index = (user_agent_index + 1) % len(self.FALLBACK_USER_AGENTS)
+                        headers = {**headers, 'User-Agent': self.FALLBACK_USER_AGENTS[user_agent_index]}
+
+                    response.raise_for_status()
+                    self.circuit_breaker.record_success()
+                    settled = True
+
+                    if self.response_cache and response.status_code == 200:
+                        self.response_cache.put(cache_key, response)
+
+                    return response
+
+                except self.transport.errors as e:
+                    logger.error(f"Request error for {url} (attempt {attempt}/{self.retry_policy.max_attempts}): {e}")
+
+                    delay = self.retry_policy.next_delay(attempt, response)
+                    if delay is None:
+                        break
+
+                    time.sleep(delay)
+
+            # Only failures that say the retailer is unhealthy count towards opening the circuit
+            status_code = response.status_code if response is not None else None
+            if self.retry_policy.is_retryable(status_code):
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            settled = True
+
+            logger.error(f"Giving up on {url} after {attempt} attempt(s)")
+            return None
+        finally:
+            if not settled:
+                self.circuit_breaker.record_failure()
@@ -0,0 +1,103 @@
+import re
+from functools import lru_cache
+
+# Keyword rules in priority order: when several keywords match, the earliest rule wins.
+# Compound keywords sit above the generic ones they contain ("denim jacket" before
+# "denim", "formal shoe" before "shoe").
+CATEGORY_RULES = [
+    ("tshirts", ["t-shirt", "tshirt", "t shirt"]),
+    ("shirts", ["shirt", "oxford", "chambray", "button down", "dress shirt"]),
+    ("jackets", ["denim jacket"]),
+    ("jeans", ["jeans", "denim"]),
+    ("trousers", ["trouser", "chino", "pant"]),
+    ("jackets", ["jacket", "bomber"]),
+    ("sweatshirts", ["hoodie"]),
+    ("polos", ["polo"]),
+    ("suits", ["suit"]),
+    ("formal-shoes", ["formal shoe"]),
+    ("casual-shoes", ["shoe", "sneaker", "footwear"]),
+    ("boots", ["boot"]),
+    ("shorts", ["short"]),
+    ("swimwear", ["swim", "trunk"]),
+    ("belts", ["belt"]),
+    ("sunglasses", ["sunglass"]),
+    ("watches", ["watch"]),
+    ("bags", ["bag"]),
+    ("coats", ["coat", "overcoat"])
+]
+
+# Retailer-specific category identifiers, with the value used when nothing matches
+RETAILER_CATEGORIES = {
+    "myntra": {
+        "default": "clothing",
+        "categories": {
+            "tshirts": "tshirts",
+            "shirts": "shirts",
+            "jeans": "jeans",
+            "trousers": "trousers",
+            "jackets": "jackets",
+            "sweatshirts": "sweatshirts",
+            "polos": "polos",
+            "suits": "suits",
+            "casual-shoes": "casual-shoes",
+            "formal-shoes": "formal-shoes",
+            "boots": "boots",
+            "shorts": "shorts",
+            "swimwear": "swimwear",
+            "belts": "belts",
+            "sunglasses": "sunglasses",
+            "watches": "watches",
+            "bags": "bags",
+            "coats": "coats"
+        }
+    },
+    "ajio": {
+        "default": "men",
+        "categories": {
+            "tshirts": "830216001",  # Men's T-shirts
+            "shirts": "830216003",  # Men's Shirts
+            "jeans": "830216013",  # Men's Jeans
+            "trousers": "830216005",  # Men's Trousers
+            "jackets": "830216002",  # Men's Jackets
+            "sweatshirts": "830216011",  # Men's Sweatshirts
+            "polos": "830216001",  # Men's T-shirts & Polos
+            "suits": "830216004",  # Men's Suits
+            "casual-shoes": "830216006",  # Men's Casual Shoes
+            "formal-shoes": "830216007",  # Men's Formal Shoes
+            "boots": "830216008",  # Men's Boots
+            "shorts": "830216014"  # Men's Shorts
+        }
+    }
+}
+
+# Keyword -> (priority, category). A keyword listed twice keeps its first (highest) priority.
+_KEYWORDS = {}
+for _priority, (_category, _keywords) in enumerate(CATEGORY_RULES):
+    for _keyword in _keywords:
+        _KEYWORDS.setdefault(_keyword, (_priority, _category))
+
+# One alternation scanned in a single pass. The lookahead reports a match at every
+# position, so overlapping keywords ("t-shirt" and "shirt") are all seen; longer
+# keywords come first so the most specific one wins at a given position.
+_KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_KEYWORDS, key=len, reverse=True)) + "))"
+)
+
+@lru_cache(maxsize=4096)
+def _classify_normalized(normalized_name):
+    """Classify an already normalized product name"""
+    best = None
+    for match in _KEYWORD_PATTERN.finditer(normalized_name):
+        rule = _KEYWORDS[match.group(1)]
+        if best is None or rule < best:
+            best = rule
+    return best[1] if best else None
+
+def classify(product_name):
+    """Return the generic category for a product name, or None if no keyword matches"""
+    return _classify_normalized(" ".join(product_name.lower().split()))
+
+def category_for(retailer_key, product_name):
+    """Return the retailer's category identifier for a product name"""
+    table = RETAILER_CATEGORIES[retailer_key]
+    return table["categories"].get(classify(product_name), table["default"])
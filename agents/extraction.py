@@ -0,0 +1,138 @@
+import re
+
+from bs4 import BeautifulSoup
+from loguru import logger
+
+# The fast path compiles CSS selectors to XPath with cssselect; without it we stay on BeautifulSoup
+try:
+    from lxml import etree
+    from cssselect import GenericTranslator
+except ImportError:
+    etree = None
+    GenericTranslator = None
+
+# Bytes handed to the incremental parser at a time
+CHUNK_SIZE = 32 * 1024
+
+class Field:
+    """A value read from a result card: the text (or an attribute) of the first element that matches"""
+
+    def __init__(self, *selectors, attribute=None):
+        """
+        Args:
+            *selectors (str): CSS selectors relative to the card, tried in order
+            attribute (str): Attribute to read instead of the element's text
+        """
+        self.selectors = selectors
+        self.attribute = attribute
+        self.xpaths = []
+
+class ResultSelectors:
+    """CSS selectors for a retailer's search result card, compiled once to XPath"""
+
+    def __init__(self, container, fields):
+        """
+        Args:
+            container (str): CSS selector matching one result card
+            fields (dict): Maps a field name to the Field read from each card
+        """
+        self.container = container
+        self.fields = fields
+        self.container_tag = None
+        self.container_match = None
+
+        if GenericTranslator is not None:
+            translator = GenericTranslator()
+
+            # Tested on each element as it opens, so only simple card selectors are expected
+            self.container_match = etree.XPath(f"boolean({translator.css_to_xpath(container, prefix='self::')})")
+
+            # Let the parser skip events for other tags entirely
+            tag_match = re.match(r'^([a-zA-Z][\w-]*)', container)
+            self.container_tag = tag_match.group(1) if tag_match else None
+
+            for field in fields.values():
+                field.xpaths = [
+                    etree.XPath(translator.css_to_xpath(selector, prefix='descendant::'))
+                    for selector in field.selectors
+                ]
+
+def extract_results(content, selectors, limit=1):
+    """
+    Extract result cards from a search page
+
+    Args:
+        content (bytes): Raw response body
+        selectors (ResultSelectors): The retailer's card selectors
+        limit (int): Stop after this many cards
+
+    Returns:
+        list: One dict per card mapping field names to strings (None when a field is missing)
+    """
+    if selectors.container_match is not None:
+        try:
+            return _extract_streaming(content, selectors, limit)
+        except Exception as e:
+            logger.debug(f"Fast extraction failed, falling back to BeautifulSoup: {e}")
+
+    return _extract_with_soup(content, selectors, limit)
+
+def _extract_streaming(content, selectors, limit):
+    """Parse the raw bytes incrementally and stop as soon as `limit` cards have closed"""
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=selectors.container_tag, encoding="utf-8")
+    results = []
+    open_card = None
+
+    offset = 0
+    while offset <= len(content):
+        if offset < len(content):
+            parser.feed(content[offset:offset + CHUNK_SIZE])
+        else:
+            # End of the document: flush elements that were still open
+            parser.close()
+        offset += CHUNK_SIZE
+
+        for event, element in parser.read_events():
+            if event == "start":
+                # Cards nested inside the current card are part of it, not new results
+                if open_card is None and selectors.container_match(element):
+                    open_card = element
+            elif element is open_card:
+                results.append(_read_fields_lxml(element, selectors))
+                open_card = None
+
+                if len(results) >= limit:
+                    return results
+
+    return results
+
+def _read_fields_lxml(card, selectors):
+    """Read every field from a parsed lxml card"""
+    values = {}
+    for name, field in selectors.fields.items():
+        values[name] = None
+        for xpath in field.xpaths:
+            matches = xpath(card)
+            if matches:
+                element = matches[0]
+                values[name] = element.get(field.attribute) if field.attribute else "".join(element.itertext())
+                break
+    return values
+
+def _extract_with_soup(content, selectors, limit):
+    """Fallback extraction with a full BeautifulSoup parse"""
+    soup = BeautifulSoup(content, 'lxml')
+
+    results = []
+    for card in soup.select(selectors.container, limit=limit):
+        values = {}
+        for name, field in selectors.fields.items():
+            values[name] = None
+            for selector in field.selectors:
+                element = card.select_one(selector)
+                if element:
+                    values[name] = element.get(field.attribute) if field.attribute else element.text
+                    break
+        results.append(values)
+
+    return results
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from loguru import logger
+
+import config
+
+class SearchFanOut:
+    """Runs one product search against several agents concurrently"""
+
+    def __init__(self, max_workers=None, deadline=None, results_per_retailer=None):
+        """
+        Initialize the fan-out engine
+
+        Args:
+            max_workers (int): Size of the shared thread pool
+            deadline (float): Seconds to wait for all agents before giving up on an item
+            results_per_retailer (int): Candidates read from each retailer's search page
+        """
+        self.max_workers = max_workers or config.SEARCH_MAX_WORKERS
+        self.deadline = deadline if deadline is not None else config.SEARCH_DEADLINE_SECONDS
+        self.results_per_retailer = results_per_retailer or config.SEARCH_RESULTS_PER_RETAILER
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="agent-search"
+        )
+
+    def search(self, agents, product_name, known_urls=None):
+        """
+        Query every agent for a product at the same time
+
+        Args:
+            agents (list): Agents to query
+            product_name (str): The name of the product to search for
+            known_urls (dict): Product URLs already stored per retailer key; those
+                retailers refresh the known page instead of searching
+
+        Returns:
+            list: (agent, candidates) pairs in the same order as `agents`. Candidates is
+                an empty list for agents that failed, found nothing or missed the deadline.
+        """
+        known_urls = known_urls or {}
+        futures = {
+            agent: self.executor.submit(self._search_agent, agent, product_name, known_urls.get(agent.retailer_key))
+            for agent in agents
+        }
+
+        done, not_done = wait(futures.values(), timeout=self.deadline)
+
+        results = []
+        for agent, future in futures.items():
+            if future in not_done:
+                # The worker keeps running, but this item no longer waits for it
+                future.cancel()
+                logger.warning(f"{agent.retailer_name} did not answer for '{product_name}' within {self.deadline}s")
+                results.append((agent, []))
+            else:
+                results.append((agent, future.result()))
+
+        return results
+
+    def _search_agent(self, agent, product_name, known_url=None):
+        """Collect candidate results from one agent, never raising into the caller"""
+        try:
+            logger.info(f"Checking {agent.retailer_name} for '{product_name}'")
+            if known_url:
+                result = agent.fetch_product_page(known_url)
+                if result:
+                    return [result]
+            return agent.shared_search(product_name, self.results_per_retailer)
+        except Exception as e:
+            logger.error(f"Error with {agent.retailer_name} agent: {e}")
+            return []
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
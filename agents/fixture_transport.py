@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from loguru import logger
+
+import config
+from agents.response_cache import normalize_url
+
+class FixtureStore:
+    """Recorded responses on disk, one gzip file per normalized URL"""
+
+    def __init__(self, directory=None):
+        """
+        Initialize the store
+
+        Args:
+            directory (str): Folder holding the fixture files
+        """
+        self.directory = directory or config.HTTP_FIXTURES_DIR
+        self._lock = threading.Lock()
+
+    def path_for(self, key):
+        """Return the fixture file for a normalized URL"""
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.gz")
+
+    def save(self, key, response):
+        """
+        Write a response to disk
+
+        The file holds one JSON line of metadata followed by the raw body, so the body
+        compresses as well as the page itself does.
+        """
+        metadata = {
+            "key": key,
+            "url": str(response.url),
+            "status_code": response.status_code,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+            },
+            "recorded_at": time.time()
+        }
+
+        path = self.path_for(key)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary_path = f"{path}.tmp"
+            with gzip.open(temporary_path, "wb") as handle:
+                handle.write(json.dumps(metadata).encode("utf-8") + b"\n")
+                handle.write(response.content)
+            os.replace(temporary_path, path)
+
+    def load(self, key):
+        """Return the recorded response for a normalized URL, or None"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+
+        with gzip.open(path, "rb") as handle:
+            header, _, body = handle.read().partition(b"\n")
+
+        metadata = json.loads(header)
+
+        response = requests.Response()
+        response.status_code = metadata["status_code"]
+        response._content = body
+        response.headers = CaseInsensitiveDict(metadata["headers"])
+        response.url = metadata["url"]
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+class RecordingTransport:
+    """Sends requests through a live transport and saves every response as a fixture"""
+
+    def __init__(self, transport, store=None):
+        """
+        Initialize the recorder
+
+        Args:
+            transport (HttpTransport): The live transport to send requests with
+            store (FixtureStore): Where responses are written
+        """
+        self.transport = transport
+        self.store = store or FixtureStore()
+
+    @property
+    def errors(self):
+        """Exception types raised by the wrapped transport"""
+        return self.transport.errors
+
+    def get(self, url, headers=None, params=None):
+        """Send a GET request and record its response"""
+        response = self.transport.get(url, headers=headers, params=params)
+
+        key = normalize_url(url, params)
+        try:
+            self.store.save(key, response)
+            logger.debug(f"Recorded {key} ({response.status_code})")
+        except OSError as e:
+            logger.error(f"Could not record fixture for {key}: {e}")
+
+        return response
+
+    def close(self):
+        """Close the wrapped transport"""
+        self.transport.close()
+
+class ReplayTransport:
+    """Serves recorded responses from disk instead of the network"""
+
+    def __init__(self, store=None, latency=None, jitter=None, seed=0):
+        """
+        Initialize the replayer
+
+        Args:
+            store (FixtureStore): Where responses are read from
+            latency (float): Seconds added to every response, to mimic the network
+            jitter (float): Extra random delay of up to this many seconds
+            seed (int): Seed for the jitter, so runs are repeatable
+        """
+        self.store = store or FixtureStore()
+        self.latency = config.HTTP_REPLAY_LATENCY_MS / 1000 if latency is None else latency
+        self.jitter = config.HTTP_REPLAY_JITTER_MS / 1000 if jitter is None else jitter
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def errors(self):
+        """Exception types raised for failed requests"""
+        return (requests.exceptions.RequestException,)
+
+    def get(self, url, headers=None, params=None):
+        """Return the recorded response for a request, or a 404 when none was recorded"""
+        delay = self.latency
+        if self.jitter:
+            with self._random_lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        key = normalize_url(url, params)
+        response = self.store.load(key)
+        if response is not None:
+            return response
+
+        logger.warning(f"No recorded response for {key}")
+        response = requests.Response()
+        response.status_code = 404
+        response.reason = "Not Recorded"
+        response._content = b""
+        response.url = key
+        return response
+
+    def close(self):
+        """Nothing to release"""
+        pass
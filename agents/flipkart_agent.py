@@ -1,21 +1,38 @@
 import re
-from bs4 import BeautifulSoup
 from loguru import logger
 
 from agents.base_agent import BaseAgent
+from agents.extraction import Field, ResultSelectors, extract_results
 
 class FlipkartAgent(BaseAgent):
     """Agent for checking prices on Flipkart"""
 
+    DEFAULT_BASE_URL = "https://www.flipkart.com"
+
+    # Search result card and the fields read from it
+    RESULT_SELECTORS = ResultSelectors('div._1AtVbE', {
+        "url": Field('a._1fQZEK, a._2rpwqI, a.s1Q9rs', attribute='href'),
+        "name": Field('div._4rR01T, a.s1Q9rs, div._2WkVRV'),
+        "price": Field('div._30jeq3')
+    })
+
+    # Product pages look like /<slug>/p/itm<id>
+    PRODUCT_URL_PATTERN = re.compile(r'flipkart\.com/[^?#]*/p/itm')
+
+    PRODUCT_PAGE_SELECTORS = ResultSelectors('body', {
+        "name": Field('span.B_NuCI'),
+        "price": Field('div._30jeq3._16Jk6d', 'div._30jeq3')
+    })
+
     @property
     def retailer_name(self):
         return "Flipkart"
 
-    def search_product(self, product_name):
-        """Search for a product on Flipkart and return its details"""
+    def search_products(self, product_name, limit=1):
+        """Search for a product on Flipkart and return up to `limit` results"""
         try:
             # Format the search URL with men's clothing specific parameters
-            search_url = "https://www.flipkart.com/search"
+            search_url = f"{self.base_url}/search"
 
             # Add "men" to the search query if not already present
             search_query = product_name
@@ -38,54 +55,56 @@ class FlipkartAgent(BaseAgent):
             # Make the request
             response = self._make_request(search_url, params)
             if not response:
-                return None
+                return []
 
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'lxml')
+            return self.parse_search_page(response.content, product_name, limit)
+        except Exception as e:
+            logger.error(f"Error searching for '{product_name}' on Flipkart: {e}")
+            return []
 
-            # Find the first product result
-            product_div = soup.select_one('div._1AtVbE')
-            if not product_div:
+    def parse_search_page(self, content, product_name, limit=1):
+        """Extract up to `limit` products from a Flipkart search results page"""
+        try:
+            # Find the top product results
+            cards = extract_results(content, self.RESULT_SELECTORS, limit)
+            if not cards:
                 logger.warning(f"No product results found for '{product_name}' on Flipkart")
-                return None
-
-            # Extract product details
-            product_url_element = product_div.select_one('a._1fQZEK, a._2rpwqI, a.s1Q9rs')
-            if not product_url_element:
-                logger.warning(f"Could not find product URL for '{product_name}' on Flipkart")
-                return None
-
-            # Get the product URL
-            product_url = "https://www.flipkart.com" + product_url_element['href']
-
-            # Get the product name
-            product_name_element = product_div.select_one('div._4rR01T, a.s1Q9rs, div._2WkVRV')
-            product_name_text = product_name_element.text.strip() if product_name_element else "Unknown Product"
-
-            # Get the product price
-            price_element = product_div.select_one('div._30jeq3')
-            if not price_element:
-                logger.warning(f"Could not find price for '{product_name}' on Flipkart")
-                return None
-
-            # Extract the price value
-            price_text = price_element.text.strip()
-            # Remove currency symbol (₹) and commas
-            price_text = price_text.replace('₹', '').replace(',', '')
-            price_match = re.search(r'(\d+)', price_text)
-            if not price_match:
-                logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Flipkart")
-                return None
-
-            price = float(price_match.group(1))
-
-            # Return the product details
-            return {
-                "price": price,
-                "url": product_url,
-                "retailer": self.retailer_name,
-                "name": product_name_text
-            }
+                return []
+
+            results = []
+            for card in cards:
+                # Skip cards without a product link or price (ads, placeholders)
+                if not card["url"] or not card["price"]:
+                    continue
+
+                # Get the product URL
+                product_url = self.base_url + card["url"]
+
+                # Get the product name
+                product_name_text = card["name"].strip() if card["name"] else "Unknown Product"
+
+                # Extract the price value
+                price_text = card["price"].strip()
+                # Remove currency symbol (₹) and commas
+                price_text = price_text.replace('₹', '').replace(',', '')
+                price_match = re.search(r'(\d+)', price_text)
+                if not price_match:
+                    logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Flipkart")
+                    continue
+
+                price = float(price_match.group(1))
+
+                results.append({
+                    "price": price,
+                    "url": product_url,
+                    "retailer": self.retailer_name,
+                    "name": product_name_text
+                })
+
+            if not results:
+                logger.warning(f"Could not find a priced product for '{product_name}' on Flipkart")
+
+            return results
         except Exception as e:
-            logger.error(f"Error searching for '{product_name}' on Flipkart: {e}")
-            return None
+            logger.error(f"Error parsing Flipkart results for '{product_name}': {e}")
+            return []
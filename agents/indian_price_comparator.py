@@ -1,28 +1,34 @@
 from loguru import logger
 
-from agents.flipkart_agent import FlipkartAgent
-from agents.myntra_agent import MyntraAgent
-from agents.ajio_agent import AjioAgent
+import config
+from agents.fan_out import SearchFanOut
+from agents.registry import create_agents
+from agents.relevance import cheapest, filter_relevant
 
 class IndianPriceComparator:
     """Compares prices from Indian retailers and finds the best deal"""
     
-    def __init__(self):
-        """Initialize the price comparator with Indian retail agents"""
-        self.agents = [
-            FlipkartAgent(),
-            MyntraAgent(),
-            AjioAgent()
-        ]
+    def __init__(self, fan_out=None, retailers=None):
+        """
+        Initialize the price comparator with Indian retail agents
+        
+        Args:
+            fan_out (SearchFanOut): Shared search engine; one is created when omitted
+            retailers (list): Retailer keys to query; defaults to the "in" region's retailers
+        """
+        self.agents = create_agents(config.RETAILERS_BY_REGION["in"] if retailers is None else retailers)
+        self.fan_out = fan_out or SearchFanOut()
         
         logger.info(f"Indian Price comparator initialized with {len(self.agents)} agents")
     
-    def find_prices(self, product_name):
+    def find_prices(self, product_name, known_urls=None):
         """
         Find prices for a product across all Indian retailers
         
         Args:
             product_name (str): The name of the product to search for
+            known_urls (dict): Product URLs already in the sheet, by retailer key
+                (e.g. {"flipkart": "..."}). Those retailers refresh the known page.
             
         Returns:
             dict: Product deals from each retailer with keys:
@@ -42,24 +48,22 @@ class IndianPriceComparator:
                 "best_deal": None
             }
             
-            # Check each agent
+            # Query all agents concurrently
+            candidates = []
+            for agent, agent_results in self.fan_out.search(self.agents, product_name, known_urls):
+                candidates.extend(agent_results)
+            
+            # Score every candidate from every retailer in one pass and drop unrelated listings
+            relevant = filter_relevant(product_name, candidates, trusted_urls=(known_urls or {}).values())
+            for result in relevant:
+                logger.info(f"Found {result['name']} for ₹{result['price']} at {result['retailer']}")
+            
+            # Keep the cheapest relevant listing per retailer, and overall
             for agent in self.agents:
-                try:
-                    retailer_name = agent.retailer_name.lower()
-                    logger.info(f"Checking {agent.retailer_name} for '{product_name}'")
-                    result = agent.search_product(product_name)
-                    
-                    if result:
-                        logger.info(f"Found {result['name']} for ₹{result['price']} at {result['retailer']}")
-                        results[retailer_name] = result
-                        
-                        # Update best deal if this is better
-                        if (results["best_deal"] is None or 
-                            result["price"] < results["best_deal"]["price"]):
-                            results["best_deal"] = result
-                except Exception as e:
-                    logger.error(f"Error with {agent.retailer_name} agent: {e}")
-                    continue
+                results[agent.retailer_key] = cheapest(
+                    [result for result in relevant if result["retailer"] == agent.retailer_name]
+                )
+            results["best_deal"] = cheapest(relevant)
             
             if results["best_deal"]:
                 logger.info(f"Best deal for '{product_name}': ₹{results['best_deal']['price']} at {results['best_deal']['retailer']}")
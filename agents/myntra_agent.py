@@ -1,64 +1,39 @@
 import re
 import json
-from bs4 import BeautifulSoup
 from loguru import logger
 
+import config
 from agents.base_agent import BaseAgent
+from agents.category_classifier import category_for
+from agents.extraction import Field, ResultSelectors, extract_results
+from agents.structured_data import extract_script_json
 
 class MyntraAgent(BaseAgent):
     """Agent for checking prices on Myntra"""
 
+    DEFAULT_BASE_URL = "https://www.myntra.com"
+
+    # Search result card and the fields read from it
+    RESULT_SELECTORS = ResultSelectors('li.product-base', {
+        "url": Field('a.product-link', attribute='href'),
+        "brand": Field('h3.product-brand'),
+        "name": Field('h4.product-product'),
+        "price": Field('div.product-price > span.product-discountedPrice', 'div.product-price > span')
+    })
+
+    # Product pages look like /<category>/<brand>/<slug>/<id>/buy
+    PRODUCT_URL_PATTERN = re.compile(r'myntra\.com/[^?#]+/\d+/buy')
+
     @property
     def retailer_name(self):
         return "Myntra"
 
     def _determine_category(self, product_name):
         """Determine the appropriate Myntra category based on the product name"""
-        product_name = product_name.lower()
-
-        # Map common clothing items to Myntra categories
-        if any(item in product_name for item in ["t-shirt", "tshirt", "t shirt"]):
-            return "tshirts"
-        elif any(item in product_name for item in ["shirt", "oxford", "chambray", "button down", "dress shirt"]):
-            return "shirts"
-        elif any(item in product_name for item in ["jeans", "denim"]):
-            return "jeans"
-        elif any(item in product_name for item in ["trouser", "chino", "pant"]):
-            return "trousers"
-        elif any(item in product_name for item in ["jacket", "bomber", "denim jacket"]):
-            return "jackets"
-        elif "hoodie" in product_name:
-            return "sweatshirts"
-        elif "polo" in product_name:
-            return "polos"
-        elif "suit" in product_name:
-            return "suits"
-        elif "shoe" in product_name or "sneaker" in product_name or "footwear" in product_name:
-            return "casual-shoes"
-        elif "formal shoe" in product_name:
-            return "formal-shoes"
-        elif "boot" in product_name:
-            return "boots"
-        elif "short" in product_name:
-            return "shorts"
-        elif "swim" in product_name or "trunk" in product_name:
-            return "swimwear"
-        elif "belt" in product_name:
-            return "belts"
-        elif "sunglass" in product_name:
-            return "sunglasses"
-        elif "watch" in product_name:
-            return "watches"
-        elif "bag" in product_name:
-            return "bags"
-        elif "coat" in product_name or "overcoat" in product_name:
-            return "coats"
-
-        # Default to a general category if no specific match
-        return "clothing"
-
-    def search_product(self, product_name):
-        """Search for a product on Myntra and return its details"""
+        return category_for(self.retailer_key, product_name)
+
+    def search_products(self, product_name, limit=1):
+        """Search for a product on Myntra and return up to `limit` results"""
         try:
             # Format the search URL with men's clothing specific parameters
 
@@ -74,7 +49,7 @@ class MyntraAgent(BaseAgent):
             category = self._determine_category(search_query)
 
             # Construct the search URL with category
-            search_url = f"https://www.myntra.com/men-{category}"
+            search_url = f"{self.base_url}/men-{category}"
 
             params = {
                 "q": search_query
@@ -83,61 +58,109 @@ class MyntraAgent(BaseAgent):
             # Make the request
             response = self._make_request(search_url, params)
             if not response:
-                return None
+                return []
 
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'lxml')
+            return self.parse_search_page(response.content, product_name, limit)
+        except Exception as e:
+            logger.error(f"Error searching for '{product_name}' on Myntra: {e}")
+            return []
 
-            # Find the first product result
-            product_div = soup.select_one('li.product-base')
-            if not product_div:
+    def parse_search_page(self, content, product_name, limit=1):
+        """Extract up to `limit` products from a Myntra search results page"""
+        try:
+            # Prefer the search state Myntra embeds as JSON; it needs no DOM at all
+            if config.STRUCTURED_DATA_EXTRACTION:
+                results = self._parse_embedded_results(content, limit)
+                if results:
+                    return results
+
+            # Find the top product results
+            cards = extract_results(content, self.RESULT_SELECTORS, limit)
+            if not cards:
                 logger.warning(f"No product results found for '{product_name}' on Myntra")
-                return None
-
-            # Extract product details
-            product_url_element = product_div.select_one('a.product-link')
-            if not product_url_element:
-                logger.warning(f"Could not find product URL for '{product_name}' on Myntra")
-                return None
-
-            # Get the product URL
-            product_url = "https://www.myntra.com" + product_url_element['href']
-
-            # Get the product name
-            brand_element = product_div.select_one('h3.product-brand')
-            product_element = product_div.select_one('h4.product-product')
-
-            brand_name = brand_element.text.strip() if brand_element else ""
-            product_desc = product_element.text.strip() if product_element else "Unknown Product"
-            product_name_text = f"{brand_name} {product_desc}".strip()
-
-            # Get the product price
-            price_element = product_div.select_one('div.product-price > span.product-discountedPrice')
-            if not price_element:
-                price_element = product_div.select_one('div.product-price > span')
-
-            if not price_element:
-                logger.warning(f"Could not find price for '{product_name}' on Myntra")
-                return None
-
-            # Extract the price value
-            price_text = price_element.text.strip()
-            # Remove currency symbol (₹) and commas
-            price_text = price_text.replace('Rs.', '').replace('₹', '').replace(',', '')
-            price_match = re.search(r'(\d+)', price_text)
-            if not price_match:
-                logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Myntra")
-                return None
-
-            price = float(price_match.group(1))
-
-            # Return the product details
+                return []
+
+            results = []
+            for card in cards:
+                # Skip cards without a product link or price (ads, placeholders)
+                if not card["url"] or not card["price"]:
+                    continue
+
+                # Get the product URL
+                product_url = self.base_url + card["url"]
+
+                # Get the product name
+                brand_name = card["brand"].strip() if card["brand"] else ""
+                product_desc = card["name"].strip() if card["name"] else "Unknown Product"
+                product_name_text = f"{brand_name} {product_desc}".strip()
+
+                # Extract the price value
+                price_text = card["price"].strip()
+                # Remove currency symbol (₹) and commas
+                price_text = price_text.replace('Rs.', '').replace('₹', '').replace(',', '')
+                price_match = re.search(r'(\d+)', price_text)
+                if not price_match:
+                    logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Myntra")
+                    continue
+
+                price = float(price_match.group(1))
+
+                results.append({
+                    "price": price,
+                    "url": product_url,
+                    "retailer": self.retailer_name,
+                    "name": product_name_text
+                })
+
+            if not results:
+                logger.warning(f"Could not find a priced product for '{product_name}' on Myntra")
+
+            return results
+        except Exception as e:
+            logger.error(f"Error parsing Myntra results for '{product_name}': {e}")
+            return []
+
+    def parse_product_page(self, content, url):
+        """Extract the price from a Myntra product page, preferring its embedded pdpData"""
+        state = extract_script_json(content, b"window.__myx") or {}
+        product = state.get("pdpData") or {}
+        price = (product.get("price") or {}).get("discounted") or (product.get("price") or {}).get("mrp")
+
+        if price:
             return {
-                "price": price,
-                "url": product_url,
+                "price": float(price),
+                "url": url,
                 "retailer": self.retailer_name,
-                "name": product_name_text
+                "name": product.get("name") or "Unknown Product"
             }
-        except Exception as e:
-            logger.error(f"Error searching for '{product_name}' on Myntra: {e}")
-            return None
+
+        return super().parse_product_page(content, url)
+
+    def _parse_embedded_results(self, content, limit=1):
+        """Read search results from the `window.__myx` state embedded in the page"""
+        state = extract_script_json(content, b"window.__myx")
+        if not state:
+            return []
+
+        products = state.get("searchData", {}).get("results", {}).get("products") or []
+
+        results = []
+        for product in products:
+            price = product.get("price") or product.get("mrp")
+            url = product.get("landingPageUrl")
+            if not price or not url:
+                continue
+
+            name = product.get("productName") or f"{product.get('brand', '')} {product.get('additionalInfo', '')}".strip()
+
+            results.append({
+                "price": float(price),
+                "url": f"{self.base_url}/" + url.lstrip("/"),
+                "retailer": self.retailer_name,
+                "name": name or "Unknown Product"
+            })
+
+            if len(results) >= limit:
+                break
+
+        return results
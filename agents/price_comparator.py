@@ -1,32 +1,34 @@
 from loguru import logger
 
-from agents.amazon_agent import AmazonAgent
-from agents.walmart_agent import WalmartAgent
-from agents.flipkart_agent import FlipkartAgent
-from agents.myntra_agent import MyntraAgent
-from agents.ajio_agent import AjioAgent
+import config
+from agents.fan_out import SearchFanOut
+from agents.registry import create_agents
+from agents.relevance import cheapest, filter_relevant
 
 class PriceComparator:
     """Compares prices from different retailers and finds the best deal"""
 
-    def __init__(self):
-        """Initialize the price comparator with agents"""
-        self.agents = [
-            AmazonAgent(),
-            WalmartAgent(),
-            FlipkartAgent(),
-            MyntraAgent(),
-            AjioAgent()
-        ]
+    def __init__(self, fan_out=None, retailers=None):
+        """
+        Initialize the price comparator with the enabled retailers' agents
+
+        Args:
+            fan_out (SearchFanOut): Shared search engine; one is created when omitted
+            retailers (list): Retailer keys to query; defaults to config.RETAILERS
+        """
+        self.agents = create_agents(config.RETAILERS if retailers is None else retailers)
+        self.fan_out = fan_out or SearchFanOut()
 
         logger.info(f"Price comparator initialized with {len(self.agents)} agents")
 
-    def find_best_price(self, product_name):
+    def find_best_price(self, product_name, known_urls=None):
         """
-        Find the best price for a product across all retailers
+        Find the best price for a product across the enabled retailers
 
         Args:
             product_name (str): The name of the product to search for
+            known_urls (dict): Product URLs already known, by retailer key. Those
+                retailers refresh the known page instead of searching.
 
         Returns:
             dict: Best product deal with keys:
@@ -38,24 +40,18 @@ class PriceComparator:
         try:
             logger.info(f"Searching for best price for '{product_name}'")
 
-            # Track the best deal
-            best_deal = None
-
-            # Check each agent
-            for agent in self.agents:
-                try:
-                    logger.info(f"Checking {agent.retailer_name} for '{product_name}'")
-                    result = agent.search_product(product_name)
+            # Query all agents concurrently
+            candidates = []
+            for agent, results in self.fan_out.search(self.agents, product_name, known_urls):
+                candidates.extend(results)
 
-                    if result:
-                        logger.info(f"Found {result['name']} for ${result['price']} at {result['retailer']}")
+            # Score every candidate from every retailer in one pass and drop unrelated listings
+            relevant = filter_relevant(product_name, candidates, trusted_urls=(known_urls or {}).values())
+            for result in relevant:
+                logger.info(f"Found {result['name']} for ${result['price']} at {result['retailer']}")
 
-                        # Update best deal if this is better
-                        if not best_deal or result["price"] < best_deal["price"]:
-                            best_deal = result
-                except Exception as e:
-                    logger.error(f"Error with {agent.retailer_name} agent: {e}")
-                    continue
+            # The best deal is the cheapest relevant listing
+            best_deal = cheapest(relevant)
 
             if best_deal:
                 logger.info(f"Best deal for '{product_name}': ${best_deal['price']} at {best_deal['retailer']}")
@@ -0,0 +1,96 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+import config
+
+class TokenBucket:
+    """Token bucket that refills at a fixed rate up to a burst size"""
+
+    def __init__(self, rate, burst):
+        """
+        Initialize the bucket
+
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Maximum number of tokens the bucket can hold
+        """
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` tokens are available, then take them"""
+        tokens = min(float(tokens), self.burst)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait_time = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+class RateLimiter:
+    """Per-retailer request pacing: a token bucket plus a max-in-flight cap for each key"""
+
+    def __init__(self, limits=None):
+        """
+        Initialize the rate limiter
+
+        Args:
+            limits (dict): Maps a retailer key to {"rate", "burst", "max_in_flight"}.
+                The "default" entry is used for keys that are not listed.
+        """
+        self.limits = limits or config.RATE_LIMITS
+        self._buckets = {}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _governors(self, key):
+        """Return the bucket and in-flight semaphore for a key, creating them on first use"""
+        with self._lock:
+            if key not in self._buckets:
+                limit = self.limits.get(key, self.limits["default"])
+                self._buckets[key] = TokenBucket(limit["rate"], limit["burst"])
+                self._semaphores[key] = threading.BoundedSemaphore(limit["max_in_flight"])
+                logger.debug(f"Rate limit for {key}: {limit['rate']}/s, burst {limit['burst']}, {limit['max_in_flight']} in flight")
+            return self._buckets[key], self._semaphores[key]
+
+    @contextmanager
+    def limit(self, key):
+        """Hold one in-flight slot and one token for `key` while the block runs"""
+        bucket, semaphore = self._governors(key)
+
+        with semaphore:
+            bucket.acquire()
+            yield
+
+    def acquire(self, key, tokens=1):
+        """Wait for `tokens` tokens for `key` without holding an in-flight slot"""
+        bucket, _ = self._governors(key)
+        bucket.acquire(tokens)
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter shared by all agents and scripts"""
+    global _shared_limiter
+
+    if _shared_limiter is None:
+        with _shared_limiter_lock:
+            if _shared_limiter is None:
+                _shared_limiter = RateLimiter()
+
+    return _shared_limiter
@@ -0,0 +1,130 @@
+import importlib
+import threading
+from importlib.metadata import entry_points
+
+from loguru import logger
+
+import config
+
+# Third-party packages can add retailers by declaring an entry point in this group,
+# e.g. `[project.entry-points."shopping_agent.retailers"] nykaa = "nykaa_agent:NykaaAgent"`
+ENTRY_POINT_GROUP = "shopping_agent.retailers"
+
+# Built-in agents as "module:Class" paths, imported only when first used
+BUILTIN_AGENTS = {
+    "amazon": "agents.amazon_agent:AmazonAgent",
+    "walmart": "agents.walmart_agent:WalmartAgent",
+    "flipkart": "agents.flipkart_agent:FlipkartAgent",
+    "myntra": "agents.myntra_agent:MyntraAgent",
+    "ajio": "agents.ajio_agent:AjioAgent"
+}
+
+class AgentRegistry:
+    """Maps retailer keys to agent classes, importing each class on first use"""
+
+    def __init__(self, group=ENTRY_POINT_GROUP):
+        """
+        Initialize the registry with the built-in agents
+
+        Args:
+            group (str): Entry point group scanned for additional agents
+        """
+        self.group = group
+        self._targets = dict(BUILTIN_AGENTS)
+        self._classes = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    def register(self, key, target):
+        """
+        Register an agent for a retailer key
+
+        Args:
+            key (str): Retailer key as used in config.RETAILERS
+            target: The agent class, or its "module:Class" path to import lazily
+        """
+        with self._lock:
+            key = key.lower()
+            self._targets[key] = target
+            self._classes.pop(key, None)
+
+    def available(self):
+        """Return every registered retailer key"""
+        self._load_entry_points()
+        return sorted(self._targets)
+
+    def get_class(self, key):
+        """
+        Return the agent class for a retailer key, importing it if needed
+
+        Raises:
+            KeyError: If no agent is registered for the key
+        """
+        self._load_entry_points()
+        key = key.lower()
+
+        with self._lock:
+            if key not in self._classes:
+                target = self._targets[key]
+                self._classes[key] = self._resolve(target)
+            return self._classes[key]
+
+    def create_agents(self, retailer_keys=None):
+        """
+        Instantiate the agents for the given retailers
+
+        Args:
+            retailer_keys (list): Retailer keys to load; defaults to config.RETAILERS
+
+        Returns:
+            list: Agent instances, in the order given. Unknown or broken retailers are skipped.
+        """
+        agents = []
+        for key in (config.RETAILERS if retailer_keys is None else retailer_keys):
+            try:
+                agents.append(self.get_class(key)())
+            except KeyError:
+                logger.warning(f"No agent registered for retailer '{key}'")
+            except Exception as e:
+                logger.error(f"Failed to load agent for retailer '{key}': {e}")
+        return agents
+
+    def _resolve(self, target):
+        """Turn a registered target into a class"""
+        if hasattr(target, "load"):
+            return target.load()
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            return getattr(importlib.import_module(module_name), class_name)
+        return target
+
+    def _load_entry_points(self):
+        """Add agents advertised by installed packages; built-ins and explicit registrations win"""
+        if self._entry_points_loaded:
+            return
+
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            self._entry_points_loaded = True
+
+            try:
+                for entry_point in entry_points(group=self.group):
+                    self._targets.setdefault(entry_point.name.lower(), entry_point)
+            except Exception as e:
+                logger.error(f"Error reading '{self.group}' entry points: {e}")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_agent_registry():
+    """Return the process-wide agent registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AgentRegistry()
+        return _registry
+
+def create_agents(retailer_keys=None):
+    """Instantiate the agents for the given retailers (defaults to config.RETAILERS)"""
+    return get_agent_registry().create_agents(retailer_keys)
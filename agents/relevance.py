@@ -0,0 +1,114 @@
+import re
+
+import numpy as np
+
+import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about which product a listing is
+STOP_WORDS = {"s", "a", "an", "and", "the", "for", "with", "of", "in", "by"}
+
+# Spellings folded together before tokenizing
+SYNONYMS = [
+    (re.compile(r"\bt[\s-]?shirts?\b"), "tshirt")
+]
+
+# Plurals that name a different product than their singular ("jean jacket", "short sleeve")
+UNFOLDED = {"jeans", "shorts"}
+
+def fold(token):
+    """Fold a plural token onto its singular, e.g. "chinos" -> "chino", "watches" -> "watch" """
+    if token in UNFOLDED or len(token) <= 3:
+        return token
+    if token.endswith(("sses", "shes", "ches", "xes", "zes")) and len(token) > 4:
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text):
+    """Split a product name into normalized tokens, plurals folded onto their singular"""
+    text = text.lower()
+    for pattern, replacement in SYNONYMS:
+        text = pattern.sub(replacement, text)
+    return [fold(token) for token in TOKEN_PATTERN.findall(text) if token not in STOP_WORDS]
+
+def score_candidates(query, names):
+    """
+    Score how well each listing name covers the query, in one vectorized pass
+
+    The score is the IDF-weighted share of query tokens present in the name. Query
+    tokens found in fewer candidates weigh more, as they tell the listings apart. A
+    token no candidate contains (e.g. "men", which titles often leave out) tells none
+    apart, so it gets the lowest weight, the same as a token every candidate contains.
+
+    Args:
+        query (str): The item name from the shopping list
+        names (list): Listing names from all retailers
+
+    Returns:
+        numpy.ndarray: One score in [0, 1] per name
+
+    Examples:
+        >>> float(score_candidates("Men's Chinos", ["Allen Solly Slim Fit Chino Trousers"])[0])
+        0.5
+        >>> float(score_candidates("Leather Loafers", ["Men Leather Loafer"])[0])
+        1.0
+        >>> float(score_candidates("Men's Jeans", ["Denim Jean Jacket"])[0])
+        0.0
+        >>> float(score_candidates("Men's Shorts", ["Short Sleeve Polo Shirt"])[0])
+        0.0
+    """
+    query_tokens = list(dict.fromkeys(tokenize(query)))
+    if not names:
+        return np.zeros(0)
+    if not query_tokens:
+        return np.ones(len(names))
+
+    columns = {token: index for index, token in enumerate(query_tokens)}
+    matches = np.zeros((len(names), len(query_tokens)), dtype=bool)
+    for row, name in enumerate(names):
+        for token in tokenize(name or ""):
+            column = columns.get(token)
+            if column is not None:
+                matches[row, column] = True
+
+    document_frequency = matches.sum(axis=0)
+    idf = np.where(
+        document_frequency > 0,
+        np.log((1 + len(names)) / (1 + document_frequency)) + 1.0,
+        1.0
+    )
+
+    return (matches @ idf) / idf.sum()
+
+def filter_relevant(query, candidates, threshold=None, trusted_urls=()):
+    """
+    Keep the candidates whose names match the query well enough
+
+    Args:
+        query (str): The item name from the shopping list
+        candidates (list): Product dicts from any number of retailers
+        threshold (float): Minimum score; defaults to config.RELEVANCE_THRESHOLD
+        trusted_urls (iterable): URLs that are always kept (known product pages)
+
+    Returns:
+        list: The relevant candidates, in their original order
+    """
+    if not candidates:
+        return []
+
+    threshold = config.RELEVANCE_THRESHOLD if threshold is None else threshold
+    trusted_urls = set(trusted_urls)
+
+    scores = score_candidates(query, [candidate["name"] for candidate in candidates])
+    return [
+        candidate
+        for candidate, score in zip(candidates, scores)
+        if score >= threshold or candidate["url"] in trusted_urls
+    ]
+
+def cheapest(candidates):
+    """Return the lowest-priced candidate, or None"""
+    return min(candidates, key=lambda candidate: candidate["price"]) if candidates else None
@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from loguru import logger
+
+import config
+
+def normalize_url(url, params=None):
+    """Return a canonical form of a URL plus its query params, used as the cache key"""
+    parts = urlsplit(url)
+
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        for name, value in params.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            query.extend((name, str(v)) for v in values)
+    query.sort()
+
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path or "/",
+        urlencode(query),
+        ""
+    ))
+
+class CachedEntry:
+    """A stored response as read back from the cache"""
+
+    __slots__ = ("key", "url", "status_code", "headers", "body", "etag", "last_modified", "stored_at")
+
+    def __init__(self, key, url, status_code, headers, body, etag, last_modified, stored_at):
+        self.key = key
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def to_response(self):
+        """Rebuild a requests.Response so agents can parse it like a live one"""
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = self.body
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.url = self.url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def conditional_headers(self):
+        """Headers that let the server answer 304 if our copy is still current"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """Persistent HTTP response cache with per-retailer TTLs and LRU eviction"""
+
+    def __init__(self, path=None, max_bytes=None, ttls=None):
+        """
+        Initialize the cache
+
+        Args:
+            path (str): SQLite file that holds the cache
+            max_bytes (int): Upper bound for the compressed bodies kept on disk
+            ttls (dict): Seconds a response stays fresh, by retailer key ("default" for the rest)
+        """
+        self.path = path or config.RESPONSE_CACHE_PATH
+        self.max_bytes = max_bytes or config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+        self.ttls = ttls or config.RESPONSE_CACHE_TTLS
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # WAL lets the server and the cron script share the file
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self.connection.commit()
+
+    def ttl_for(self, retailer_key):
+        """Return the freshness window in seconds for a retailer"""
+        return self.ttls.get(retailer_key, self.ttls["default"])
+
+    def is_fresh(self, entry, retailer_key):
+        """Return True if the entry can be served without contacting the retailer"""
+        return time.time() - entry.stored_at < self.ttl_for(retailer_key)
+
+    def get(self, key):
+        """Return the cached entry for a key, or None"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT url, status_code, headers, body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+
+        url, status_code, headers, body, etag, last_modified, stored_at = row
+        return CachedEntry(key, url, status_code, json.loads(headers), zlib.decompress(body), etag, last_modified, stored_at)
+
+    def put(self, key, response):
+        """Store a successful response and evict the least recently used entries if needed"""
+        body = zlib.compress(response.content)
+        headers = {name: value for name, value in response.headers.items() if name.lower() != "content-encoding"}
+        now = time.time()
+
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    str(response.url),
+                    response.status_code,
+                    json.dumps(headers),
+                    body,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(body)
+                )
+            )
+            self._evict()
+            self.connection.commit()
+
+    def revalidated(self, key):
+        """Mark an entry fresh again after the retailer answered 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key)
+            )
+            self.connection.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        logger.debug(f"Evicted {evicted} cached responses to stay under {self.max_bytes} bytes")
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Return the process-wide response cache, or None when caching is disabled"""
+    global _shared_cache
+
+    # Recording must see every request and replay measures the full path, so both skip the cache
+    if not config.RESPONSE_CACHE_ENABLED or config.HTTP_TRANSPORT_MODE != "live":
+        return None
+
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache()
+
+    return _shared_cache
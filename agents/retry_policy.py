@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from loguru import logger
+
+import config
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RetryPolicy:
+    """Exponential backoff with jitter that honours Retry-After"""
+
+    # Status codes worth retrying; anything else (e.g. 404) fails immediately
+    RETRYABLE_STATUS_CODES = {403, 408, 425, 429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts (int): Total attempts per request, the first one included
+            base_delay (float): Backoff before the first retry, doubled on each retry
+            max_delay (float): Longest wait allowed; a longer Retry-After gives up instead
+        """
+        self.max_attempts = max_attempts or config.RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else config.RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else config.RETRY_MAX_DELAY
+
+    def is_retryable(self, status_code):
+        """Return True if a failure with this status (None for network errors) can be retried"""
+        return status_code is None or status_code in self.RETRYABLE_STATUS_CODES
+
+    def next_delay(self, attempt, response=None):
+        """
+        Return the seconds to wait before the next attempt, or None to stop retrying
+
+        Args:
+            attempt (int): The attempt that just failed, starting at 1
+            response: The failed response, if the server sent one
+        """
+        if attempt >= self.max_attempts:
+            return None
+
+        status_code = response.status_code if response is not None else None
+        if not self.is_retryable(status_code):
+            return None
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            # Waiting longer than max_delay would stall the whole item, so give up instead
+            return retry_after if retry_after <= self.max_delay else None
+
+        # Equal jitter: half the backoff is fixed, the other half random
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+class CircuitBreaker:
+    """Stops calling a retailer after repeated failures until a probe request succeeds"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            name (str): Retailer key, used in log messages
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else config.CIRCUIT_RESET_SECONDS
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let exactly one probe through; everyone else keeps skipping
+                self.state = self.HALF_OPEN
+                logger.info(f"Circuit for {self.name} is half-open, sending a probe request")
+                return True
+
+            return False
+
+    def record_success(self):
+        """Close the circuit after a successful request"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Count a failed request and open the circuit when the threshold is reached"""
+        with self._lock:
+            self.failures += 1
+
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(key):
+    """Return the process-wide circuit breaker for a retailer key"""
+    with _circuit_breakers_lock:
+        if key not in _circuit_breakers:
+            _circuit_breakers[key] = CircuitBreaker(key)
+        return _circuit_breakers[key]
@@ -0,0 +1,80 @@
+import threading
+
+from loguru import logger
+
+def normalize_query(query):
+    """Fold case and whitespace so equivalent searches share a key"""
+    return " ".join((query or "").lower().split())
+
+class _Call:
+    """One in-flight call and the outcome its waiters receive"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run `fn` for `key`, or wait for the identical call already running
+
+        Only calls that overlap in time are shared; once the leader returns, the next
+        caller for the key starts a fresh call.
+
+        Args:
+            key: Hashable identity of the call
+            fn (callable): The function to run when no call is in flight
+
+        Returns:
+            The leader's result. If the leader raised, every waiter raises the same error.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            logger.debug(f"Joining in-flight call for {key} ({self.in_flight()} distinct calls in flight)")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Return the number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight():
+    """Return the process-wide single-flight group shared by all agents"""
+    global _single_flight
+
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+
+    return _single_flight
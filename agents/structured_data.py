@@ -0,0 +1,101 @@
+import json
+import re
+
+from loguru import logger
+
+# orjson decodes several times faster; the standard library is used when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(payload):
+    """Decode JSON from bytes with the fastest available parser"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def extract_script_json(content, marker):
+    """
+    Decode a JSON object assigned inside a script tag, e.g. `window.__myx = {...}`
+
+    Args:
+        content (bytes): Raw page body
+        marker (bytes): Text that precedes the assignment
+
+    Returns:
+        dict: The decoded object, or None when the block is missing or malformed
+    """
+    position = content.find(marker)
+    if position < 0:
+        return None
+
+    start = content.find(b"{", position)
+    end = content.find(b"</script>", start)
+    if start < 0 or end < 0:
+        return None
+
+    payload = content[start:end].rstrip().rstrip(b";")
+
+    try:
+        return loads(payload)
+    except ValueError:
+        pass
+
+    # The script may hold more statements after the object; decode just the object
+    try:
+        state, _ = json.JSONDecoder().raw_decode(payload.decode("utf-8"))
+        return state
+    except ValueError as e:
+        logger.debug(f"Could not decode embedded JSON after {marker!r}: {e}")
+        return None
+
+# <script type="application/ld+json"> blocks, matched on the raw bytes
+_JSON_LD_PATTERN = re.compile(
+    rb'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+def _find_product_nodes(node):
+    """Yield every schema.org Product object inside a decoded JSON-LD document"""
+    if isinstance(node, list):
+        for child in node:
+            yield from _find_product_nodes(child)
+    elif isinstance(node, dict):
+        node_type = node.get("@type")
+        if node_type == "Product" or (isinstance(node_type, list) and "Product" in node_type):
+            yield node
+        for child in node.get("@graph", []):
+            yield from _find_product_nodes(child)
+
+def extract_json_ld_product(content):
+    """
+    Read the name and price of the schema.org Product described by a page's JSON-LD
+
+    Args:
+        content (bytes): Raw page body
+
+    Returns:
+        dict: {"name": str, "price": float}, or None when no priced Product is present
+    """
+    for match in _JSON_LD_PATTERN.finditer(content):
+        try:
+            document = loads(match.group(1).strip())
+        except ValueError:
+            continue
+
+        for product in _find_product_nodes(document):
+            offers = product.get("offers") or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+
+            price = offers.get("price") or offers.get("lowPrice")
+            if price in (None, ""):
+                continue
+
+            try:
+                return {"name": product.get("name") or "", "price": float(str(price).replace(",", ""))}
+            except ValueError:
+                continue
+
+    return None
@@ -0,0 +1,128 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+import config
+
+# httpx is only needed when HTTP/2 is switched on
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+class HttpTransport:
+    """Keep-alive HTTP transport with one connection pool per retailer host"""
+
+    def __init__(self, pool_maxsize=None, connect_timeout=None, read_timeout=None, http2=None):
+        """
+        Initialize the transport
+
+        Args:
+            pool_maxsize (int): Connections kept alive per host
+            connect_timeout (float): Seconds allowed to establish a connection
+            read_timeout (float): Seconds allowed between bytes of the response
+            http2 (bool): Use HTTP/2 through httpx when it is installed
+        """
+        self.pool_maxsize = pool_maxsize or config.HTTP_POOL_MAXSIZE
+        self.connect_timeout = connect_timeout or config.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or config.HTTP_READ_TIMEOUT
+        self.http2 = config.HTTP2_ENABLED if http2 is None else http2
+
+        if self.http2 and httpx is None:
+            logger.warning("HTTP/2 requested but httpx is not installed. Falling back to HTTP/1.1.")
+            self.http2 = False
+
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def errors(self):
+        """Exception types raised by this transport for failed requests"""
+        if self.http2:
+            return (requests.exceptions.RequestException, httpx.HTTPError)
+        return (requests.exceptions.RequestException,)
+
+    def get(self, url, headers=None, params=None):
+        """Send a GET request over the pooled connection for the URL's host"""
+        client = self._client_for(url)
+
+        if self.http2:
+            return client.get(url, headers=headers, params=params)
+
+        return client.get(
+            url,
+            headers=headers,
+            params=params,
+            timeout=(self.connect_timeout, self.read_timeout)
+        )
+
+    def _client_for(self, url):
+        """Return the pooled client for a URL's host, creating it on first use"""
+        host = urlsplit(url).netloc.lower()
+
+        client = self._clients.get(host)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if host not in self._clients:
+                self._clients[host] = self._create_client()
+                logger.debug(f"Opened connection pool for {host} (size {self.pool_maxsize}, http2={self.http2})")
+            return self._clients[host]
+
+    def _create_client(self):
+        """Create a keep-alive client for a single host"""
+        if self.http2:
+            return httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize
+                ),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            )
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+def get_transport():
+    """Return the process-wide transport shared by all agents (live, record or replay)"""
+    global _shared_transport
+
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = _create_transport(config.HTTP_TRANSPORT_MODE)
+
+    return _shared_transport
+
+def _create_transport(mode):
+    """Build the transport for an HTTP_TRANSPORT_MODE value"""
+    from agents.fixture_transport import RecordingTransport, ReplayTransport
+
+    if mode == "record":
+        logger.info(f"Recording retailer responses to {config.HTTP_FIXTURES_DIR}")
+        return RecordingTransport(HttpTransport())
+    if mode == "replay":
+        logger.info(f"Replaying retailer responses from {config.HTTP_FIXTURES_DIR}")
+        return ReplayTransport()
+    if mode != "live":
+        logger.warning(f"Unknown HTTP_TRANSPORT_MODE '{mode}', using live requests")
+    return HttpTransport()
@@ -1,21 +1,38 @@
 import re
-from bs4 import BeautifulSoup
 from loguru import logger
 
 from agents.base_agent import BaseAgent
+from agents.extraction import Field, ResultSelectors, extract_results
 
 class WalmartAgent(BaseAgent):
     """Agent for checking prices on Walmart"""
     
+    DEFAULT_BASE_URL = "https://www.walmart.com"
+    
+    # Search result card and the fields read from it
+    RESULT_SELECTORS = ResultSelectors('div[data-item-id]', {
+        "url": Field('a[link-identifier="linkText"]', attribute='href'),
+        "name": Field('a[link-identifier="linkText"] span.lh-title'),
+        "price": Field('div[data-automation-id="product-price"] span.w_iUH7')
+    })
+    
+    # Product pages look like /ip/<slug>/<id>
+    PRODUCT_URL_PATTERN = re.compile(r'walmart\.com/ip/')
+    
+    PRODUCT_PAGE_SELECTORS = ResultSelectors('body', {
+        "name": Field('h1[itemprop="name"]', 'h1'),
+        "price": Field('span[itemprop="price"]')
+    })
+    
     @property
     def retailer_name(self):
         return "Walmart"
     
-    def search_product(self, product_name):
-        """Search for a product on Walmart and return its details"""
+    def search_products(self, product_name, limit=1):
+        """Search for a product on Walmart and return up to `limit` results"""
         try:
             # Format the search URL
-            search_url = "https://www.walmart.com/search"
+            search_url = f"{self.base_url}/search"
             params = {
                 "q": product_name
             }
@@ -23,52 +40,54 @@ class WalmartAgent(BaseAgent):
             # Make the request
             response = self._make_request(search_url, params)
             if not response:
-                return None
+                return []
             
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Find the first product result
-            product_div = soup.select_one('div[data-item-id]')
-            if not product_div:
+            return self.parse_search_page(response.content, product_name, limit)
+        except Exception as e:
+            logger.error(f"Error searching for '{product_name}' on Walmart: {e}")
+            return []
+    
+    def parse_search_page(self, content, product_name, limit=1):
+        """Extract up to `limit` products from a Walmart search results page"""
+        try:
+            # Find the top product results
+            cards = extract_results(content, self.RESULT_SELECTORS, limit)
+            if not cards:
                 logger.warning(f"No product results found for '{product_name}' on Walmart")
-                return None
-            
-            # Extract product details
-            product_url_element = product_div.select_one('a[link-identifier="linkText"]')
-            if not product_url_element:
-                logger.warning(f"Could not find product URL for '{product_name}' on Walmart")
-                return None
-            
-            # Get the product URL
-            product_url = "https://www.walmart.com" + product_url_element['href']
-            
-            # Get the product name
-            product_name_element = product_url_element.select_one('span.lh-title')
-            product_name_text = product_name_element.text.strip() if product_name_element else "Unknown Product"
+                return []
             
-            # Get the product price
-            price_element = product_div.select_one('div[data-automation-id="product-price"] span.w_iUH7')
-            if not price_element:
-                logger.warning(f"Could not find price for '{product_name}' on Walmart")
-                return None
+            results = []
+            for card in cards:
+                # Skip cards without a product link or price (ads, placeholders)
+                if not card["url"] or not card["price"]:
+                    continue
+                
+                # Get the product URL
+                product_url = self.base_url + card["url"]
+                
+                # Get the product name
+                product_name_text = card["name"].strip() if card["name"] else "Unknown Product"
+                
+                # Extract the price value
+                price_text = card["price"].strip()
+                price_match = re.search(r'(\d+\.\d+)', price_text)
+                if not price_match:
+                    logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Walmart")
+                    continue
+                
+                price = float(price_match.group(1))
+                
+                results.append({
+                    "price": price,
+                    "url": product_url,
+                    "retailer": self.retailer_name,
+                    "name": product_name_text
+                })
             
-            # Extract the price value
-            price_text = price_element.text.strip()
-            price_match = re.search(r'(\d+\.\d+)', price_text)
-            if not price_match:
-                logger.warning(f"Could not parse price '{price_text}' for '{product_name}' on Walmart")
-                return None
+            if not results:
+                logger.warning(f"Could not find a priced product for '{product_name}' on Walmart")
             
-            price = float(price_match.group(1))
-            
-            # Return the product details
-            return {
-                "price": price,
-                "url": product_url,
-                "retailer": self.retailer_name,
-                "name": product_name_text
-            }
+            return results
         except Exception as e:
-            logger.error(f"Error searching for '{product_name}' on Walmart: {e}")
-            return None
+            logger.error(f"Error parsing Walmart results for '{product_name}': {e}")
+            return []
@@ -1,5 +1,8 @@
 import os
+import time
+import gspread
 from fastapi import FastAPI, BackgroundTasks, HTTPException, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
@@ -11,6 +14,8 @@ load_dotenv()
 
 # Import services
 from services.sheets_service import GoogleSheetsService
+from services.async_sheets import AsyncSheetsService
+from services.price_store import sheet_key
 from services.whatsapp_service import WhatsAppService
 from services.scheduler import Scheduler
 from agents.price_comparator import PriceComparator
@@ -39,6 +44,7 @@ app.add_middleware(
 
 # Initialize services
 sheets_service = None
+sheets = None
 whatsapp_service = None
 price_comparator = None
 indian_price_comparator = None
@@ -46,6 +52,8 @@ scheduler = None
 
 try:
     sheets_service = GoogleSheetsService()
+    # Handlers await Sheets calls through this, so they never block the event loop
+    sheets = AsyncSheetsService(sheets_service)
     whatsapp_service = WhatsAppService()
     price_comparator = PriceComparator()
     indian_price_comparator = IndianPriceComparator()
@@ -59,9 +67,9 @@ async def startup_event():
     """Start the scheduler when the application starts"""
     try:
         # Create the Shopping Assistant worksheet if it doesn't exist
-        if sheets_service:
+        if sheets:
             try:
-                sheets_service.create_shopping_worksheet()
+                await sheets.create_shopping_worksheet()
                 logger.info("Shopping Assistant worksheet created or already exists")
             except Exception as e:
                 logger.error(f"Failed to create Shopping Assistant worksheet: {e}")
@@ -75,13 +83,21 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Stop the scheduler when the application shuts down"""
+    """Stop the scheduler and the sheet syncers when the application shuts down"""
     try:
         scheduler.stop()
         logger.info("Scheduler stopped successfully")
     except Exception as e:
         logger.error(f"Failed to stop scheduler: {e}")
 
+    # Push whatever is still only in the local price store
+    try:
+        if sheets:
+            await sheets.stop_sync()
+            sheets.shutdown()
+    except Exception as e:
+        logger.error(f"Failed to sync the price store on shutdown: {e}")
+
 @app.get("/")
 async def root():
     """Root endpoint to check if the server is running"""
@@ -91,12 +107,32 @@ async def root():
 async def get_items():
     """Get all items from the shopping list"""
     try:
-        items = sheets_service.get_all_items()
-        return {"items": items}
+        items = await sheets.get_all_items()
+        return {"items": [item.to_dict() for item in items]}
     except Exception as e:
         logger.error(f"Failed to get items: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/items/{item_id}/history")
+async def get_item_history(
+    item_id: int, days: Optional[float] = None, retailer: Optional[str] = None, worksheet: Optional[str] = None
+):
+    """
+    Get the prices observed for an item, optionally only the last `days` days or one retailer
+
+    `worksheet` names the worksheet the item is on, e.g. "Mens Shopping" for the Indian
+    retailer refresh; the shopping list worksheet by default.
+    """
+    try:
+        start = time.time() - days * 86400 if days else None
+        history = await sheets.get_price_history(item_id, start=start, retailer=retailer, worksheet_name=worksheet)
+        return {"item_id": item_id, **history}
+    except gspread.exceptions.WorksheetNotFound:
+        raise HTTPException(status_code=404, detail=f"Worksheet '{worksheet}' not found")
+    except Exception as e:
+        logger.error(f"Failed to get price history for item {item_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/update-prices")
 async def update_prices(background_tasks: BackgroundTasks):
     """Manually trigger a price update"""
@@ -111,12 +147,12 @@ async def update_prices(background_tasks: BackgroundTasks):
 async def send_notification(item_id: str):
     """Manually send a notification for a specific item"""
     try:
-        item = sheets_service.get_item(item_id)
+        item = await sheets.get_item(item_id)
         if not item:
             raise HTTPException(status_code=404, detail="Item not found")
 
-        message = f"🔔 Price Alert: {item['name']} is now available for {item['current_price']} at {item['retailer']}. Shop now: {item['url']}"
-        whatsapp_service.send_message(message)
+        message = f"🔔 Price Alert: {item.name} is now available for {item.current_price} at {item.retailer}. Shop now: {item.url}"
+        await run_in_threadpool(whatsapp_service.send_message, message)
         return {"status": "success", "message": "Notification sent"}
     except HTTPException:
         raise
@@ -128,10 +164,10 @@ async def send_notification(item_id: str):
 async def create_shopping_assistant():
     """Create a new Shopping Assistant worksheet"""
     try:
-        if not sheets_service:
+        if not sheets:
             raise HTTPException(status_code=500, detail="Google Sheets service not initialized")
 
-        worksheet = sheets_service.create_shopping_worksheet()
+        worksheet = await sheets.create_shopping_worksheet()
         return {"status": "success", "message": f"Created Shopping Assistant worksheet"}
     except Exception as e:
         logger.error(f"Failed to create Shopping Assistant worksheet: {e}")
@@ -141,29 +177,14 @@ async def create_shopping_assistant():
 async def add_items(items: List[Item]):
     """Add items to the Shopping Assistant worksheet"""
     try:
-        if not sheets_service:
+        if not sheets:
             raise HTTPException(status_code=500, detail="Google Sheets service not initialized")
 
         # Create or get the worksheet
-        worksheet = sheets_service.create_shopping_worksheet()
+        worksheet = await sheets.create_shopping_worksheet()
 
-        # Get existing items to avoid duplicates
-        all_values = worksheet.get_all_values()
-        existing_items = [row[0] for row in all_values[1:] if row and len(row) > 0]
-
-        # Add new items
-        added_count = 0
-        for item in items:
-            if item.name not in existing_items:
-                # Add the item to the next available row
-                next_row = len(all_values) + 1 + added_count  # Increment for each added item
-                target_price_str = f"₹{item.target_price:.2f}" if item.target_price else ""
-
-                # Create a row with the item data
-                row_data = [[item.name, target_price_str]]
-                worksheet.update(f'A{next_row}:B{next_row}', row_data)
-
-                added_count += 1
+        # Add the new items in one batched write and bring them into the local price store
+        added_count = await sheets.add_items(worksheet, [(item.name, item.target_price) for item in items])
 
         return {"status": "success", "message": f"Added {added_count} new items to Shopping Assistant worksheet"}
     except Exception as e:
@@ -174,7 +195,7 @@ async def add_items(items: List[Item]):
 async def update_indian_prices(background_tasks: BackgroundTasks):
     """Manually trigger a price update for Indian retailers"""
     try:
-        if not sheets_service or not indian_price_comparator:
+        if not sheets or not indian_price_comparator:
             raise HTTPException(status_code=500, detail="Required services not initialized")
 
         background_tasks.add_task(update_indian_retailer_prices)
@@ -185,51 +206,69 @@ async def update_indian_prices(background_tasks: BackgroundTasks):
 
 async def update_indian_retailer_prices():
     """Update prices from Indian retailers for all items in the Shopping Assistant worksheet"""
+    worksheet = None
+    run_id = None
+    checked_rows = []
     try:
         # Create or get the worksheet
-        worksheet = sheets_service.create_shopping_worksheet()
+        worksheet = await sheets.create_shopping_worksheet()
 
-        # Get all items
-        all_values = worksheet.get_all_values()
+        # Items come from the local price store, which the syncer keeps in step with the sheet
+        items = await sheets.get_all_items(worksheet)
+        run_id = await sheets.call(sheets_service.store.start_run, "indian-prices", sheet_key(worksheet))
 
-        # Skip header row
-        for i, row in enumerate(all_values[1:], start=2):
-            if not row or len(row) == 0 or not row[0]:
+        for item in items:
+            if not item.name:
                 continue
 
-            item_name = row[0]
+            item_name = item.name
             logger.info(f"Searching for prices for '{item_name}' on Indian retailers")
 
+            # Product URLs from earlier runs let retailers refresh the page directly
+            known_urls = await sheets.known_urls(worksheet, item.id)
+
             # Get prices from all Indian retailers
-            results = indian_price_comparator.find_prices(item_name)
+            results = await run_in_threadpool(indian_price_comparator.find_prices, item_name, known_urls)
+            checked_rows.append(item.id)
 
             # Update prices for each retailer
             if results["flipkart"]:
-                sheets_service.update_retailer_price(
-                    worksheet, i, "Flipkart",
+                await sheets.update_retailer_price(
+                    worksheet, item.id, "Flipkart",
                     results["flipkart"]["price"],
                     results["flipkart"]["url"]
                 )
 
             if results["myntra"]:
-                sheets_service.update_retailer_price(
-                    worksheet, i, "Myntra",
+                await sheets.update_retailer_price(
+                    worksheet, item.id, "Myntra",
                     results["myntra"]["price"],
                     results["myntra"]["url"]
                 )
 
             if results["ajio"]:
-                sheets_service.update_retailer_price(
-                    worksheet, i, "Ajio",
+                await sheets.update_retailer_price(
+                    worksheet, item.id, "Ajio",
                     results["ajio"]["price"],
                     results["ajio"]["url"]
                 )
 
+        await sheets.call(sheets_service.store.finish_run, run_id, len(checked_rows))
         logger.info("Completed Indian retailer price update")
         return True
     except Exception as e:
         logger.error(f"Failed to update Indian retailer prices: {e}")
+        if run_id is not None:
+            await sheets.call(sheets_service.store.finish_run, run_id, len(checked_rows), "failed")
         return False
+    finally:
+        # Stamp the rows done (including those before a failure) and let the syncer push them
+        if worksheet is not None:
+            try:
+                await sheets.mark_checked(worksheet, checked_rows)
+                await sheets.request_sync()
+            except Exception as e:
+                logger.error(f"Failed to record checked rows: {e}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Fake Retailer Server
+
+A local HTTP server that imitates the search endpoints the agents call, for load
+testing without touching the real retailers. Each retailer lives under its own path
+prefix, so pointing an agent at it only takes a base URL override:
+
+    FLIPKART_BASE_URL=http://127.0.0.1:8700/flipkart
+    MYNTRA_BASE_URL=http://127.0.0.1:8700/myntra
+    AJIO_BASE_URL=http://127.0.0.1:8700/ajio
+    AMAZON_BASE_URL=http://127.0.0.1:8700/amazon
+    WALMART_BASE_URL=http://127.0.0.1:8700/walmart
+
+Pages are generated from the search query, so every result matches what was asked for.
+GET /_stats returns request counts per retailer and status, and the peak concurrency seen.
+
+Usage:
+    python -m benchmarks.fake_retailer_server [--port 8700] [--latency-ms 300] [--error-rate 0.01]
+
+Options:
+    --port            Port to listen on (default: 8700)
+    --cards           Result cards per page (default: 40)
+    --page-kib        Approximate script bulk per page in KiB (default: 150)
+    --latency-ms      Median response latency (default: 200)
+    --latency-sigma   Spread of the log-normal latency distribution (default: 0.5)
+    --error-rate      Fraction of requests answered with 500 (default: 0)
+    --forbidden-rate  Fraction of requests answered with 403 (default: 0)
+    --max-rps         Requests per second per retailer before answering 429 (default: unlimited)
+    --retry-after     Retry-After seconds sent with 429 (default: 1)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import pages
+
+# Query parameter each retailer's search URL carries the search text in
+QUERY_PARAMETERS = {"flipkart": "q", "myntra": "q", "ajio": "query", "amazon": "k", "walmart": "q"}
+
+# Page generator for each retailer prefix
+PAGE_BUILDERS = {
+    "flipkart": pages.flipkart_page,
+    "myntra": pages.myntra_page,
+    "ajio": pages.ajio_page,
+    "amazon": pages.amazon_page,
+    "walmart": pages.walmart_page
+}
+
+class FakeRetailerBehaviour:
+    """Knobs that decide how the fake retailers answer"""
+
+    def __init__(self, cards=40, page_kib=150, latency_ms=200, latency_sigma=0.5,
+                 error_rate=0.0, forbidden_rate=0.0, max_rps=None, retry_after=1, seed=None):
+        self.cards = cards
+        self.page_kib = page_kib
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.forbidden_rate = forbidden_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def latency(self):
+        """Draw one response latency in seconds from a log-normal distribution"""
+        if not self.latency_ms:
+            return 0.0
+        with self.lock:
+            return self.random.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+
+    def failure(self):
+        """Return 500 or 403 for an injected failure, or None to answer normally"""
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.forbidden_rate:
+            return 403
+        return None
+
+class FakeRetailerStats:
+    """Request counters and per-retailer throttling windows"""
+
+    def __init__(self):
+        self.statuses = Counter()
+        self.in_flight = Counter()
+        self.peak_in_flight = Counter()
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def start(self, retailer):
+        """Count a request as in flight"""
+        with self._lock:
+            self.in_flight[retailer] += 1
+            self.peak_in_flight[retailer] = max(self.peak_in_flight[retailer], self.in_flight[retailer])
+
+    def finish(self, retailer, status):
+        """Record the status a request was answered with"""
+        with self._lock:
+            self.in_flight[retailer] -= 1
+            self.statuses[f"{retailer} {status}"] += 1
+
+    def over_limit(self, retailer, max_rps):
+        """Count a request in the retailer's one-second window; True when it exceeds max_rps"""
+        if not max_rps:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            window_start, count = self._windows.get(retailer, (now, 0))
+            if now - window_start >= 1.0:
+                window_start, count = now, 0
+            count += 1
+            self._windows[retailer] = (window_start, count)
+            return count > max_rps
+
+    def snapshot(self):
+        """Return the counters as plain dicts"""
+        with self._lock:
+            return {"statuses": dict(self.statuses), "peak_in_flight": dict(self.peak_in_flight)}
+
+def make_handler(behaviour, stats):
+    """Build a request handler class bound to the given behaviour and stats"""
+
+    class FakeRetailerHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path == "/_stats":
+                return self._send(200, json.dumps(stats.snapshot()).encode("utf-8"), "application/json")
+
+            retailer = parts.path.strip("/").split("/")[0]
+            if retailer not in PAGE_BUILDERS:
+                return self._send(404, b"unknown retailer")
+
+            stats.start(retailer)
+            status = 200
+            try:
+                time.sleep(behaviour.latency())
+
+                if stats.over_limit(retailer, behaviour.max_rps):
+                    status = 429
+                    return self._send(429, b"slow down", headers={"Retry-After": str(behaviour.retry_after)})
+
+                failure = behaviour.failure()
+                if failure:
+                    status = failure
+                    return self._send(failure, b"injected failure")
+
+                query = parse_qs(parts.query).get(QUERY_PARAMETERS[retailer], [""])[0]
+                seed = int(hashlib.md5(f"{retailer}:{query}".encode("utf-8")).hexdigest()[:8], 16)
+                page = PAGE_BUILDERS[retailer](
+                    random.Random(seed),
+                    behaviour.cards,
+                    filler_kib=behaviour.page_kib,
+                    query=query or None
+                )
+                return self._send(200, page.encode("utf-8"))
+            finally:
+                stats.finish(retailer, status)
+
+        def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FakeRetailerHandler
+
+def start_server(port=8700, behaviour=None, host="127.0.0.1"):
+    """
+    Start the fake retailer server on a background thread
+
+    Returns:
+        tuple: (server, stats). Call server.shutdown() to stop it.
+    """
+    behaviour = behaviour or FakeRetailerBehaviour()
+    stats = FakeRetailerStats()
+
+    server = ThreadingHTTPServer((host, port), make_handler(behaviour, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-retailer", daemon=True).start()
+    return server, stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake retailer search pages for load tests')
+    parser.add_argument('--port', type=int, default=8700, help='Port to listen on')
+    parser.add_argument('--cards', type=int, default=40, help='Result cards per page')
+    parser.add_argument('--page-kib', type=int, default=150, help='Approximate script bulk per page in KiB')
+    parser.add_argument('--latency-ms', type=float, default=200, help='Median response latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Spread of the log-normal latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 500 responses')
+    parser.add_argument('--forbidden-rate', type=float, default=0.0, help='Fraction of 403 responses')
+    parser.add_argument('--max-rps', type=float, default=None, help='Requests per second per retailer before 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+    args = parser.parse_args()
+
+    behaviour = FakeRetailerBehaviour(
+        cards=args.cards,
+        page_kib=args.page_kib,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        forbidden_rate=args.forbidden_rate,
+        max_rps=args.max_rps,
+        retry_after=args.retry_after
+    )
+    server, _ = start_server(args.port, behaviour)
+    print(f"Fake retailers listening on http://127.0.0.1:{args.port}/<retailer>")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Refresh Pipeline Load Test
+
+Drives the IndianPriceComparator over many generated items against the fake retailer
+server and reports throughput, per-item latency and how the retailers were hit
+(status counts and peak concurrency). The server runs in-process unless --server-url
+points at one started with `python -m benchmarks.fake_retailer_server`.
+
+Usage:
+    python -m benchmarks.load_test [--items 10000] [--item-workers 16] [--latency-ms 200]
+
+Options:
+    --items           Number of items to refresh (default: 1000)
+    --item-workers    Items refreshed at the same time (default: 8)
+    --retailers       Comma-separated retailer keys (default: flipkart,myntra,ajio)
+    --server-url      Use an already running fake server instead of starting one
+    --rate            Override the per-retailer requests per second (default: config.RATE_LIMITS)
+    --burst           Override the per-retailer burst size
+    --in-flight       Override the per-retailer max requests in flight
+    --sheets          Also write every result through GoogleSheetsService into the
+                      in-memory Sheets backend and report the Sheets calls made
+    --max-sheets-calls  With --sheets, fail when the run makes more Sheets calls than this
+    Server knobs (--latency-ms, --error-rate, --forbidden-rate, --max-rps, ...) are
+    passed to the in-process server; see benchmarks/fake_retailer_server.py.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+from loguru import logger
+
+import config
+from benchmarks.fake_retailer_server import FakeRetailerBehaviour, start_server
+from benchmarks.pages import PRODUCTS
+
+def item_names(count):
+    """Generate distinct shopping list item names"""
+    return [
+        f"Men's {PRODUCTS[index % len(PRODUCTS)]} {index}"
+        for index in range(count)
+    ]
+
+def configure(server_url, retailers, rate=None, burst=None, in_flight=None):
+    """Point the agents at the fake server; must run before any agent is created"""
+    for retailer in retailers:
+        config.RETAILER_BASE_URLS[retailer] = f"{server_url}/{retailer}"
+    configure_pacing(retailers, rate, burst, in_flight)
+
+    # Every request should reach the server
+    config.RESPONSE_CACHE_ENABLED = False
+
+def configure_pacing(retailers, rate=None, burst=None, in_flight=None):
+    """Override the per-retailer request pacing; must run before any agent is created"""
+    for retailer in retailers:
+        limit = dict(config.RATE_LIMITS.get(retailer, config.RATE_LIMITS["default"]))
+        if rate is not None:
+            limit["rate"] = rate
+        if burst is not None:
+            limit["burst"] = burst
+        if in_flight is not None:
+            limit["max_in_flight"] = in_flight
+        config.RATE_LIMITS[retailer] = limit
+
+def configure_sheets(items, data_dir, latency=0.0, error_rate=0.0, quota_per_minute=0):
+    """
+    Switch to the in-memory Sheets backend and seed a shopping list with the items
+
+    Returns:
+        MemoryBackend: The backend, with its call counters reset
+    """
+    from services.sheet_rows import CHECKED_AT_HEADER
+    from services.sheets_backend import get_sheets_backend
+
+    config.SHEETS_BACKEND = "memory"
+    config.SHEETS_MEMORY_PATH = ""
+    config.SHEETS_MEMORY_LATENCY_MS = latency
+    config.SHEETS_MEMORY_ERROR_RATE = error_rate
+    config.SHEETS_MEMORY_QUOTA_PER_MINUTE = quota_per_minute
+    config.GOOGLE_SHEET_ID = "load-test"
+    config.PRICE_STORE_PATH = f"{data_dir}/prices.sqlite3"
+    config.PRICE_HISTORY_DIR = f"{data_dir}/history"
+
+    header = [
+        "Item Name", "Target Price (₹)",
+        "Flipkart Price (₹)", "Flipkart URL", "Myntra Price (₹)", "Myntra URL", "Ajio Price (₹)", "Ajio URL",
+        "Best Price (₹)", "Best Retailer", "Last Updated", CHECKED_AT_HEADER
+    ]
+    backend = get_sheets_backend()
+    spreadsheet = backend.open_spreadsheet()
+    worksheet = spreadsheet.add_worksheet(config.GOOGLE_SHEET_NAME, rows=len(items) + 1, cols=len(header))
+    worksheet.update("A1", [header] + [[name, ""] for name in items])
+
+    backend.reset_calls()
+    return backend
+
+def run_through_sheets(item_workers, retailers):
+    """Refresh every item of the seeded sheet the way the app does and return the same tuple as run()"""
+    from agents.indian_price_comparator import IndianPriceComparator
+    from services.sheet_rows import RETAILER_COLUMNS
+    from services.sheets_service import GoogleSheetsService
+
+    sheets_service = GoogleSheetsService()
+    worksheet = sheets_service.worksheet
+    comparator = IndianPriceComparator(retailers=retailers)
+    retailer_names = {name.lower(): name for name in RETAILER_COLUMNS}
+
+    def refresh(item):
+        start = time.perf_counter()
+        results = comparator.find_prices(item.name, sheets_service.known_urls(worksheet, item.id))
+        for key, name in retailer_names.items():
+            if results.get(key):
+                sheets_service.update_retailer_price(worksheet, item.id, name, results[key]["price"], results[key]["url"])
+        return time.perf_counter() - start, results["best_deal"] is not None
+
+    started = time.perf_counter()
+    items = sheets_service.get_all_items(worksheet)
+    with ThreadPoolExecutor(max_workers=item_workers, thread_name_prefix="load-item") as executor:
+        outcomes = list(executor.map(refresh, items))
+    sheets_service.mark_checked(worksheet, [item.id for item in items])
+    sheets_service.sync_now(worksheet)
+    wall = time.perf_counter() - started
+
+    sheets_service.stop_sync()
+    comparator.fan_out.shutdown()
+    return [seconds for seconds, _ in outcomes], sum(found for _, found in outcomes), wall
+
+def percentile(values, fraction):
+    """Return the value at `fraction` of the sorted list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run(items, item_workers, retailers):
+    """Refresh every item and return (per-item seconds, items with a best deal, wall seconds)"""
+    from agents.indian_price_comparator import IndianPriceComparator
+
+    comparator = IndianPriceComparator(retailers=retailers)
+
+    def refresh(name):
+        start = time.perf_counter()
+        result = comparator.find_prices(name)
+        return time.perf_counter() - start, result["best_deal"] is not None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=item_workers, thread_name_prefix="load-item") as executor:
+        outcomes = list(executor.map(refresh, items))
+    wall = time.perf_counter() - started
+
+    comparator.fan_out.shutdown()
+    return [seconds for seconds, _ in outcomes], sum(found for _, found in outcomes), wall
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the price refresh pipeline against fake retailers')
+    parser.add_argument('--items', type=int, default=1000, help='Number of items to refresh')
+    parser.add_argument('--item-workers', type=int, default=8, help='Items refreshed at the same time')
+    parser.add_argument('--retailers', default=",".join(config.RETAILERS_BY_REGION["in"]), help='Comma-separated retailer keys')
+    parser.add_argument('--server-url', default=None, help='Use an already running fake server')
+    parser.add_argument('--port', type=int, default=8700, help='Port for the in-process server')
+    parser.add_argument('--rate', type=float, default=None, help='Per-retailer requests per second')
+    parser.add_argument('--burst', type=int, default=None, help='Per-retailer burst size')
+    parser.add_argument('--in-flight', type=int, default=None, help='Per-retailer max requests in flight')
+    parser.add_argument('--cards', type=int, default=40, help='Result cards per page')
+    parser.add_argument('--page-kib', type=int, default=150, help='Approximate script bulk per page in KiB')
+    parser.add_argument('--latency-ms', type=float, default=200, help='Median response latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Spread of the log-normal latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 500 responses')
+    parser.add_argument('--forbidden-rate', type=float, default=0.0, help='Fraction of 403 responses')
+    parser.add_argument('--max-rps', type=float, default=None, help='Requests per second per retailer before 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+    parser.add_argument('--sheets', action='store_true', help='Write results through the in-memory Sheets backend')
+    parser.add_argument('--sheets-latency-ms', type=float, default=0, help='Latency added to every Sheets call')
+    parser.add_argument('--sheets-error-rate', type=float, default=0.0, help='Fraction of Sheets calls failing with 429')
+    parser.add_argument('--sheets-quota', type=int, default=0, help='Sheets reads (and writes) per minute before 429')
+    parser.add_argument('--max-sheets-calls', type=int, default=None, help='Fail when the run makes more Sheets calls')
+    args = parser.parse_args()
+
+    # Injected failures are expected; they are summarised from the server's counters instead
+    logger.remove()
+    logger.add(sys.stderr, level="CRITICAL")
+
+    retailers = args.retailers.split(",")
+
+    server = stats = None
+    server_url = args.server_url
+    if not server_url:
+        behaviour = FakeRetailerBehaviour(
+            cards=args.cards,
+            page_kib=args.page_kib,
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            error_rate=args.error_rate,
+            forbidden_rate=args.forbidden_rate,
+            max_rps=args.max_rps,
+            retry_after=args.retry_after,
+            seed=0
+        )
+        server, stats = start_server(args.port, behaviour)
+        server_url = f"http://127.0.0.1:{args.port}"
+
+    configure(server_url.rstrip("/"), retailers, args.rate, args.burst, args.in_flight)
+
+    backend = None
+    try:
+        if args.sheets:
+            with tempfile.TemporaryDirectory() as data_dir:
+                backend = configure_sheets(
+                    item_names(args.items), data_dir,
+                    args.sheets_latency_ms, args.sheets_error_rate, args.sheets_quota
+                )
+                latencies, found, wall = run_through_sheets(args.item_workers, retailers)
+        else:
+            latencies, found, wall = run(item_names(args.items), args.item_workers, retailers)
+    finally:
+        if server:
+            server.shutdown()
+
+    if stats:
+        server_stats = stats.snapshot()
+    else:
+        with urlopen(f"{server_url}/_stats") as response:
+            server_stats = json.load(response)
+
+    print(f"items            {len(latencies)} ({found} with a best deal)")
+    print(f"wall time        {wall:.1f}s")
+    print(f"throughput       {len(latencies) / wall:.2f} items/s")
+    print(f"item latency     p50 {statistics.median(latencies):.2f}s  p95 {percentile(latencies, 0.95):.2f}s  max {max(latencies):.2f}s")
+    print(f"retailer status  {json.dumps(server_stats['statuses'], sort_keys=True)}")
+    print(f"peak in flight   {json.dumps(server_stats['peak_in_flight'], sort_keys=True)}")
+
+    if backend is not None:
+        sheets_calls = sum(count for method, count in backend.calls.items() if method != "429")
+        print(f"sheets calls     {sheets_calls} {json.dumps(dict(backend.calls), sort_keys=True)}")
+        if args.max_sheets_calls is not None and sheets_calls > args.max_sheets_calls:
+            print(f"FAIL: {sheets_calls} Sheets calls, more than the allowed {args.max_sheets_calls}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
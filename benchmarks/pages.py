@@ -0,0 +1,139 @@
+"""
+Search pages for the parser benchmarks
+
+Saved pages are read from benchmarks/corpus/<retailer>/*.html. Retailers without
+saved pages get synthetic ones shaped like the real markup (card selectors, embedded
+JSON state, and the script/style bulk that sits before the results).
+"""
+import json
+import os
+import random
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+# Names the synthetic cards are built from
+BRANDS = ["Roadster", "HRX", "Levis", "U.S. Polo Assn.", "Allen Solly", "Puma", "H&M", "WROGN"]
+PRODUCTS = ["Black T-Shirt", "White Oxford Shirt", "Slim Fit Jeans", "Chino Trousers", "Running Shoes", "Denim Jacket"]
+
+def _filler(rng, kilobytes):
+    """Inline script and style bulk like the bundles retailers ship ahead of the results"""
+    chunks = []
+    for index in range(kilobytes):
+        chunks.append(f"<script>window.__chunk{index}=" + json.dumps("x" * 1000 + str(rng.random())) + ";</script>")
+    return "".join(chunks)
+
+def _cards(rng, count, query=None):
+    """Yield (index, url slug, name, price) for synthetic result cards, optionally all matching `query`"""
+    for index in range(count):
+        brand = rng.choice(BRANDS)
+        product = query.replace("Men's ", "").replace("men ", "") if query else rng.choice(PRODUCTS)
+        slug = f"{brand}-{product}".lower().replace(" ", "-").replace(".", "").replace("&", "")
+        yield index, slug, f"{brand} Men {product}", rng.randint(299, 4999)
+
+def flipkart_page(rng, cards, filler_kib=120, query=None):
+    """Flipkart search page with `cards` result cards"""
+    body = "".join(
+        f'<div class="_1AtVbE"><div class="_13oc-S"><a class="_1fQZEK" href="/{slug}/p/itm{index:06d}">'
+        f'<div class="_4rR01T">{name}</div><div class="_30jeq3">₹{price:,}</div></a></div></div>'
+        for index, slug, name, price in _cards(rng, cards, query)
+    )
+    return f"<html><head>{_filler(rng, filler_kib)}</head><body><div id='container'>{body}</div></body></html>"
+
+def amazon_page(rng, cards, filler_kib=200, query=None):
+    """Amazon search page with `cards` result cards"""
+    body = "".join(
+        f'<div data-component-type="s-search-result" data-asin="B0{index:08d}"><div class="s-card">'
+        f'<a class="a-link-normal s-no-outline" href="/{slug}/dp/B0{index:08d}">img</a>'
+        f'<h2><span class="a-size-medium a-color-base a-text-normal">{name}</span></h2>'
+        f'<span class="a-price"><span class="a-offscreen">${price / 80:.2f}</span></span></div></div>'
+        for index, slug, name, price in _cards(rng, cards, query)
+    )
+    return f"<html><head>{_filler(rng, filler_kib)}</head><body><div class='s-main-slot'>{body}</div></body></html>"
+
+def walmart_page(rng, cards, filler_kib=180, query=None):
+    """Walmart search page with `cards` result cards"""
+    body = "".join(
+        f'<div data-item-id="{index}"><a link-identifier="linkText" href="/ip/{slug}/{index}">'
+        f'<span class="lh-title">{name}</span></a>'
+        f'<div data-automation-id="product-price"><span class="w_iUH7">current price ${price / 80:.2f}</span></div></div>'
+        for index, slug, name, price in _cards(rng, cards, query)
+    )
+    return f"<html><head>{_filler(rng, filler_kib)}</head><body>{body}</body></html>"
+
+def myntra_page(rng, cards, embedded=True, filler_kib=150, query=None):
+    """Myntra search page, optionally carrying the `window.__myx` state"""
+    items = list(_cards(rng, cards, query))
+    state = ""
+    if embedded:
+        products = [
+            {"productName": name, "landingPageUrl": f"tshirts/{slug}/{index}/buy", "price": price, "mrp": price * 2}
+            for index, slug, name, price in items
+        ]
+        state = "<script>window.__myx = " + json.dumps({"searchData": {"results": {"products": products}}}) + "</script>"
+    body = "".join(
+        f'<li class="product-base"><a class="product-link" href="/tshirts/{slug}/{index}/buy">'
+        f'<h3 class="product-brand">{name.split(" Men ")[0]}</h3><h4 class="product-product">Men {name.split(" Men ")[1]}</h4>'
+        f'<div class="product-price"><span class="product-discountedPrice">Rs. {price}</span></div></a></li>'
+        for index, slug, name, price in items
+    )
+    return f"<html><head>{_filler(rng, filler_kib)}{state}</head><body><ul class='results-base'>{body}</ul></body></html>"
+
+def ajio_page(rng, cards, embedded=True, filler_kib=150, query=None):
+    """Ajio search page, optionally carrying the `window.__PRELOADED_STATE__` state"""
+    items = list(_cards(rng, cards, query))
+    state = ""
+    if embedded:
+        entities = {
+            str(index): {
+                "name": name.split(" Men ")[1],
+                "url": f"/{slug}/p/{index}",
+                "price": {"value": price},
+                "fnlColorVariantData": {"brandName": name.split(" Men ")[0]}
+            }
+            for index, slug, name, price in items
+        }
+        state = "<script>window.__PRELOADED_STATE__ = " + json.dumps({"grid": {"entities": entities}}) + ";</script>"
+    body = "".join(
+        f'<div class="item rilrtl-products-list__item"><a class="rilrtl-products-list__link" href="/{slug}/p/{index}">'
+        f'<div class="brand">{name.split(" Men ")[0]}</div><div class="nameCls">Men {name.split(" Men ")[1]}</div>'
+        f'<span class="price">₹{price:,}</span></a></div>'
+        for index, slug, name, price in items
+    )
+    return f"<html><head>{_filler(rng, filler_kib)}{state}</head><body><div class='items'>{body}</div></body></html>"
+
+def synthetic_pages(retailer_key, seed=0, cards=40):
+    """
+    Build the synthetic pages for a retailer
+
+    Returns:
+        dict: Page name -> bytes. Myntra and Ajio get one page with embedded JSON
+            and one without, so both extraction paths are measured.
+    """
+    rng = random.Random(seed)
+
+    if retailer_key == "myntra":
+        return {
+            "synthetic-embedded": myntra_page(rng, cards).encode("utf-8"),
+            "synthetic-dom": myntra_page(rng, cards, embedded=False).encode("utf-8")
+        }
+    if retailer_key == "ajio":
+        return {
+            "synthetic-embedded": ajio_page(rng, cards).encode("utf-8"),
+            "synthetic-dom": ajio_page(rng, cards, embedded=False).encode("utf-8")
+        }
+
+    generators = {"flipkart": flipkart_page, "amazon": amazon_page, "walmart": walmart_page}
+    return {"synthetic": generators[retailer_key](rng, cards).encode("utf-8")}
+
+def load_pages(retailer_key, corpus_dir=CORPUS_DIR):
+    """Return the saved pages for a retailer, or synthetic ones when none are saved"""
+    directory = os.path.join(corpus_dir, retailer_key)
+
+    pages = {}
+    if os.path.isdir(directory):
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.endswith(".html"):
+                with open(os.path.join(directory, file_name), "rb") as handle:
+                    pages[file_name[:-len(".html")]] = handle.read()
+
+    return pages or synthetic_pages(retailer_key)
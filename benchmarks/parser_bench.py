@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Parser Benchmark
+
+Runs each retailer agent's search page extraction over the page corpus and reports
+per-page parse time, retained Python allocations and peak traced memory. Results are compared
+against benchmarks/baseline.json and the run fails when a page got slower or hungrier
+than the allowed tolerance.
+
+Timings are compared relative to a calibration workload (an lxml parse and walk of a fixed
+page) timed right after every parse, so a baseline recorded on one machine holds on another
+and under a different load.
+
+Usage:
+    python -m benchmarks.parser_bench [--retailers flipkart,myntra] [--update-baseline]
+
+Options:
+    --retailers         Comma-separated retailer keys (default: every registered agent)
+    --iterations        Timed parses per page (default: 30)
+    --time-tolerance    Allowed slowdown as a fraction of the baseline (default: 0.25)
+    --memory-tolerance  Allowed peak memory growth as a fraction of the baseline (default: 0.10)
+    --update-baseline   Store this run as the new baseline instead of comparing
+
+Note: tracemalloc only sees Python allocations. Memory held inside libxml2 while lxml
+parses is not counted, so the memory figures show what our own code allocates.
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import lxml.html
+from loguru import logger
+
+import config
+from agents.registry import get_agent_registry
+from benchmarks.pages import load_pages
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Traced parses per page; memory figures come from the smallest
+MEMORY_PASSES = 3
+
+# Fixed page for the calibration workload: markup-heavy cards with no retailer's selectors
+CALIBRATION_PAGE = "<html><body>" + "".join(
+    f'<div class="card"><a href="/item/{index}"><span class="name">Item {index}</span>'
+    f'<span class="price">{index * 7 % 5000}</span></a></div>'
+    for index in range(200)
+) + "</body></html>"
+
+def calibration_workload():
+    """Parse and walk the calibration page, a fixed amount of lxml work"""
+    document = lxml.html.fromstring(CALIBRATION_PAGE)
+    return sum(len(element.text_content()) for element in document.iter("span"))
+
+def measure_page(agent, content, iterations, limit):
+    """
+    Benchmark one agent on one page
+
+    Every timed parse is followed by a timed calibration run, so both see the same
+    machine load and their ratio holds from one machine (or one moment) to the next.
+
+    Returns:
+        dict: median_ms, p95_ms, relative (median parse time in calibration runs),
+            retained_blocks (Python blocks still alive after a parse),
+            peak_kib (peak traced memory during a parse) and results
+    """
+    # Warm up caches (compiled selectors, imports) before timing
+    results = agent.parse_search_page(content, "benchmark", limit)
+    calibration_workload()
+
+    timings = []
+    ratios = []
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            agent.parse_search_page(content, "benchmark", limit)
+            parsed = time.perf_counter()
+            calibration_workload()
+            calibrated = time.perf_counter()
+
+            timings.append((parsed - start) * 1000)
+            ratios.append((parsed - start) / (calibrated - parsed))
+    finally:
+        gc.enable()
+
+    # Allocations and peak memory are measured in separate passes; tracing slows parsing down.
+    # The smallest of a few passes is kept so a stray allocation elsewhere does not count.
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for _ in range(MEMORY_PASSES):
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            baseline_memory, _ = tracemalloc.get_traced_memory()
+            agent.parse_search_page(content, "benchmark", limit)
+            _, peak_memory = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+
+            peaks.append(peak_memory - baseline_memory)
+            retained.append(sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno")))
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "relative": round(statistics.median(ratios), 4),
+        "retained_blocks": min(retained),
+        "peak_kib": round(min(peaks) / 1024, 1),
+        "results": len(results)
+    }
+
+def run(retailers, iterations, limit):
+    """Benchmark every page of every requested retailer"""
+    registry = get_agent_registry()
+
+    report = {}
+    for retailer_key in retailers:
+        agent = registry.get_class(retailer_key)()
+        for page_name, content in load_pages(retailer_key).items():
+            stats = measure_page(agent, content, iterations, limit)
+            stats["page_kib"] = round(len(content) / 1024, 1)
+            report[f"{retailer_key}/{page_name}"] = stats
+
+    return report
+
+def compare(report, baseline, time_tolerance, memory_tolerance):
+    """
+    Compare a run with the baseline
+
+    Returns:
+        list: One message per regression; empty when the run is within tolerance
+    """
+    regressions = []
+    for name, stats in report.items():
+        expected = baseline["pages"].get(name)
+        if expected is None:
+            continue
+
+        # A small absolute slack keeps the smallest pages from failing on timer noise
+        if stats["relative"] > expected["relative"] * (1 + time_tolerance) + 0.02:
+            regressions.append(
+                f"{name}: {stats['relative']} calibration runs per parse vs baseline {expected['relative']}"
+            )
+        if stats["peak_kib"] > expected["peak_kib"] * (1 + memory_tolerance) + 1:
+            regressions.append(f"{name}: peak {stats['peak_kib']}KiB vs baseline {expected['peak_kib']}KiB")
+        if stats["results"] < expected["results"]:
+            regressions.append(f"{name}: {stats['results']} results vs baseline {expected['results']}")
+
+    return regressions
+
+def print_report(report, baseline):
+    """Print one line per page, with the change in relative parse time against the baseline"""
+    print(
+        f"{'page':<32} {'KiB':>7} {'median ms':>10} {'p95 ms':>8} {'relative':>9} "
+        f"{'blocks':>8} {'peak KiB':>9} {'vs base':>8}"
+    )
+    for name, stats in report.items():
+        expected = baseline["pages"].get(name)
+        change = f"{(stats['relative'] / expected['relative'] - 1) * 100:+.0f}%" if expected else "new"
+        print(
+            f"{name:<32} {stats['page_kib']:>7} {stats['median_ms']:>10} {stats['p95_ms']:>8} {stats['relative']:>9} "
+            f"{stats['retained_blocks']:>8} {stats['peak_kib']:>9} {change:>8}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark retailer search page parsing')
+    parser.add_argument('--retailers', default=None, help='Comma-separated retailer keys')
+    parser.add_argument('--iterations', type=int, default=30, help='Timed parses per page')
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help='Allowed slowdown (fraction)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help='Allowed peak memory growth (fraction)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    args = parser.parse_args()
+
+    # Keep per-parse warnings out of the report
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    retailers = args.retailers.split(",") if args.retailers else get_agent_registry().available()
+    report = run(retailers, args.iterations, config.SEARCH_RESULTS_PER_RETAILER)
+
+    baseline = {"pages": {}}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as handle:
+            baseline = json.load(handle)
+
+    print_report(report, baseline)
+
+    if args.update_baseline:
+        baseline["pages"].update(report)
+        with open(BASELINE_PATH, "w") as handle:
+            json.dump(baseline, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(report, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("\nNo regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
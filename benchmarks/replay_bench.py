@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Replay Benchmark
+
+Runs PriceComparator.find_best_price over the items of a recorded response corpus with
+HTTP_TRANSPORT_MODE=replay, so the whole search path (fan-out, pacing, parsing,
+relevance filtering, best deal) runs against fixed pages without touching the network.
+Reports per-item latency and throughput, and fails when a best deal differs from the
+one recorded with the corpus.
+
+The committed corpus in benchmarks/fixtures was recorded from the fake retailer server.
+--record replaces it: against the in-process fake server by default, or against the
+real retailers with --live.
+
+Usage:
+    python -m benchmarks.replay_bench [--repeat 5] [--latency-ms 150]
+    python -m benchmarks.replay_bench --record [--items 12] [--live]
+
+Options:
+    --corpus        Corpus directory (default: benchmarks/fixtures)
+    --repeat        Times every item is refreshed (default: 3)
+    --item-workers  Items refreshed at the same time (default: 4)
+    --latency-ms    Latency added to every replayed response (default: 0)
+    --jitter-ms     Extra random latency of up to this much (default: 0)
+    --rate          Per-retailer requests per second (default: 1000, i.e. unpaced)
+    --record        Record a new corpus instead of replaying
+    --items         With --record, number of items to record (default: 12)
+    --retailers     With --record, comma-separated retailer keys (default: config.RETAILERS)
+    --live          With --record, record from the real retailers
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+import config
+from benchmarks.fake_retailer_server import FakeRetailerBehaviour, start_server
+from benchmarks.load_test import configure, configure_pacing, item_names, percentile
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+MANIFEST_NAME = "manifest.json"
+
+def refresh_all(items, item_workers, retailers, repeat=1):
+    """
+    Find the best deal for every item `repeat` times
+
+    Returns:
+        tuple: ({item: best deal of its last refresh}, per-item seconds, wall seconds)
+    """
+    from agents.price_comparator import PriceComparator
+
+    comparator = PriceComparator(retailers=retailers)
+
+    def refresh(name):
+        start = time.perf_counter()
+        best_deal = comparator.find_best_price(name)
+        return name, best_deal, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=item_workers, thread_name_prefix="replay-item") as executor:
+        outcomes = list(executor.map(refresh, items * repeat))
+    wall = time.perf_counter() - started
+
+    comparator.fan_out.shutdown()
+    return {name: best_deal for name, best_deal, _ in outcomes}, [seconds for _, _, seconds in outcomes], wall
+
+def record(corpus, items, item_workers, retailers, live, rate):
+    """Record a corpus: the responses, plus a manifest with the items and their best deals"""
+    for path in glob.glob(os.path.join(corpus, "*.gz")):
+        os.remove(path)
+
+    server = None
+    if live:
+        base_urls = {retailer: config.RETAILER_BASE_URLS.get(retailer) for retailer in retailers}
+    else:
+        # Small pages keep the committed corpus small
+        server, _ = start_server(8701, FakeRetailerBehaviour(cards=12, page_kib=8, latency_ms=0, seed=0))
+        configure("http://127.0.0.1:8701", retailers, rate, rate, 8)
+        base_urls = {retailer: config.RETAILER_BASE_URLS[retailer] for retailer in retailers}
+
+    config.HTTP_TRANSPORT_MODE = "record"
+    config.HTTP_FIXTURES_DIR = corpus
+    try:
+        best_deals, _, wall = refresh_all(items, item_workers, retailers)
+    finally:
+        if server:
+            server.shutdown()
+
+    manifest = {"retailers": retailers, "base_urls": base_urls, "best_deals": best_deals}
+    with open(os.path.join(corpus, MANIFEST_NAME), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True, ensure_ascii=False)
+        handle.write("\n")
+
+    recorded = len(glob.glob(os.path.join(corpus, "*.gz")))
+    print(f"Recorded {recorded} responses for {len(items)} items in {wall:.1f}s to {corpus}")
+    return 0
+
+def replay(corpus, repeat, item_workers, latency_ms, jitter_ms, rate):
+    """Replay a corpus, print timings and return 1 when a best deal changed"""
+    with open(os.path.join(corpus, MANIFEST_NAME), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+
+    retailers = manifest["retailers"]
+    configure_pacing(retailers, rate, rate, 8)
+    # Requests must carry the URLs they were recorded under
+    for retailer, base_url in manifest["base_urls"].items():
+        if base_url:
+            config.RETAILER_BASE_URLS[retailer] = base_url
+        else:
+            config.RETAILER_BASE_URLS.pop(retailer, None)
+
+    config.HTTP_TRANSPORT_MODE = "replay"
+    config.HTTP_FIXTURES_DIR = corpus
+    config.HTTP_REPLAY_LATENCY_MS = latency_ms
+    config.HTTP_REPLAY_JITTER_MS = jitter_ms
+
+    expected = manifest["best_deals"]
+    best_deals, latencies, wall = refresh_all(list(expected), item_workers, retailers, repeat)
+
+    print(f"items            {len(expected)} x {repeat} over {', '.join(retailers)}")
+    print(f"wall time        {wall:.2f}s")
+    print(f"throughput       {len(latencies) / wall:.2f} items/s")
+    print(f"item latency     p50 {statistics.median(latencies) * 1000:.1f}ms  p95 {percentile(latencies, 0.95) * 1000:.1f}ms")
+
+    changed = [name for name, best_deal in expected.items() if best_deals.get(name) != best_deal]
+    if changed:
+        print("\nBest deals that differ from the recording:")
+        for name in changed:
+            print(f"  {name}: {best_deals.get(name)} vs recorded {expected[name]}")
+        return 1
+
+    print("\nEvery best deal matches the recording")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded retailer responses through the price comparator')
+    parser.add_argument('--corpus', default=CORPUS_DIR, help='Corpus directory')
+    parser.add_argument('--repeat', type=int, default=3, help='Times every item is refreshed')
+    parser.add_argument('--item-workers', type=int, default=4, help='Items refreshed at the same time')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latency added to every replayed response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Extra random latency per response')
+    parser.add_argument('--rate', type=float, default=1000, help='Per-retailer requests per second')
+    parser.add_argument('--record', action='store_true', help='Record a new corpus instead of replaying')
+    parser.add_argument('--items', type=int, default=12, help='Items to record')
+    parser.add_argument('--retailers', default=",".join(config.RETAILERS), help='Comma-separated retailer keys to record')
+    parser.add_argument('--live', action='store_true', help='Record from the real retailers')
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    if args.record:
+        return record(
+            args.corpus, item_names(args.items), args.item_workers, args.retailers.split(","), args.live, args.rate
+        )
+    return replay(args.corpus, args.repeat, args.item_workers, args.latency_ms, args.jitter_ms, args.rate)
+
+if __name__ == "__main__":
+    sys.exit(main())
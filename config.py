@@ -9,16 +9,6 @@ GOOGLE_SHEETS_CREDENTIALS_FILE = os.getenv("GOOGLE_SHEETS_CREDENTIALS_FILE", "cr
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 GOOGLE_SHEET_NAME = os.getenv("GOOGLE_SHEET_NAME", "Shopping List")
 
-# Sheet column structure
-SHEET_COLUMNS = {
-    "ITEM_NAME": 0,
-    "TARGET_PRICE": 1,
-    "CURRENT_PRICE": 2,
-    "URL": 3,
-    "RETAILER": 4,
-    "LAST_UPDATED": 5
-}
-
 # Twilio (WhatsApp) configuration
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
@@ -29,14 +19,130 @@ TWILIO_WHATSAPP_TO = os.getenv("TWILIO_WHATSAPP_TO")
 UPDATE_INTERVAL_MINUTES = int(os.getenv("UPDATE_INTERVAL_MINUTES", 30))
 PRICE_DROP_THRESHOLD_PERCENT = float(os.getenv("PRICE_DROP_THRESHOLD_PERCENT", 5))
 
-# Retailers to check
+# Retailers available in each region
+RETAILERS_BY_REGION = {
+    "in": ["flipkart", "myntra", "ajio"],
+    "us": ["amazon", "walmart"]
+}
+
+# Region of the shopping sheet; only its retailers are loaded and queried
+REGION = os.getenv("REGION", "in").lower()
+
+# Retailers to check (a comma-separated RETAILERS overrides the region's list)
 RETAILERS = [
-    "amazon",
-    "walmart",
-    "flipkart",
-    "myntra",
-    "ajio"
+    retailer.strip().lower()
+    for retailer in os.getenv("RETAILERS", ",".join(RETAILERS_BY_REGION.get(REGION, []))).split(",")
+    if retailer.strip()
 ]
 
+# Base URL overrides by retailer, e.g. FLIPKART_BASE_URL=http://127.0.0.1:8700/flipkart
+# to point the agent at benchmarks/fake_retailer_server.py
+RETAILER_BASE_URLS = {
+    retailer: os.getenv(f"{retailer.upper()}_BASE_URL")
+    for retailers in RETAILERS_BY_REGION.values()
+    for retailer in retailers
+    if os.getenv(f"{retailer.upper()}_BASE_URL")
+}
+
+# Concurrent retailer search settings
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", 10))
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", 40))
+
+# Results read from each retailer per search, and the minimum name match
+# (0-1) a result needs before it can count as the best price
+SEARCH_RESULTS_PER_RETAILER = int(os.getenv("SEARCH_RESULTS_PER_RETAILER", 5))
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", 0.4))
+
+# HTTP transport settings
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 15))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# "live" talks to the retailers, "record" also saves every response as a fixture,
+# "replay" serves the saved fixtures (with optional added latency) and never hits the network
+HTTP_TRANSPORT_MODE = os.getenv("HTTP_TRANSPORT_MODE", "live").lower()
+HTTP_FIXTURES_DIR = os.getenv("HTTP_FIXTURES_DIR", "cache/fixtures")
+HTTP_REPLAY_LATENCY_MS = float(os.getenv("HTTP_REPLAY_LATENCY_MS", 0))
+HTTP_REPLAY_JITTER_MS = float(os.getenv("HTTP_REPLAY_JITTER_MS", 0))
+
+# Request pacing per retailer.
+# rate: requests per second, burst: requests allowed back to back,
+# max_in_flight: concurrent requests allowed to the same retailer
+RATE_LIMITS = {
+    "default": {"rate": 1.0, "burst": 2, "max_in_flight": 2},
+    "flipkart": {"rate": 1.0, "burst": 2, "max_in_flight": 2},
+    "myntra": {"rate": 1.0, "burst": 2, "max_in_flight": 2},
+    "ajio": {"rate": 1.0, "burst": 2, "max_in_flight": 2},
+    "amazon": {"rate": 0.5, "burst": 1, "max_in_flight": 1},
+    "walmart": {"rate": 0.5, "burst": 1, "max_in_flight": 1}
+}
+
+# "gspread" talks to Google Sheets; "memory" uses a local stand-in (saved to
+# SHEETS_MEMORY_PATH when set) with optional latency and 429 quota errors
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "gspread").lower()
+SHEETS_MEMORY_PATH = os.getenv("SHEETS_MEMORY_PATH", "")
+SHEETS_MEMORY_LATENCY_MS = float(os.getenv("SHEETS_MEMORY_LATENCY_MS", 0))
+SHEETS_MEMORY_JITTER_MS = float(os.getenv("SHEETS_MEMORY_JITTER_MS", 0))
+SHEETS_MEMORY_ERROR_RATE = float(os.getenv("SHEETS_MEMORY_ERROR_RATE", 0))
+SHEETS_MEMORY_QUOTA_PER_MINUTE = int(os.getenv("SHEETS_MEMORY_QUOTA_PER_MINUTE", 0))
+
+# Google Sheets API quotas (per user per project by default), tracked over a sliding
+# minute, and the backoff used when the API still answers 429
+SHEETS_READ_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_READ_REQUESTS_PER_MINUTE", 60))
+SHEETS_WRITE_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_WRITE_REQUESTS_PER_MINUTE", 60))
+SHEETS_RETRY_MAX_ATTEMPTS = int(os.getenv("SHEETS_RETRY_MAX_ATTEMPTS", 5))
+SHEETS_RETRY_BASE_DELAY = float(os.getenv("SHEETS_RETRY_BASE_DELAY", 2))
+SHEETS_RETRY_MAX_DELAY = float(os.getenv("SHEETS_RETRY_MAX_DELAY", 64))
+
+# Buffered Sheets writes: flush after this many pending cells or this many seconds,
+# splitting batch_update requests at roughly this payload size
+SHEETS_WRITE_BUFFER_MAX_CELLS = int(os.getenv("SHEETS_WRITE_BUFFER_MAX_CELLS", 500))
+SHEETS_WRITE_BUFFER_MAX_SECONDS = float(os.getenv("SHEETS_WRITE_BUFFER_MAX_SECONDS", 30))
+SHEETS_BATCH_MAX_BYTES = int(os.getenv("SHEETS_BATCH_MAX_BYTES", 1_000_000))
+
+# Cached worksheet reads: re-read at least this often, and check the spreadsheet's
+# modified time (a Drive call, not a Sheets read) this often to catch outside edits
+SHEETS_SNAPSHOT_MAX_STALENESS_SECONDS = float(os.getenv("SHEETS_SNAPSHOT_MAX_STALENESS_SECONDS", 300))
+SHEETS_REVISION_CHECK_SECONDS = float(os.getenv("SHEETS_REVISION_CHECK_SECONDS", 15))
+
+# Local price store the app reads and writes; the sheet is synced from it in the background
+PRICE_STORE_PATH = os.getenv("PRICE_STORE_PATH", "data/prices.sqlite3")
+SHEETS_SYNC_INTERVAL_SECONDS = float(os.getenv("SHEETS_SYNC_INTERVAL_SECONDS", 30))
+
+# Threads the API handlers hand Sheets and price store calls to, so the event loop never blocks on them
+SHEETS_EXECUTOR_WORKERS = int(os.getenv("SHEETS_EXECUTOR_WORKERS", 4))
+
+# Append-only price observations, one memory-mapped file per worksheet
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", "data/history")
+
+# Retry and circuit breaker settings for retailer requests
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 3))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 1))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 30))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", 120))
+
+# On-disk cache of retailer responses
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "cache/responses.sqlite3")
+RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", 200))
+
+# Seconds a cached response stays fresh, by retailer; e.g. MYNTRA_RESPONSE_CACHE_TTL_SECONDS=600
+# overrides RESPONSE_CACHE_TTL_SECONDS for one retailer
+RESPONSE_CACHE_TTLS = {
+    "default": int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 1800)),
+    **{
+        retailer: int(os.getenv(f"{retailer.upper()}_RESPONSE_CACHE_TTL_SECONDS"))
+        for retailers in RETAILERS_BY_REGION.values()
+        for retailer in retailers
+        if os.getenv(f"{retailer.upper()}_RESPONSE_CACHE_TTL_SECONDS")
+    }
+}
+
+# Read Myntra/Ajio results from the JSON state embedded in their pages before
+# falling back to CSS selectors
+STRUCTURED_DATA_EXTRACTION = os.getenv("STRUCTURED_DATA_EXTRACTION", "true").lower() == "true"
+
 # User agent for web scraping
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
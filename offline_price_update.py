@@ -15,14 +15,15 @@ Options:
 import os
 import sys
 import argparse
-import gspread
 import random
-import time
 from datetime import datetime
 from dotenv import load_dotenv
-from google.oauth2.service_account import Credentials
 from twilio.rest import Client
 
+from services.sheet_rows import SheetRowModel, format_price, parse_price
+from services.sheets_backend import get_sheets_backend
+from services.sheets_write_buffer import SheetWriteBuffer
+
 # Load environment variables
 load_dotenv()
 
@@ -32,7 +33,6 @@ parser.add_argument('--notify', action='store_true', help='Send WhatsApp notific
 args = parser.parse_args()
 
 # Google Sheets configuration
-GOOGLE_SHEETS_CREDENTIALS_FILE = os.getenv("GOOGLE_SHEETS_CREDENTIALS_FILE", "credentials.json")
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 GOOGLE_SHEET_NAME = os.getenv("GOOGLE_SHEET_NAME", "Mens Shopping")
 
@@ -85,80 +85,20 @@ retailer_urls = {
     "Ajio": "https://www.ajio.com/search?query={}"
 }
 
-def parse_price(price_str):
-    """Parse a price string to float"""
-    if not price_str:
-        return None
-    
-    try:
-        # Remove currency symbols and commas
-        cleaned = price_str.replace('$', '').replace('£', '').replace('€', '').replace('₹', '').replace(',', '')
-        return float(cleaned)
-    except ValueError:
-        return None
-
-def update_retailer_price(worksheet, row_num, retailer, price, url):
-    """Update a specific retailer's price and URL for an item"""
-    # Format the price as string with currency symbol
-    price_str = f"₹{price:.2f}" if price else ""
-    
+def update_retailer_price(rows, write_buffer, row_num, retailer, price, url):
+    """Update a specific retailer's price and URL for an item, and its best price"""
     # Get current timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    # Determine which columns to update based on retailer
-    if retailer == "Flipkart":
-        price_col = 3  # Column C
-        url_col = 4    # Column D
-    elif retailer == "Myntra":
-        price_col = 5  # Column E
-        url_col = 6    # Column F
-    elif retailer == "Ajio":
-        price_col = 7  # Column G
-        url_col = 8    # Column H
-    else:
-        print(f"Unknown retailer: {retailer}")
+    # The row model computes the best price in memory; all of the row's cells are
+    # queued in the write buffer and written in one batch
+    best_price, best_retailer = rows.record_price(write_buffer, row_num, retailer, price, url, timestamp)
+    if best_retailer is None:
         return False
     
-    # Update the cells
-    worksheet.update_cell(row_num, price_col, price_str)
-    worksheet.update_cell(row_num, url_col, url)
-    worksheet.update_cell(row_num, 11, timestamp)  # Last updated column
-    
-    # Update best price
-    update_best_price(worksheet, row_num)
-    
-    print(f"Updated {retailer} price for row {row_num} with price {price_str}")
+    print(f"Updated {retailer} price for row {row_num} with price {format_price(price)}")
     return True
 
-def update_best_price(worksheet, row_num):
-    """Update the best price and retailer for an item based on all retailer prices"""
-    # Get all prices
-    row_data = worksheet.row_values(row_num)
-    
-    # Parse prices
-    prices = {
-        "Flipkart": parse_price(row_data[2]) if len(row_data) > 2 else None,
-        "Myntra": parse_price(row_data[4]) if len(row_data) > 4 else None,
-        "Ajio": parse_price(row_data[6]) if len(row_data) > 6 else None
-    }
-    
-    # Find the best price
-    best_price = None
-    best_retailer = None
-    
-    for retailer, price in prices.items():
-        if price is not None and (best_price is None or price < best_price):
-            best_price = price
-            best_retailer = retailer
-    
-    # Update best price and retailer
-    if best_price is not None:
-        price_str = f"₹{best_price:.2f}"
-        worksheet.update_cell(row_num, 9, price_str)  # Best Price column
-        worksheet.update_cell(row_num, 10, best_retailer)  # Best Retailer column
-    
-    return best_price, best_retailer
-
 def check_for_price_drops(worksheet, row_num, item_name, target_price, best_price, best_retailer, best_url):
     """Check if there's a significant price drop and return notification message if needed"""
     if not best_price or not target_price:
@@ -197,24 +137,9 @@ def send_whatsapp_notification(message):
 def main():
     print("Starting offline price update...")
     
-    # Define the scope
-    scope = [
-        'https://www.googleapis.com/auth/spreadsheets',
-        'https://www.googleapis.com/auth/drive'
-    ]
-    
-    # Get credentials
     try:
-        credentials = Credentials.from_service_account_file(
-            GOOGLE_SHEETS_CREDENTIALS_FILE, 
-            scopes=scope
-        )
-        
-        # Authorize with gspread
-        client = gspread.authorize(credentials)
-        
-        # Open the spreadsheet
-        spreadsheet = client.open_by_key(GOOGLE_SHEET_ID)
+        # Open the spreadsheet through the configured Sheets backend; every call is paced against the API quota
+        spreadsheet = get_sheets_backend().open_spreadsheet(GOOGLE_SHEET_ID)
         
         # Get the worksheet
         worksheet = spreadsheet.worksheet(GOOGLE_SHEET_NAME)
@@ -227,6 +152,11 @@ def main():
     # Get all values from the worksheet
     all_values = worksheet.get_all_values()
     
+    # Keep every row's retailer prices in memory and queue cell updates for batch writes
+    rows = SheetRowModel(worksheet).load(all_values)
+    write_buffer = SheetWriteBuffer(worksheet)
+    checked_rows = []
+    
     # Skip header row
     data_rows = all_values[1:] if len(all_values) > 0 else []
     
@@ -268,22 +198,18 @@ def main():
         ajio_url = retailer_urls["Ajio"].format(item_query)
         
         # Update Flipkart price
-        update_retailer_price(worksheet, row_num, "Flipkart", flipkart_price, flipkart_url)
-        
-        # Add a longer delay to avoid rate limiting
-        time.sleep(5)
+        update_retailer_price(rows, write_buffer, row_num, "Flipkart", flipkart_price, flipkart_url)
         
         # Update Myntra price
-        update_retailer_price(worksheet, row_num, "Myntra", myntra_price, myntra_url)
-        
-        # Add a longer delay to avoid rate limiting
-        time.sleep(5)
+        update_retailer_price(rows, write_buffer, row_num, "Myntra", myntra_price, myntra_url)
         
         # Update Ajio price
-        update_retailer_price(worksheet, row_num, "Ajio", ajio_price, ajio_url)
+        update_retailer_price(rows, write_buffer, row_num, "Ajio", ajio_price, ajio_url)
         
-        # Get the best price and retailer
-        best_price, best_retailer = update_best_price(worksheet, row_num)
+        checked_rows.append(row_num)
+        
+        # Get the best price and retailer, computed in memory
+        best_price, best_retailer = rows.row(row_num).best()
         
         # Determine the best URL
         best_url = ""
@@ -299,10 +225,10 @@ def main():
             notification = check_for_price_drops(worksheet, row_num, item_name, target_price, best_price, best_retailer, best_url)
             if notification:
                 notifications.append(notification)
-        
-        # Add a longer delay between items to avoid quota limits
-        print(f"Waiting 10 seconds before processing next item...")
-        time.sleep(10)
+    
+    # Stamp the refreshed rows as one Checked At range, then write the remaining queued updates
+    rows.mark_checked(write_buffer, checked_rows, datetime.now().strftime("%Y-%m-%d %H:%M"))
+    write_buffer.flush()
     
     print("All prices updated successfully!")
     
@@ -0,0 +1,54 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+import config
+
+class AsyncSheetsService:
+    """Awaitable view of GoogleSheetsService whose calls run on a bounded thread pool"""
+
+    def __init__(self, sheets_service, max_workers=None):
+        """
+        Initialize the facade
+
+        Args:
+            sheets_service (GoogleSheetsService): The blocking service to wrap
+            max_workers (int): Threads for Sheets and price store calls
+        """
+        self.sheets_service = sheets_service
+        self.max_workers = max_workers or config.SHEETS_EXECUTOR_WORKERS
+
+        # A pool of its own, so a refresh waiting on the Sheets quota cannot use up the
+        # threads FastAPI and the retailer lookups run on
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sheets")
+
+    async def call(self, fn, *args, **kwargs):
+        """
+        Run a blocking call on the pool and wait for it without blocking the event loop
+
+        Args:
+            fn (callable): The blocking call
+
+        Returns:
+            The call's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.sheets_service, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def run(*args, **kwargs):
+            return await self.call(attribute, *args, **kwargs)
+
+        return run
+
+    def shutdown(self):
+        """Wait for running calls to finish and stop the pool"""
+        self.executor.shutdown(wait=True)
+        logger.info("Sheets executor stopped")
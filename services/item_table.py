@@ -0,0 +1,187 @@
+import re
+
+from services.sheet_rows import (
+    BEST_OFFER_HEADERS,
+    BEST_PRICE_COLUMN,
+    BEST_RETAILER_COLUMN,
+    CHECKED_AT_COLUMN,
+    CHECKED_AT_HEADER,
+    LAST_UPDATED_COLUMN,
+    RETAILER_COLUMNS,
+    parse_price
+)
+
+def _header_key(title):
+    """Normalize a header cell, e.g. "Flipkart Price (₹)" -> "flipkart price" """
+    return re.sub(r"\s+", " ", re.sub(r"\(.*?\)", "", title)).strip().lower()
+
+class ColumnIndex:
+    """0-based positions of the shopping list columns, read from the header row"""
+
+    __slots__ = (
+        "name", "target_price", "retailers", "best_price", "best_retailer", "current_price", "url", "retailer",
+        "last_updated", "checked_at", "missing", "width"
+    )
+
+    def __init__(self, header=()):
+        """
+        Initialize the index
+
+        Args:
+            header (list): The sheet's header row. Without a recognisable header the
+                standard layout is assumed; with one, columns it does not name read as empty.
+        """
+        positions = {_header_key(title): i for i, title in enumerate(header) if title}
+        if "item name" not in positions:
+            positions = self._standard_positions()
+
+        # Columns the header does not name point one past the row, at padding that stays empty
+        missing = max(positions.values()) + 1
+
+        self.name = positions.get("item name", missing)
+        self.target_price = positions.get("target price", missing)
+        # (retailer, price index, url index) in column order
+        self.retailers = tuple(
+            (
+                retailer,
+                positions.get(f"{retailer.lower()} price", missing),
+                positions.get(f"{retailer.lower()} url", missing)
+            )
+            for retailer in RETAILER_COLUMNS
+        )
+        self.best_price = positions.get("best price", missing)
+        self.best_retailer = positions.get("best retailer", missing)
+        # The best offer's price, URL and retailer, in the main shopping list's columns
+        self.current_price, self.url, self.retailer = (
+            positions.get(_header_key(title), missing) for title in BEST_OFFER_HEADERS
+        )
+        self.last_updated = positions.get("last updated", missing)
+        self.checked_at = positions.get(_header_key(CHECKED_AT_HEADER), missing)
+        self.missing = missing
+        self.width = missing + 1
+
+    def named_retailers(self):
+        """Return the retailers the header gives a price column"""
+        return [retailer for retailer, price_index, _ in self.retailers if price_index != self.missing]
+
+    def has_best_offer(self):
+        """Return True if the header names the Current Price, URL and Retailer columns"""
+        return self.missing not in (self.current_price, self.url, self.retailer)
+
+    def column(self, index):
+        """Return the 1-based sheet column of a position, or None for a column the header does not name"""
+        return None if index == self.missing else index + 1
+
+    @staticmethod
+    def _standard_positions():
+        """Header keys of the standard shopping list layout"""
+        positions = {"item name": 0, "target price": 1}
+        for retailer, (price_col, url_col) in RETAILER_COLUMNS.items():
+            positions[f"{retailer.lower()} price"] = price_col - 1
+            positions[f"{retailer.lower()} url"] = url_col - 1
+        positions["best price"] = BEST_PRICE_COLUMN - 1
+        positions["best retailer"] = BEST_RETAILER_COLUMN - 1
+        positions["last updated"] = LAST_UPDATED_COLUMN - 1
+        positions[_header_key(CHECKED_AT_HEADER)] = CHECKED_AT_COLUMN - 1
+        return positions
+
+class Item:
+    """One shopping list item, readable as attributes or like the dict it replaces"""
+
+    __slots__ = ("id", "name", "target_price", "current_price", "url", "retailer", "last_updated")
+
+    def __init__(self, id, name, target_price, current_price, url, retailer, last_updated):
+        self.id = id
+        self.name = name
+        self.target_price = target_price
+        self.current_price = current_price
+        self.url = url
+        self.retailer = retailer
+        self.last_updated = last_updated
+
+    def keys(self):
+        return self.__slots__
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self):
+        """Return the item as a plain dict, e.g. for a JSON response"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f"Item(id={self.id!r}, name={self.name!r}, current_price={self.current_price!r})"
+
+def decode_row(row_num, row, columns):
+    """
+    Decode one sheet row into an Item
+
+    Args:
+        row_num (int): 1-based row number, used as the item id
+        row (list): The row's cell values
+        columns (ColumnIndex): Column positions for this sheet
+
+    Returns:
+        Item: The item, or None for rows without a name and target price cell
+    """
+    if len(row) < 2:
+        return None
+
+    if len(row) < columns.width:
+        row = row + [""] * (columns.width - len(row))
+
+    best_price = None
+    best_retailer = None
+    best_url = ""
+    urls = {}
+
+    for retailer, price_index, url_index in columns.retailers:
+        price = parse_price(row[price_index])
+        urls[retailer] = row[url_index]
+        if price and (best_price is None or price < best_price):
+            best_price = price
+            best_retailer = retailer
+            best_url = row[url_index]
+
+    # A filled in Current Price shows the best offer of any retailer, columns or not
+    current_price = parse_price(row[columns.current_price])
+    if current_price:
+        best_price = current_price
+        best_retailer = row[columns.retailer] or None
+        best_url = row[columns.url]
+
+    # The sheet's own Best Price/Best Retailer columns win when they are filled in
+    sheet_best_price = parse_price(row[columns.best_price])
+    if sheet_best_price:
+        best_price = sheet_best_price
+        best_retailer = row[columns.best_retailer] or None
+        best_url = urls.get(best_retailer) or best_url
+
+    return Item(
+        row_num,
+        row[columns.name],
+        parse_price(row[columns.target_price]),
+        best_price,
+        best_url,
+        best_retailer,
+        row[columns.last_updated]
+    )
+
+def price_drops(items, threshold_percent):
+    """Return the items priced at least `threshold_percent` below their target"""
+    drops = []
+    for item in items:
+        current_price = item.current_price
+        target_price = item.target_price
+        if not current_price or not target_price or current_price >= target_price:
+            continue
+
+        if (target_price - current_price) / target_price * 100 >= threshold_percent:
+            drops.append(item)
+
+    return drops
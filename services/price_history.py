@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from loguru import logger
+
+import config
+
+# One observation: 13 bytes on disk, no padding
+RECORD_DTYPE = np.dtype([("item", "<u4"), ("retailer", "u1"), ("paise", "<i4"), ("ts", "<u4")])
+
+# Appended records are scanned directly until there are this many, then the index is rebuilt
+MIN_UNINDEXED_RECORDS = 4096
+
+class RetailerIds:
+    """Stable one-byte ids for retailer names, kept in a JSON file next to the history"""
+
+    def __init__(self, path):
+        """
+        Initialize the mapping
+
+        Args:
+            path (str): JSON file holding {retailer name: id}
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._ids = json.load(f)
+        self._names = {retailer_id: name for name, retailer_id in self._ids.items()}
+
+    def id_for(self, name):
+        """Return the id of a retailer, assigning the next free one on first sight"""
+        with self._lock:
+            if name not in self._ids:
+                if len(self._ids) > np.iinfo(RECORD_DTYPE["retailer"]).max:
+                    raise ValueError("No retailer ids left")
+                self._ids[name] = len(self._ids)
+                self._names[self._ids[name]] = name
+
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._ids, f)
+                os.replace(temp_path, self.path)
+            return self._ids[name]
+
+    def find(self, name):
+        """Return the id of a known retailer, or None"""
+        with self._lock:
+            return self._ids.get(name)
+
+    def name_for(self, retailer_id):
+        """Return the retailer name for an id"""
+        with self._lock:
+            return self._names.get(int(retailer_id), str(retailer_id))
+
+class PriceHistory:
+    """Append-only price observations of one worksheet, memory-mapped for range queries"""
+
+    def __init__(self, path, retailers):
+        """
+        Initialize the history
+
+        Args:
+            path (str): Binary file of RECORD_DTYPE records
+            retailers (RetailerIds): Retailer name to id mapping shared by all worksheets
+        """
+        self.path = path
+        self.retailers = retailers
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # A crash mid-append can leave a partial record; drop it so records stay aligned
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size % RECORD_DTYPE.itemsize:
+            logger.warning(f"Dropping a partial record at the end of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(size - size % RECORD_DTYPE.itemsize)
+
+        self._records = None
+        self._count = 0
+        # Record positions sorted by (item, ts) and the item of each, covering the
+        # first _indexed records; later records are scanned directly
+        self._order = np.empty(0, dtype=np.int64)
+        self._order_items = np.empty(0, dtype=RECORD_DTYPE["item"])
+        self._indexed = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._map()
+
+    def append(self, item, retailer, price, observed_at=None):
+        """
+        Record one observed price
+
+        Args:
+            item (int): Item id (its sheet row number)
+            retailer (str): Retailer name
+            price (float): Price in rupees
+            observed_at (float): Epoch seconds, now by default
+        """
+        self.extend([(item, retailer, price, observed_at)])
+
+    def extend(self, observations):
+        """Record several (item, retailer, price, observed_at) observations in one write"""
+        now = time.time()
+        records = np.array(
+            [
+                (item, self.retailers.id_for(retailer), round(price * 100), int(observed_at or now))
+                for item, retailer, price, observed_at in observations
+            ],
+            dtype=RECORD_DTYPE
+        )
+        if not len(records):
+            return
+
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+
+    def query(self, item, start=None, end=None, retailer=None):
+        """
+        Return an item's observations between two times, oldest first
+
+        Args:
+            item (int): Item id
+            start (float): Earliest epoch seconds included, unbounded by default
+            end (float): Latest epoch seconds included, unbounded by default
+            retailer (str): Only this retailer's observations
+
+        Returns:
+            numpy.ndarray: RECORD_DTYPE records
+
+        Indexed records are found by binary search, but records appended since the
+        index was built (up to max(MIN_UNINDEXED_RECORDS, n / 8) of them) are scanned,
+        so a query costs O(log n) plus a vectorized pass over that tail.
+        """
+        start = 0 if start is None else max(0, int(start))
+        end = np.iinfo(RECORD_DTYPE["ts"]).max if end is None else int(end)
+
+        with self._lock:
+            count = self._map()
+            if count == 0:
+                return np.empty(0, dtype=RECORD_DTYPE)
+
+            if count - self._indexed > max(MIN_UNINDEXED_RECORDS, self._indexed // 8):
+                self._build_index(count)
+            records = self._records
+            order = self._order
+            order_items = self._order_items
+            indexed = self._indexed
+
+        # Binary search for the item's block, then for the time range within it
+        low = np.searchsorted(order_items, item, side="left")
+        high = np.searchsorted(order_items, item, side="right")
+        positions = order[low:high]
+        times = records["ts"][positions]
+        positions = positions[np.searchsorted(times, start, side="left"):np.searchsorted(times, end, side="right")]
+        matches = records[positions]
+
+        tail = records[indexed:count]
+        if len(tail):
+            tail = tail[(tail["item"] == item) & (tail["ts"] >= start) & (tail["ts"] <= end)]
+            matches = np.concatenate([matches, tail])
+            matches = matches[np.argsort(matches["ts"], kind="stable")]
+
+        if retailer is not None:
+            retailer_id = self.retailers.find(retailer)
+            if retailer_id is None:
+                return np.empty(0, dtype=RECORD_DTYPE)
+            matches = matches[matches["retailer"] == retailer_id]
+
+        return np.array(matches, dtype=RECORD_DTYPE)
+
+    def lowest(self, item, start=None, end=None, retailer=None):
+        """Return the cheapest observation of an item in a time range, or None"""
+        matches = self.query(item, start, end, retailer)
+        if not len(matches):
+            return None
+        return matches[np.argmin(matches["paise"])]
+
+    def to_dicts(self, records):
+        """Turn records into JSON-friendly dicts"""
+        return [
+            {
+                "retailer": self.retailers.name_for(record["retailer"]),
+                "price": int(record["paise"]) / 100,
+                "observed_at": int(record["ts"])
+            }
+            for record in records
+        ]
+
+    def _map(self):
+        """Map any records appended since the last call and return the record count; call with the lock held"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        count = size // RECORD_DTYPE.itemsize
+        if count != self._count:
+            self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,)) if count else None
+            self._count = count
+        return count
+
+    def _build_index(self, count):
+        """Sort every record position by (item, ts); call with the lock held"""
+        records = self._records[:count]
+        self._order = np.lexsort((records["ts"], records["item"]))
+        self._order_items = records["item"][self._order]
+        self._indexed = count
+        logger.debug(f"Indexed {count} price observations in {self.path}")
+
+_shared_histories = {}
+_shared_retailers = None
+_shared_histories_lock = threading.Lock()
+
+def get_price_history(spreadsheet_id, sheet):
+    """
+    Return the process-wide price history of a worksheet
+
+    Args:
+        spreadsheet_id (str): Key of the spreadsheet the worksheet belongs to
+        sheet (int): Worksheet id, only unique within its spreadsheet
+    """
+    global _shared_retailers
+
+    key = (spreadsheet_id, sheet)
+    with _shared_histories_lock:
+        if key not in _shared_histories:
+            if _shared_retailers is None:
+                os.makedirs(config.PRICE_HISTORY_DIR, exist_ok=True)
+                _shared_retailers = RetailerIds(os.path.join(config.PRICE_HISTORY_DIR, "retailers.json"))
+            _shared_histories[key] = PriceHistory(
+                os.path.join(config.PRICE_HISTORY_DIR, spreadsheet_id, f"{sheet}.bin"), _shared_retailers
+            )
+        return _shared_histories[key]
@@ -0,0 +1,382 @@
+import os
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+import config
+from services.item_table import ColumnIndex, Item, decode_row, price_drops
+from services.sheet_rows import parse_price, same_price
+
+class PriceStore:
+    """Local SQLite copy of the shopping list: items, per-retailer offers and run history"""
+
+    def __init__(self, path=None):
+        """
+        Initialize the store
+
+        Args:
+            path (str): SQLite file that holds the store
+        """
+        self.path = path or config.PRICE_STORE_PATH
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # WAL lets readers carry on while the syncer or a run is writing
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Items are keyed by sheet_key() and row number. A local change bumps the row's
+        # revision; the syncer pushes rows whose revision is ahead of synced_revision.
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                sheet TEXT NOT NULL,
+                row_num INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                target_price REAL,
+                best_price REAL,
+                best_retailer TEXT,
+                best_url TEXT NOT NULL DEFAULT '',
+                last_updated TEXT NOT NULL DEFAULT '',
+                checked_at TEXT NOT NULL DEFAULT '',
+                revision INTEGER NOT NULL DEFAULT 0,
+                synced_revision INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (sheet, row_num)
+            );
+            CREATE INDEX IF NOT EXISTS items_unsynced ON items (sheet) WHERE revision > synced_revision;
+
+            CREATE TABLE IF NOT EXISTS offers (
+                sheet TEXT NOT NULL,
+                row_num INTEGER NOT NULL,
+                retailer TEXT NOT NULL,
+                price REAL,
+                url TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (sheet, row_num, retailer)
+            );
+
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                sheet TEXT,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                items_checked INTEGER,
+                status TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS sync_state (
+                sheet TEXT PRIMARY KEY,
+                pulled_at REAL,
+                pushed_at REAL
+            );
+        """)
+        self.connection.commit()
+
+    def has_sheet(self, sheet):
+        """Return True once a worksheet has been pulled at least once"""
+        with self._lock:
+            row = self.connection.execute("SELECT pulled_at FROM sync_state WHERE sheet = ?", (sheet,)).fetchone()
+        return row is not None and row[0] is not None
+
+    def items(self, sheet):
+        """Return every item of a worksheet, in row order"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT row_num, name, target_price, best_price, best_url, best_retailer, last_updated "
+                "FROM items WHERE sheet = ? ORDER BY row_num",
+                (sheet,)
+            ).fetchall()
+        return [Item(*row) for row in rows]
+
+    def item(self, sheet, row_num):
+        """Return one item, or None"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT row_num, name, target_price, best_price, best_url, best_retailer, last_updated "
+                "FROM items WHERE sheet = ? AND row_num = ?",
+                (sheet, row_num)
+            ).fetchone()
+        return Item(*row) if row else None
+
+    def price_drops(self, sheet, threshold_percent):
+        """Return the items priced at least `threshold_percent` below their target"""
+        return price_drops(self.items(sheet), threshold_percent)
+
+    def offers(self, sheet, row_num):
+        """Return {retailer: (price, url)} for one item"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT retailer, price, url FROM offers WHERE sheet = ? AND row_num = ?",
+                (sheet, row_num)
+            ).fetchall()
+        return {retailer: (price, url) for retailer, price, url in rows}
+
+    def record_offer(self, sheet, row_num, retailer, price, url, timestamp):
+        """
+        Record a retailer's price for an item and recompute its best price
+
+        Last Updated only moves, and the row is only marked for syncing, when
+        something the sheet shows actually changed.
+
+        Returns:
+            tuple: (best_price, best_retailer) for the item after this update
+        """
+        now = time.time()
+        with self._lock:
+            item = self.connection.execute(
+                "SELECT best_price, best_retailer, best_url FROM items WHERE sheet = ? AND row_num = ?",
+                (sheet, row_num)
+            ).fetchone()
+            if item is None:
+                logger.warning(f"Ignoring {retailer} offer for unknown row {row_num} of sheet {sheet}")
+                return None, None
+
+            current = self.connection.execute(
+                "SELECT price, url FROM offers WHERE sheet = ? AND row_num = ? AND retailer = ?",
+                (sheet, row_num, retailer)
+            ).fetchone()
+            changed = current is None or not same_price(current[0], price) or current[1] != url
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO offers VALUES (?, ?, ?, ?, ?, ?)",
+                (sheet, row_num, retailer, price, url, now)
+            )
+
+            best_price, best_retailer, best_url = self._best_offer(sheet, row_num) or item
+            best_changed = (
+                not same_price(item[0], best_price) or item[1] != best_retailer or item[2] != best_url
+            )
+
+            if changed or best_changed:
+                self.connection.execute(
+                    "UPDATE items SET best_price = ?, best_retailer = ?, best_url = ?, "
+                    "last_updated = CASE WHEN ? THEN ? ELSE last_updated END, revision = revision + 1 "
+                    "WHERE sheet = ? AND row_num = ?",
+                    (best_price, best_retailer, best_url, changed, timestamp, sheet, row_num)
+                )
+            self.connection.commit()
+
+        return best_price, best_retailer
+
+    def mark_checked(self, sheet, row_nums, timestamp):
+        """Stamp rows as refreshed in this run"""
+        with self._lock:
+            self.connection.executemany(
+                "UPDATE items SET checked_at = ?, revision = revision + 1 WHERE sheet = ? AND row_num = ?",
+                [(timestamp, sheet, row_num) for row_num in row_nums]
+            )
+            self.connection.commit()
+
+    def unsynced_rows(self, sheet):
+        """
+        Return the rows changed locally since they were last written to the sheet
+
+        Returns:
+            list: One dict per row with row_num, revision, offers, best_price,
+                best_retailer, best_url, last_updated and checked_at
+        """
+        with self._lock:
+            items = self.connection.execute(
+                "SELECT row_num, revision, best_price, best_retailer, best_url, last_updated, checked_at "
+                "FROM items WHERE sheet = ? AND revision > synced_revision ORDER BY row_num",
+                (sheet,)
+            ).fetchall()
+            offers = self.connection.execute(
+                "SELECT o.row_num, o.retailer, o.price, o.url FROM offers o JOIN items i "
+                "ON i.sheet = o.sheet AND i.row_num = o.row_num "
+                "WHERE o.sheet = ? AND i.revision > i.synced_revision",
+                (sheet,)
+            ).fetchall()
+
+        offers_by_row = {}
+        for row_num, retailer, price, url in offers:
+            offers_by_row.setdefault(row_num, {})[retailer] = (price, url)
+
+        return [
+            {
+                "row_num": row_num,
+                "revision": revision,
+                "offers": offers_by_row.get(row_num, {}),
+                "best_price": best_price,
+                "best_retailer": best_retailer,
+                "best_url": best_url,
+                "last_updated": last_updated,
+                "checked_at": checked_at
+            }
+            for row_num, revision, best_price, best_retailer, best_url, last_updated, checked_at in items
+        ]
+
+    def checked_at_column(self, sheet):
+        """Return the Checked At values of rows 2 through the last item, gaps included"""
+        with self._lock:
+            rows = dict(self.connection.execute(
+                "SELECT row_num, checked_at FROM items WHERE sheet = ?", (sheet,)
+            ).fetchall())
+        return [rows.get(row_num, "") for row_num in range(2, max(rows, default=1) + 1)]
+
+    def mark_synced(self, sheet, revisions):
+        """
+        Record that rows reached the sheet
+
+        Args:
+            revisions (dict): Maps row number to the revision that was written; rows
+                changed again since then stay unsynced
+        """
+        with self._lock:
+            self.connection.executemany(
+                "UPDATE items SET synced_revision = ? WHERE sheet = ? AND row_num = ? AND synced_revision < ?",
+                [(revision, sheet, row_num, revision) for row_num, revision in revisions.items()]
+            )
+            self.connection.execute(
+                "INSERT INTO sync_state (sheet, pushed_at) VALUES (?, ?) "
+                "ON CONFLICT(sheet) DO UPDATE SET pushed_at = excluded.pushed_at",
+                (sheet, time.time())
+            )
+            self.connection.commit()
+
+    def load_sheet(self, sheet, all_values):
+        """
+        Take in a full read of the worksheet
+
+        Rows with local changes not yet pushed keep their local values; every other
+        row is replaced by what the sheet shows, and rows gone from the sheet are dropped.
+
+        Args:
+            sheet (str): The worksheet's sheet_key()
+            all_values (list): Every row of the worksheet, header included
+        """
+        columns = ColumnIndex(all_values[0] if all_values else ())
+        named = columns.named_retailers()
+        placeholders = ", ".join("?" * len(named))
+        now = time.time()
+
+        with self._lock:
+            unsynced = {
+                row_num for (row_num,) in self.connection.execute(
+                    "SELECT row_num FROM items WHERE sheet = ? AND revision > synced_revision", (sheet,)
+                )
+            }
+
+            seen = set()
+            for row_num, row in enumerate(all_values[1:], start=2):
+                if len(row) < columns.width:
+                    row = row + [""] * (columns.width - len(row))
+
+                item = decode_row(row_num, row, columns)
+                if not item.name:
+                    continue
+                seen.add(row_num)
+                if row_num in unsynced:
+                    continue
+
+                for retailer, price_index, url_index in columns.retailers:
+                    if retailer not in named:
+                        continue
+                    price = parse_price(row[price_index])
+                    if price or row[url_index]:
+                        self.connection.execute(
+                            "INSERT OR REPLACE INTO offers VALUES (?, ?, ?, ?, ?, ?)",
+                            (sheet, row_num, retailer, price, row[url_index], now)
+                        )
+                    else:
+                        self.connection.execute(
+                            "DELETE FROM offers WHERE sheet = ? AND row_num = ? AND retailer = ?",
+                            (sheet, row_num, retailer)
+                        )
+
+                # Retailers without columns of their own are only seen through the best offer
+                self.connection.execute(
+                    f"DELETE FROM offers WHERE sheet = ? AND row_num = ? AND retailer NOT IN ({placeholders})",
+                    (sheet, row_num, *named)
+                )
+                offer_price = parse_price(row[columns.current_price])
+                offer_retailer = row[columns.retailer]
+                if offer_price and offer_retailer and offer_retailer not in named:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO offers VALUES (?, ?, ?, ?, ?, ?)",
+                        (sheet, row_num, offer_retailer, offer_price, row[columns.url], now)
+                    )
+
+                self.connection.execute(
+                    "INSERT INTO items (sheet, row_num, name, target_price, best_price, best_retailer, best_url, "
+                    "last_updated, checked_at, revision, synced_revision) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0) "
+                    "ON CONFLICT(sheet, row_num) DO UPDATE SET name = excluded.name, "
+                    "target_price = excluded.target_price, best_price = excluded.best_price, "
+                    "best_retailer = excluded.best_retailer, best_url = excluded.best_url, "
+                    "last_updated = excluded.last_updated, checked_at = excluded.checked_at",
+                    (
+                        sheet, row_num, item.name, item.target_price,
+                        item.current_price, item.retailer, item.url,
+                        item.last_updated, row[columns.checked_at]
+                    )
+                )
+
+            gone = [(sheet, row_num) for (row_num,) in self.connection.execute(
+                "SELECT row_num FROM items WHERE sheet = ?", (sheet,)
+            ).fetchall() if row_num not in seen and row_num not in unsynced]
+            self.connection.executemany("DELETE FROM items WHERE sheet = ? AND row_num = ?", gone)
+            self.connection.executemany("DELETE FROM offers WHERE sheet = ? AND row_num = ?", gone)
+
+            self.connection.execute(
+                "INSERT INTO sync_state (sheet, pulled_at) VALUES (?, ?) "
+                "ON CONFLICT(sheet) DO UPDATE SET pulled_at = excluded.pulled_at",
+                (sheet, now)
+            )
+            self.connection.commit()
+
+        logger.debug(f"Loaded {len(seen)} rows of sheet {sheet} into the price store ({len(unsynced)} kept local)")
+
+    def start_run(self, kind, sheet=None):
+        """Record the start of a price refresh and return its id"""
+        with self._lock:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (kind, sheet, started_at, status) VALUES (?, ?, ?, 'running')",
+                (kind, sheet, time.time())
+            )
+            self.connection.commit()
+            return cursor.lastrowid
+
+    def finish_run(self, run_id, items_checked, status="ok"):
+        """Record how a price refresh ended"""
+        with self._lock:
+            self.connection.execute(
+                "UPDATE runs SET finished_at = ?, items_checked = ?, status = ? WHERE id = ?",
+                (time.time(), items_checked, status, run_id)
+            )
+            self.connection.commit()
+
+    def _best_offer(self, sheet, row_num):
+        """Return (price, retailer, url) of the cheapest offer, or None; call with the lock held"""
+        return self.connection.execute(
+            "SELECT price, retailer, url FROM offers WHERE sheet = ? AND row_num = ? AND price > 0 "
+            "ORDER BY price LIMIT 1",
+            (sheet, row_num)
+        ).fetchone()
+
+def sheet_key(worksheet):
+    """
+    Return the key a worksheet's rows are stored under
+
+    Worksheet ids are only unique within a spreadsheet (the first tab is always 0),
+    so the key includes the spreadsheet id.
+    """
+    return f"{worksheet.spreadsheet.id}:{worksheet.id}"
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_price_store():
+    """Return the process-wide price store"""
+    global _shared_store
+
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = PriceStore()
+
+    return _shared_store
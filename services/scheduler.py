@@ -4,6 +4,7 @@ from datetime import datetime
 from loguru import logger
 
 import config
+from services.price_store import sheet_key
 
 class Scheduler:
     """Service for scheduling periodic tasks"""
@@ -40,13 +41,16 @@ class Scheduler:
             self.scheduler.shutdown()
             logger.info("Scheduler stopped")
     
-    async def update_prices(self):
+    def update_prices(self):
         """Update prices for all items and check for price drops"""
         logger.info("Starting scheduled price update")
+        worksheet = self.sheets_service.worksheet
+        checked_rows = []
         
         try:
-            # Get all items from the sheet
+            # Get all items from the local price store
             items = self.sheets_service.get_all_items()
+            run_id = self.sheets_service.store.start_run("scheduled", sheet_key(worksheet))
             
             # Track items with price drops
             price_drops = []
@@ -55,43 +59,52 @@ class Scheduler:
             for item in items:
                 try:
                     # Skip items without a name
-                    if not item["name"]:
+                    if not item.name:
                         continue
                     
                     # Search for the item
-                    logger.info(f"Searching for best price for: {item['name']}")
-                    result = self.price_comparator.find_best_price(item["name"])
+                    logger.info(f"Searching for best price for: {item.name}")
+                    known_urls = {}
+                    if item.retailer and item.url:
+                        known_urls[item.retailer.lower()] = item.url
+                    result = self.price_comparator.find_best_price(item.name, known_urls)
+                    checked_rows.append(item.id)
                     
                     if result:
                         # Get the current price from the sheet
-                        current_price = item["current_price"]
+                        current_price = item.current_price
                         
                         # Check if this is a better price
                         if not current_price or result["price"] < current_price:
                             # Update the sheet
                             self.sheets_service.update_item_price(
-                                item["id"],
+                                item.id,
                                 result["price"],
                                 result["url"],
                                 result["retailer"]
                             )
                             
                             # Check if this is a significant price drop
-                            if current_price and item["target_price"]:
+                            if current_price and item.target_price:
                                 drop_percent = (current_price - result["price"]) / current_price * 100
                                 
                                 if drop_percent >= config.PRICE_DROP_THRESHOLD_PERCENT:
                                     # Add to price drops list
                                     price_drops.append({
-                                        **item,
+                                        **item.to_dict(),
                                         "current_price": result["price"],
                                         "url": result["url"],
                                         "retailer": result["retailer"]
                                     })
+                        else:
+                            # Not a better price, but the history keeps every observation
+                            self.sheets_service.record_observation(item.id, result["retailer"], result["price"])
                 except Exception as e:
-                    logger.error(f"Error processing item {item['name']}: {e}")
+                    logger.error(f"Error processing item {item.name}: {e}")
                     continue
             
+            self.sheets_service.store.finish_run(run_id, len(items))
+            
             # Send notifications for price drops
             for item in price_drops:
                 self.whatsapp_service.send_price_drop_alert(item)
@@ -101,3 +114,10 @@ class Scheduler:
         except Exception as e:
             logger.error(f"Failed to update prices: {e}")
             return False
+        finally:
+            # Stamp the rows done in one Checked At range and let the syncer push them with the prices
+            try:
+                self.sheets_service.mark_checked(worksheet, checked_rows)
+                self.sheets_service.request_sync()
+            except Exception as e:
+                logger.error(f"Failed to record checked rows: {e}")
@@ -0,0 +1,190 @@
+import threading
+
+from loguru import logger
+
+# 1-based columns of the Indian retailer shopping worksheet
+RETAILER_COLUMNS = {
+    "Flipkart": (3, 4),  # Columns C (price) and D (URL)
+    "Myntra": (5, 6),    # Columns E and F
+    "Ajio": (7, 8)       # Columns G and H
+}
+BEST_PRICE_COLUMN = 9      # Column I
+BEST_RETAILER_COLUMN = 10  # Column J
+LAST_UPDATED_COLUMN = 11   # Column K, moves only when a price or URL changes
+CHECKED_AT_COLUMN = 12     # Column L, when the row was last refreshed
+CHECKED_AT_HEADER = "Checked At"
+
+# The best offer of any retailer, on the main shopping list and for retailers without columns of their own
+BEST_OFFER_HEADERS = ("Current Price (₹)", "URL", "Retailer")
+
+def parse_price(price_str):
+    """Parse a price string to float"""
+    if not price_str:
+        return None
+
+    try:
+        # Remove currency symbols and commas
+        cleaned = price_str.replace('$', '').replace('£', '').replace('€', '').replace('₹', '').replace(',', '')
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def format_price(price):
+    """Format a price the way the sheet shows it"""
+    return f"₹{price:.2f}" if price else ""
+
+def same_price(a, b):
+    """Return True if two prices show the same in the sheet"""
+    if not a or not b:
+        return not a and not b
+    return round(a, 2) == round(b, 2)
+
+class ItemRow:
+    """The retailer prices and URLs of one shopping list row"""
+
+    def __init__(self, row_num, values=()):
+        """
+        Initialize the row from its sheet values
+
+        Args:
+            row_num (int): 1-based row number
+            values (list): The row as read from the sheet
+        """
+        self.row_num = row_num
+        self.prices = {}
+        self.urls = {}
+
+        for retailer, (price_col, url_col) in RETAILER_COLUMNS.items():
+            self.prices[retailer] = parse_price(values[price_col - 1]) if len(values) >= price_col else None
+            self.urls[retailer] = values[url_col - 1] if len(values) >= url_col else ""
+
+        # What the sheet currently shows, so unchanged cells are not written again
+        self.best_price = parse_price(values[BEST_PRICE_COLUMN - 1]) if len(values) >= BEST_PRICE_COLUMN else None
+        self.best_retailer = values[BEST_RETAILER_COLUMN - 1] if len(values) >= BEST_RETAILER_COLUMN else ""
+        self.checked_at = values[CHECKED_AT_COLUMN - 1] if len(values) >= CHECKED_AT_COLUMN else ""
+
+    def set_price(self, retailer, price, url):
+        """Record a retailer's new price and URL"""
+        self.prices[retailer] = price
+        self.urls[retailer] = url
+
+    def best(self):
+        """
+        Return the lowest retailer price
+
+        Returns:
+            tuple: (best_price, best_retailer), or (None, None) when no retailer has a price
+        """
+        best_price = None
+        best_retailer = None
+
+        for retailer, price in self.prices.items():
+            if price is not None and (best_price is None or price < best_price):
+                best_price = price
+                best_retailer = retailer
+
+        return best_price, best_retailer
+
+class SheetRowModel:
+    """Rows of a shopping worksheet kept in memory, so best prices never need a re-read"""
+
+    def __init__(self, worksheet=None):
+        """
+        Initialize the model
+
+        Args:
+            worksheet (gspread.Worksheet): Used to read a row that was not loaded up front
+        """
+        self.worksheet = worksheet
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def load(self, all_values):
+        """Replace the model with the values of a full worksheet read (header row included)"""
+        with self._lock:
+            self.rows = {
+                row_num: ItemRow(row_num, row)
+                for row_num, row in enumerate(all_values[1:], start=2)
+            }
+        return self
+
+    def row(self, row_num):
+        """Return a row, reading it from the worksheet only if it was never loaded"""
+        with self._lock:
+            item_row = self.rows.get(row_num)
+            if item_row is None:
+                values = self.worksheet.row_values(row_num) if self.worksheet is not None else []
+                item_row = self.rows[row_num] = ItemRow(row_num, values)
+            return item_row
+
+    def record_price(self, write_buffer, row_num, retailer, price, url, timestamp):
+        """
+        Record a retailer price and queue only the cells whose value changed
+
+        Args:
+            write_buffer (SheetWriteBuffer): Where the cell updates are queued
+            row_num (int): 1-based row number
+            retailer (str): One of RETAILER_COLUMNS
+            price (float): The retailer's price
+            url (str): The product URL
+            timestamp (str): Value for the Last Updated column, written only on a change
+
+        Returns:
+            tuple: (best_price, best_retailer) for the row after this update
+        """
+        if retailer not in RETAILER_COLUMNS:
+            logger.warning(f"Unknown retailer: {retailer}")
+            return None, None
+
+        price_col, url_col = RETAILER_COLUMNS[retailer]
+
+        item_row = self.row(row_num)
+        price_changed = not same_price(item_row.prices[retailer], price)
+        url_changed = item_row.urls[retailer] != url
+
+        item_row.set_price(retailer, price, url)
+        best_price, best_retailer = item_row.best()
+
+        if price_changed:
+            write_buffer.set(row_num, price_col, format_price(price))
+        if url_changed:
+            write_buffer.set(row_num, url_col, url)
+        if price_changed or url_changed:
+            write_buffer.set(row_num, LAST_UPDATED_COLUMN, timestamp)
+
+        if best_price is not None:
+            if not same_price(item_row.best_price, best_price):
+                write_buffer.set(row_num, BEST_PRICE_COLUMN, format_price(best_price))
+                item_row.best_price = best_price
+            if item_row.best_retailer != best_retailer:
+                write_buffer.set(row_num, BEST_RETAILER_COLUMN, best_retailer)
+                item_row.best_retailer = best_retailer
+
+        return best_price, best_retailer
+
+    def mark_checked(self, write_buffer, row_nums, timestamp):
+        """
+        Stamp rows as refreshed and queue the whole Checked At column as one range
+
+        Args:
+            write_buffer (SheetWriteBuffer): Where the column is queued
+            row_nums (iterable): 1-based rows refreshed in this run
+            timestamp (str): Value for the Checked At column
+        """
+        row_nums = list(row_nums)
+        if not row_nums:
+            return
+
+        for row_num in row_nums:
+            self.row(row_num).checked_at = timestamp
+
+        with self._lock:
+            last_row = max(self.rows)
+            # Rows that were not refreshed keep their earlier value, so the column
+            # (header included) goes out as a single contiguous range
+            values = [CHECKED_AT_HEADER] + [
+                self.rows[row_num].checked_at if row_num in self.rows else ""
+                for row_num in range(2, last_row + 1)
+            ]
+
+        write_buffer.set_column(CHECKED_AT_COLUMN, 1, values)
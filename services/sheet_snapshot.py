@@ -0,0 +1,110 @@
+import threading
+import time
+
+from loguru import logger
+
+import config
+
+class WorksheetSnapshot:
+    """In-memory copy of a worksheet's values, kept current by our own writes and a revision check"""
+
+    def __init__(self, worksheet, max_staleness=None, revision_check_interval=None):
+        """
+        Initialize the snapshot; nothing is read until values are first requested
+
+        Args:
+            worksheet (gspread.Worksheet): The worksheet to mirror, wrapped in QuotaPaced so requests respect the Sheets quota
+            max_staleness (float): Seconds after which the snapshot is re-read no matter what
+            revision_check_interval (float): Seconds between checks of the spreadsheet's
+                modified time, which trigger a re-read when someone else edited the sheet
+        """
+        self.worksheet = worksheet
+        self.max_staleness = max_staleness if max_staleness is not None else config.SHEETS_SNAPSHOT_MAX_STALENESS_SECONDS
+        self.revision_check_interval = (
+            revision_check_interval if revision_check_interval is not None
+            else config.SHEETS_REVISION_CHECK_SECONDS
+        )
+
+        self._values = None
+        self._revision = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._own_writes_since_check = False
+        self._lock = threading.RLock()
+
+    def values(self):
+        """
+        Return every row of the worksheet, header included
+
+        The list is shared with other readers and must not be modified.
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            if self._values is None or now - self._loaded_at >= self.max_staleness:
+                self._load()
+            elif now - self._checked_at >= self.revision_check_interval and self._changed_elsewhere():
+                logger.info(f"'{self.worksheet.title}' was edited outside this process, reloading")
+                self._load()
+
+            return self._values
+
+    def row(self, row_num):
+        """Return one row (1-based), or an empty list past the end of the sheet"""
+        values = self.values()
+        return values[row_num - 1] if 0 < row_num <= len(values) else []
+
+    def patch(self, row, col, value):
+        """Apply one of our own cell writes so readers see it without a re-read"""
+        with self._lock:
+            if self._values is None:
+                return
+
+            while len(self._values) < row:
+                self._values.append([])
+
+            cells = self._values[row - 1]
+            if len(cells) < col:
+                cells.extend([""] * (col - len(cells)))
+            cells[col - 1] = "" if value is None else str(value)
+
+            # Our own write moves the modified time; that alone must not force a reload
+            self._own_writes_since_check = True
+
+    def _load(self):
+        """Read the whole worksheet and remember the spreadsheet revision it belongs to"""
+        revision = self._fetch_revision()
+
+        self._values = self.worksheet.get_all_values()
+
+        now = time.monotonic()
+        self._loaded_at = now
+        self._checked_at = now
+        self._revision = revision
+        self._own_writes_since_check = False
+        logger.debug(f"Loaded snapshot of '{self.worksheet.title}' ({len(self._values)} rows)")
+
+    def _changed_elsewhere(self):
+        """Return True if the spreadsheet changed in a way our own writes do not explain"""
+        self._checked_at = time.monotonic()
+
+        revision = self._fetch_revision()
+        if revision is None or revision == self._revision:
+            return False
+
+        if self._own_writes_since_check:
+            # Adopt the revision our writes produced. An edit made elsewhere in the same
+            # window is picked up at the latest when max_staleness runs out.
+            self._revision = revision
+            self._own_writes_since_check = False
+            return False
+
+        return True
+
+    def _fetch_revision(self):
+        """Return the spreadsheet's Drive modified time, or None if it cannot be read"""
+        try:
+            return self.worksheet.spreadsheet.get_lastUpdateTime()
+        except Exception as e:
+            logger.warning(f"Could not check revision of '{self.worksheet.title}': {e}")
+            return None
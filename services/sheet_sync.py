@@ -0,0 +1,176 @@
+import threading
+import time
+
+from loguru import logger
+
+import config
+from services.item_table import ColumnIndex
+from services.price_store import sheet_key
+from services.sheet_rows import BEST_OFFER_HEADERS, CHECKED_AT_HEADER, format_price
+from services.sheets_quota import get_sheets_quota
+
+class SheetSyncer:
+    """Keeps one worksheet and its rows in the price store in step from a background thread"""
+
+    def __init__(self, store, worksheet, snapshot, write_buffer, interval=None):
+        """
+        Initialize the syncer
+
+        Args:
+            store (PriceStore): The local copy the app reads and writes
+            worksheet (gspread.Worksheet): The worksheet shown as a view of the store
+            snapshot (WorksheetSnapshot): Cached reads of the worksheet
+            write_buffer (SheetWriteBuffer): Batched writes to the worksheet
+            interval (float): Seconds between syncs when nobody asks for one sooner
+        """
+        self.store = store
+        self.worksheet = worksheet
+        self.sheet = sheet_key(worksheet)
+        self.snapshot = snapshot
+        self.write_buffer = write_buffer
+        self.interval = interval if interval is not None else config.SHEETS_SYNC_INTERVAL_SECONDS
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._sync_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start syncing in the background, pulling the sheet first if the store has never seen it"""
+        if not self.store.has_sheet(self.sheet):
+            self.pull()
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"sheet-sync-{self.sheet}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after one last sync"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def request_sync(self):
+        """Ask the background thread to sync now instead of at the next interval"""
+        self._wake.set()
+
+    def sync(self):
+        """Push local changes to the sheet, then pull edits made in the sheet"""
+        with self._sync_lock:
+            self.push()
+            self.pull()
+
+    def push(self):
+        """
+        Write rows changed in the store to the sheet, only the cells that differ
+
+        Returns:
+            int: Number of rows pushed
+        """
+        rows = self.store.unsynced_rows(self.sheet)
+        if not rows:
+            return 0
+
+        # Cells go where the header puts them, the same columns pull reads them from
+        columns = self._best_offer_columns(ColumnIndex(self.snapshot.row(1)), rows)
+
+        checked_at_changed = False
+        for row in rows:
+            row_num = row["row_num"]
+            for retailer, price_index, url_index in columns.retailers:
+                if retailer in row["offers"]:
+                    price, url = row["offers"][retailer]
+                    self._set(columns, row_num, price_index, format_price(price))
+                    self._set(columns, row_num, url_index, url)
+
+            if row["best_price"] is not None:
+                self._set(columns, row_num, columns.best_price, format_price(row["best_price"]))
+                self._set(columns, row_num, columns.best_retailer, row["best_retailer"])
+                self._set(columns, row_num, columns.current_price, format_price(row["best_price"]))
+                self._set(columns, row_num, columns.url, row["best_url"])
+                self._set(columns, row_num, columns.retailer, row["best_retailer"])
+            self._set(columns, row_num, columns.last_updated, row["last_updated"])
+
+            current = self.snapshot.row(row_num)
+            shown = current[columns.checked_at] if len(current) > columns.checked_at else ""
+            checked_at_changed = checked_at_changed or shown != row["checked_at"]
+
+        if checked_at_changed:
+            # The whole column, header included, goes out as a single range; a sheet
+            # without a Checked At header gets it after its last named column
+            self.write_buffer.set_column(
+                columns.checked_at + 1, 1, [CHECKED_AT_HEADER] + self.store.checked_at_column(self.sheet)
+            )
+
+        self.write_buffer.flush()
+        self.store.mark_synced(self.sheet, {row["row_num"]: row["revision"] for row in rows})
+
+        quota = get_sheets_quota()
+        logger.debug(
+            f"Pushed {len(rows)} rows to '{self.worksheet.title}' "
+            f"(Sheets requests in the last minute: {quota.usage('read')} reads, {quota.usage('write')} writes)"
+        )
+        return len(rows)
+
+    def _best_offer_columns(self, columns, rows):
+        """
+        Make sure the best offer has somewhere to go
+
+        A sheet laid out with retailer columns has nowhere to show an offer from any
+        other retailer (its URL in particular), so the first such offer adds Current
+        Price, URL and Retailer header cells after the last named column.
+
+        Returns:
+            ColumnIndex: The columns to write to, including any that were added
+        """
+        if columns.has_best_offer():
+            return columns
+
+        named = columns.named_retailers()
+        if not any(row["best_retailer"] and row["best_retailer"] not in named for row in rows):
+            return columns
+
+        header = self.snapshot.row(1)
+        header = header + [""] * (columns.missing - len(header))
+        header = header[:columns.missing] + list(BEST_OFFER_HEADERS)
+        extended = ColumnIndex(header)
+        if not extended.has_best_offer():
+            # The sheet has no header to extend
+            return columns
+
+        for offset, title in enumerate(BEST_OFFER_HEADERS):
+            self.write_buffer.set_if_changed(1, columns.missing + offset + 1, title)
+
+        logger.info(f"Added best offer columns to '{self.worksheet.title}' for retailers without their own")
+        return extended
+
+    def _set(self, columns, row_num, index, value):
+        """Queue a cell unless the sheet has no column for it"""
+        col = columns.column(index)
+        if col is not None:
+            self.write_buffer.set_if_changed(row_num, col, value)
+
+    def pull(self):
+        """Load the worksheet into the store; rows with unpushed local changes keep them"""
+        self.store.load_sheet(self.sheet, self.snapshot.values())
+
+    def _run(self):
+        # Ticks often enough to honour the write buffer's max_age between syncs
+        tick = min(self.interval, self.write_buffer.max_age) if self.write_buffer.max_age > 0 else self.interval
+        last_sync = time.monotonic()
+
+        while not self._stopped.is_set():
+            woken = self._wake.wait(tick)
+            self._wake.clear()
+
+            try:
+                if woken or time.monotonic() - last_sync >= self.interval:
+                    last_sync = time.monotonic()
+                    self.sync()
+                else:
+                    self.write_buffer.flush_if_due()
+            except Exception as e:
+                # The store keeps serving reads and taking writes; the next sync retries
+                logger.warning(f"Could not sync '{self.worksheet.title}' with the price store: {e}")
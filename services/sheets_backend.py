@@ -0,0 +1,317 @@
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+import gspread
+import requests
+from gspread.utils import a1_to_rowcol
+from loguru import logger
+
+import config
+from services.sheets_quota import PACED_TYPES, READ_METHODS, QuotaPaced
+
+class SheetsBackend(ABC):
+    """Where spreadsheets come from: Google Sheets or a local stand-in"""
+
+    @abstractmethod
+    def open_spreadsheet(self, sheet_id=None):
+        """
+        Open a spreadsheet
+
+        Args:
+            sheet_id (str): Spreadsheet key, config.GOOGLE_SHEET_ID by default
+
+        Returns:
+            A gspread Spreadsheet, or an object with the same methods, wrapped in QuotaPaced
+        """
+        pass
+
+class GspreadBackend(SheetsBackend):
+    """Spreadsheets in Google Sheets, opened with a service account"""
+
+    SCOPES = [
+        'https://www.googleapis.com/auth/spreadsheets',
+        'https://www.googleapis.com/auth/drive'
+    ]
+
+    def __init__(self, credentials_file=None):
+        """
+        Initialize the backend
+
+        Args:
+            credentials_file (str): Service account JSON key
+        """
+        self.credentials_file = credentials_file or config.GOOGLE_SHEETS_CREDENTIALS_FILE
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        """Return the authorized gspread client, paced against the Sheets quota"""
+        from google.oauth2.service_account import Credentials
+
+        with self._lock:
+            if self._client is None:
+                credentials = Credentials.from_service_account_file(
+                    os.path.abspath(self.credentials_file),
+                    scopes=self.SCOPES
+                )
+                self._client = QuotaPaced(gspread.authorize(credentials))
+            return self._client
+
+    def open_spreadsheet(self, sheet_id=None):
+        return self.client().open_by_key(sheet_id or config.GOOGLE_SHEET_ID)
+
+class MemoryBackend(SheetsBackend):
+    """Spreadsheets held in memory (optionally saved to a JSON file) that behave like gspread's"""
+
+    def __init__(self, path=None, latency=0.0, jitter=0.0, error_rate=0.0, quota_per_minute=0, seed=None):
+        """
+        Initialize the backend
+
+        Args:
+            path (str): JSON file the spreadsheets are loaded from and saved to after
+                each write; nothing is saved when empty
+            latency (float): Seconds added to every call
+            jitter (float): Up to this many extra seconds, drawn at random per call
+            error_rate (float): Fraction of calls that fail with 429
+            quota_per_minute (int): Read (and separately write) calls allowed per
+                minute before 429s; 0 for no limit
+            seed (int): Seed for the latency jitter and injected errors
+        """
+        # Every call is counted, can be slowed down and can fail with a 429 like the
+        # real API, so refresh runs can be profiled and their Sheets calls counted offline
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+        self.calls = Counter()
+
+        self._random = random.Random(seed)
+        self._recent = {"read": deque(), "write": deque()}
+        self._lock = threading.RLock()
+        self._spreadsheets = {}
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for sheet_id, worksheets in json.load(f).items():
+                    spreadsheet = self._spreadsheets[sheet_id] = MemorySpreadsheet(self, sheet_id)
+                    for title, values in worksheets.items():
+                        spreadsheet.add_worksheet(title, rows=len(values), cols=0, _values=values, _record=False)
+
+    def open_spreadsheet(self, sheet_id=None):
+        # Opened through the quota scheduler like a gspread client, so injected 429s are retried
+        return QuotaPaced(self).open_by_key(sheet_id or config.GOOGLE_SHEET_ID)
+
+    def open_by_key(self, sheet_id):
+        """Return a spreadsheet, creating an empty one on first use"""
+        self.record_call("open_by_key")
+        with self._lock:
+            if sheet_id not in self._spreadsheets:
+                self._spreadsheets[sheet_id] = MemorySpreadsheet(self, sheet_id)
+            return self._spreadsheets[sheet_id]
+
+    def reset_calls(self):
+        """Forget the counted calls, e.g. at the start of a measured run"""
+        with self._lock:
+            self.calls.clear()
+
+    def record_call(self, method):
+        """Count a call, apply the configured latency, and fail it the way the API would"""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        kind = "read" if method in READ_METHODS else "write"
+        with self._lock:
+            self.calls[method] += 1
+
+            fail = self.error_rate and self._random.random() < self.error_rate
+            if self.quota_per_minute:
+                now = time.monotonic()
+                recent = self._recent[kind]
+                while recent and recent[0] <= now - 60:
+                    recent.popleft()
+                if len(recent) >= self.quota_per_minute:
+                    fail = True
+                else:
+                    recent.append(now)
+
+        if fail:
+            self.calls["429"] += 1
+            raise gspread.exceptions.APIError(_quota_response(kind))
+
+    def save(self):
+        """Write every spreadsheet to the JSON file, if one is configured"""
+        if not self.path:
+            return
+
+        with self._lock:
+            data = {
+                sheet_id: {worksheet.title: worksheet.values for worksheet in spreadsheet.worksheets(_record=False)}
+                for sheet_id, spreadsheet in self._spreadsheets.items()
+            }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+def _quota_response(kind):
+    """Build the 429 response Google sends when a quota is used up"""
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps({
+        "error": {
+            "code": 429,
+            "message": f"Quota exceeded for quota metric '{kind.title()} requests'",
+            "status": "RESOURCE_EXHAUSTED"
+        }
+    }).encode("utf-8")
+    return response
+
+class MemorySpreadsheet:
+    """In-memory stand-in for gspread.Spreadsheet"""
+
+    def __init__(self, backend, sheet_id):
+        self.backend = backend
+        self.id = sheet_id
+        self.title = f"Local spreadsheet {sheet_id}"
+        self._worksheets = []
+        self._modified = datetime.now(timezone.utc)
+
+    def worksheet(self, title):
+        self.backend.record_call("worksheet")
+        for worksheet in self._worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise gspread.exceptions.WorksheetNotFound(title)
+
+    def worksheets(self, _record=True):
+        if _record:
+            self.backend.record_call("worksheets")
+        return list(self._worksheets)
+
+    def add_worksheet(self, title, rows, cols, _values=None, _record=True):
+        if _record:
+            self.backend.record_call("add_worksheet")
+        worksheet = MemoryWorksheet(self, len(self._worksheets), title, _values)
+        self._worksheets.append(worksheet)
+        if _record:
+            self.touch()
+        return worksheet
+
+    def get_lastUpdateTime(self):
+        # A Drive call in gspread, so it is not counted against the Sheets quota
+        return self._modified.isoformat()
+
+    def touch(self):
+        """Record a write: move the modified time and save the file"""
+        self._modified = datetime.now(timezone.utc)
+        self.backend.save()
+
+class MemoryWorksheet:
+    """In-memory stand-in for gspread.Worksheet, holding cells as the strings Sheets would show"""
+
+    def __init__(self, spreadsheet, sheet_id, title, values=None):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.values = [[str(cell) for cell in row] for row in values or []]
+
+    def get_all_values(self):
+        self.spreadsheet.backend.record_call("get_all_values")
+        with self.spreadsheet.backend._lock:
+            rows = list(self.values)
+            while rows and not any(rows[-1]):
+                rows.pop()
+            width = max((len(row) for row in rows), default=0)
+            return [row + [""] * (width - len(row)) for row in rows]
+
+    def row_values(self, row):
+        self.spreadsheet.backend.record_call("row_values")
+        with self.spreadsheet.backend._lock:
+            values = list(self.values[row - 1]) if 0 < row <= len(self.values) else []
+            while values and not values[-1]:
+                values.pop()
+            return values
+
+    def update_cell(self, row, col, value):
+        self.spreadsheet.backend.record_call("update_cell")
+        with self.spreadsheet.backend._lock:
+            self._set(row, col, value)
+            self.spreadsheet.touch()
+
+    def update(self, range_name, values=None, **kwargs):
+        self.spreadsheet.backend.record_call("update")
+        with self.spreadsheet.backend._lock:
+            self._write_range(range_name, values)
+            self.spreadsheet.touch()
+
+    def batch_update(self, data, **kwargs):
+        self.spreadsheet.backend.record_call("batch_update")
+        with self.spreadsheet.backend._lock:
+            for value_range in data:
+                self._write_range(value_range["range"], value_range["values"])
+            self.spreadsheet.touch()
+
+    def format(self, ranges, *args, **kwargs):
+        self.spreadsheet.backend.record_call("format")
+
+    def columns_auto_resize(self, start_column_index, end_column_index):
+        self.spreadsheet.backend.record_call("columns_auto_resize")
+
+    def _write_range(self, range_name, values):
+        start = range_name.split("!")[-1].split(":")[0]
+        start_row, start_col = a1_to_rowcol(start)
+        for row_offset, row in enumerate(values or []):
+            for col_offset, value in enumerate(row):
+                self._set(start_row + row_offset, start_col + col_offset, value)
+
+    def _set(self, row, col, value):
+        while len(self.values) < row:
+            self.values.append([])
+        cells = self.values[row - 1]
+        if len(cells) < col:
+            cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = "" if value is None else str(value)
+
+PACED_TYPES.extend([MemorySpreadsheet, MemoryWorksheet])
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+def get_sheets_backend():
+    """Return the process-wide Sheets backend chosen by SHEETS_BACKEND"""
+    global _shared_backend
+
+    if _shared_backend is None:
+        with _shared_backend_lock:
+            if _shared_backend is None:
+                _shared_backend = _create_backend(config.SHEETS_BACKEND)
+
+    return _shared_backend
+
+def _create_backend(kind):
+    """Build the backend for a SHEETS_BACKEND value"""
+    if kind == "memory":
+        logger.info(f"Using the in-memory Sheets backend{f' saved to {config.SHEETS_MEMORY_PATH}' if config.SHEETS_MEMORY_PATH else ''}")
+        return MemoryBackend(
+            path=config.SHEETS_MEMORY_PATH,
+            latency=config.SHEETS_MEMORY_LATENCY_MS / 1000,
+            jitter=config.SHEETS_MEMORY_JITTER_MS / 1000,
+            error_rate=config.SHEETS_MEMORY_ERROR_RATE,
+            quota_per_minute=config.SHEETS_MEMORY_QUOTA_PER_MINUTE
+        )
+    if kind != "gspread":
+        logger.warning(f"Unknown SHEETS_BACKEND '{kind}', using Google Sheets")
+    return GspreadBackend()
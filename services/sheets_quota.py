@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+
+import gspread
+from loguru import logger
+
+import config
+from agents.retry_policy import RetryPolicy
+
+# gspread methods that spend a Sheets read or write request. Anything else (Drive calls
+# such as get_lastUpdateTime, cached properties such as title) passes through unpaced.
+READ_METHODS = {
+    "open", "open_by_key", "open_by_url", "openall",
+    "worksheet", "worksheets", "get_worksheet", "get_worksheet_by_id", "fetch_sheet_metadata",
+    "values_get", "values_batch_get", "get", "get_values", "get_all_values", "get_all_records",
+    "batch_get", "row_values", "col_values", "acell", "cell", "range", "find", "findall"
+}
+WRITE_METHODS = {
+    "add_worksheet", "del_worksheet", "duplicate_sheet", "batch_update",
+    "values_update", "values_append", "values_clear", "values_batch_update",
+    "update", "update_cell", "update_cells", "update_acell", "append_row", "append_rows",
+    "insert_row", "insert_rows", "delete_rows", "delete_columns", "clear", "batch_clear",
+    "format", "batch_format", "columns_auto_resize", "resize", "add_rows", "add_cols",
+    "update_title", "freeze"
+}
+
+# Objects whose calls QuotaPaced paces when a call returns them; other backends add theirs
+PACED_TYPES = [gspread.Spreadsheet, gspread.Worksheet]
+
+class SheetsRetryPolicy(RetryPolicy):
+    """Backoff for Sheets API errors: 403 means permission denied there, so only 429 and 5xx are retried"""
+
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class SheetsQuotaScheduler:
+    """Paces Sheets API calls against the per-minute read and write quotas"""
+
+    def __init__(self, quotas=None, window=60.0, retry_policy=None):
+        """
+        Initialize the scheduler
+
+        Args:
+            quotas (dict): Maps "read" and "write" to the requests allowed per window
+            window (float): Length of the sliding window in seconds
+            retry_policy (RetryPolicy): Backoff used when the API still answers 429
+        """
+        self.quotas = quotas or {
+            "read": config.SHEETS_READ_REQUESTS_PER_MINUTE,
+            "write": config.SHEETS_WRITE_REQUESTS_PER_MINUTE
+        }
+        self.window = window
+        self.retry_policy = retry_policy or SheetsRetryPolicy(
+            max_attempts=config.SHEETS_RETRY_MAX_ATTEMPTS,
+            base_delay=config.SHEETS_RETRY_BASE_DELAY,
+            max_delay=config.SHEETS_RETRY_MAX_DELAY
+        )
+
+        self._sent = {kind: deque() for kind in self.quotas}
+        self._blocked_until = {kind: 0.0 for kind in self.quotas}
+        self._lock = threading.Lock()
+
+    def acquire(self, kind):
+        """Block until a `kind` ("read" or "write") request fits in the quota window"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                sent = self._sent[kind]
+                while sent and sent[0] <= now - self.window:
+                    sent.popleft()
+
+                if self._blocked_until[kind] > now:
+                    wait_time = self._blocked_until[kind] - now
+                elif len(sent) < self.quotas[kind]:
+                    sent.append(now)
+                    return
+                else:
+                    wait_time = sent[0] + self.window - now
+
+            logger.debug(f"Sheets {kind} quota reached, waiting {wait_time:.1f}s")
+            time.sleep(wait_time)
+
+    def usage(self, kind):
+        """Return the number of `kind` requests sent within the current window"""
+        with self._lock:
+            now = time.monotonic()
+            return sum(1 for sent_at in self._sent[kind] if sent_at > now - self.window)
+
+    def call(self, kind, fn, *args, **kwargs):
+        """
+        Run a Sheets API call once the quota allows it, retrying when it is rate limited
+
+        Args:
+            kind (str): "read" or "write"
+            fn (callable): The gspread call
+
+        Returns:
+            The call's result
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.acquire(kind)
+
+            try:
+                return fn(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                response = getattr(e, "response", None)
+                delay = self.retry_policy.next_delay(attempt, response)
+                if delay is None:
+                    raise
+
+                status_code = response.status_code if response is not None else None
+                if status_code == 429:
+                    # Our count and Google's disagree (other clients share the quota),
+                    # so hold back every request of this kind, not just this one
+                    with self._lock:
+                        self._blocked_until[kind] = max(self._blocked_until[kind], time.monotonic() + delay)
+
+                logger.warning(f"Sheets {kind} request failed with {status_code}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+class QuotaPaced:
+    """Wraps a gspread client, spreadsheet or worksheet so its API calls go through the scheduler"""
+
+    def __init__(self, target, scheduler=None):
+        """
+        Initialize the wrapper
+
+        Args:
+            target: gspread Client, Spreadsheet or Worksheet
+            scheduler (SheetsQuotaScheduler): Defaults to the process-wide scheduler
+        """
+        self._target = target
+        self._scheduler = scheduler or get_sheets_quota()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name in READ_METHODS:
+            kind = "read"
+        elif name in WRITE_METHODS:
+            kind = "write"
+        else:
+            return attribute
+
+        def paced(*args, **kwargs):
+            result = self._scheduler.call(kind, attribute, *args, **kwargs)
+            return self._wrap(result)
+
+        return paced
+
+    def _wrap(self, result):
+        """Wrap spreadsheets and worksheets returned by a call so they are paced too"""
+        paced_types = tuple(PACED_TYPES)
+        if isinstance(result, paced_types):
+            return QuotaPaced(result, self._scheduler)
+        if isinstance(result, list) and result and isinstance(result[0], paced_types):
+            return [QuotaPaced(item, self._scheduler) for item in result]
+        return result
+
+    def __repr__(self):
+        return f"QuotaPaced({self._target!r})"
+
+_shared_quota = None
+_shared_quota_lock = threading.Lock()
+
+def get_sheets_quota():
+    """Return the process-wide Sheets quota scheduler shared by the service and scripts"""
+    global _shared_quota
+
+    if _shared_quota is None:
+        with _shared_quota_lock:
+            if _shared_quota is None:
+                _shared_quota = SheetsQuotaScheduler()
+
+    return _shared_quota
@@ -1,10 +1,16 @@
-import os
+import threading
 import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
 from loguru import logger
 
 import config
+from services.price_history import get_price_history
+from services.price_store import get_price_store, sheet_key
+from services.sheet_rows import CHECKED_AT_HEADER, RETAILER_COLUMNS, format_price
+from services.sheet_snapshot import WorksheetSnapshot
+from services.sheet_sync import SheetSyncer
+from services.sheets_backend import get_sheets_backend
+from services.sheets_write_buffer import SheetWriteBuffer
 
 class GoogleSheetsService:
     """Service for interacting with Google Sheets"""
@@ -12,29 +18,30 @@ class GoogleSheetsService:
     def __init__(self):
         """Initialize the Google Sheets service"""
         try:
-            # Define the scope
-            scope = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-
-            # Get credentials
-            credentials_path = os.path.abspath(config.GOOGLE_SHEETS_CREDENTIALS_FILE)
-            credentials = Credentials.from_service_account_file(
-                credentials_path,
-                scopes=scope
-            )
-
-            # Authorize with gspread
-            self.client = gspread.authorize(credentials)
-
-            # Open the spreadsheet
+            # Open the spreadsheet through the configured backend (Google Sheets or a local
+            # stand-in); every Sheets call on it is paced against the API quota
+            self.backend = get_sheets_backend()
             self.sheet_id = config.GOOGLE_SHEET_ID
-            self.spreadsheet = self.client.open_by_key(self.sheet_id)
+            self.spreadsheet = self.backend.open_spreadsheet(self.sheet_id)
 
             # Get the specific worksheet
             self.worksheet = self.spreadsheet.worksheet(config.GOOGLE_SHEET_NAME)
 
+            # Cell updates are buffered per worksheet and written in batches
+            self._write_buffers = {}
+            self._write_buffers_lock = threading.Lock()
+
+            # Cached worksheet values for reads, patched by our own writes
+            self._snapshots = {}
+
+            # Items and prices are read and written locally; the sheet is a view that
+            # one background syncer per worksheet pushes to and pulls edits from
+            self.store = get_price_store()
+            self._syncers = {}
+
+            # Shopping worksheets already looked up, so callers do not pay a Sheets read each time
+            self._shopping_worksheets = {}
+
             logger.info(f"Connected to Google Sheet: {self.spreadsheet.title}")
         except gspread.exceptions.WorksheetNotFound:
             logger.error(f"Worksheet '{config.GOOGLE_SHEET_NAME}' not found in the Google Sheet. Please create this worksheet or update GOOGLE_SHEET_NAME in .env")
@@ -46,192 +53,185 @@ class GoogleSheetsService:
             logger.error(f"Failed to initialize Google Sheets service: {e}")
             raise
 
-    def get_all_items(self):
-        """Get all items from the shopping list"""
+    def snapshot(self, worksheet):
+        """Return the cached snapshot of a worksheet, creating it on first use"""
+        with self._write_buffers_lock:
+            if worksheet.id not in self._snapshots:
+                self._snapshots[worksheet.id] = WorksheetSnapshot(worksheet)
+            return self._snapshots[worksheet.id]
+
+    def write_buffer(self, worksheet):
+        """Return the write buffer for a worksheet, creating it on first use"""
+        snapshot = self.snapshot(worksheet)
+        with self._write_buffers_lock:
+            if worksheet.id not in self._write_buffers:
+                self._write_buffers[worksheet.id] = SheetWriteBuffer(worksheet, snapshot=snapshot)
+            return self._write_buffers[worksheet.id]
+
+    def syncer(self, worksheet):
+        """Return the running syncer of a worksheet, starting it (and the first pull) on first use"""
+        snapshot = self.snapshot(worksheet)
+        write_buffer = self.write_buffer(worksheet)
+        with self._write_buffers_lock:
+            syncer = self._syncers.get(worksheet.id)
+            if syncer is None:
+                syncer = self._syncers[worksheet.id] = SheetSyncer(self.store, worksheet, snapshot, write_buffer)
+                syncer.start()
+            return syncer
+
+    def request_sync(self):
+        """Ask every worksheet's syncer to push and pull soon, without waiting for it"""
+        with self._write_buffers_lock:
+            syncers = list(self._syncers.values())
+
+        for syncer in syncers:
+            syncer.request_sync()
+
+    def sync_now(self, worksheet):
+        """Push local changes to a worksheet and pull its edits before returning"""
+        self.syncer(worksheet).sync()
+
+    def stop_sync(self):
+        """Stop the background syncers after a last sync each"""
+        with self._write_buffers_lock:
+            syncers = list(self._syncers.values())
+
+        for syncer in syncers:
+            syncer.stop()
+
+    def mark_checked(self, worksheet, row_nums, timestamp=None):
+        """Stamp the rows refreshed in this run; the syncer writes them as one Checked At range"""
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.syncer(worksheet)
+        self.store.mark_checked(sheet_key(worksheet), row_nums, timestamp)
+
+    def known_urls(self, worksheet, row_num):
+        """Return the product URL stored for each retailer of an item, keyed by retailer key"""
+        return {
+            retailer.lower(): url
+            for retailer, (price, url) in self.store.offers(sheet_key(worksheet), row_num).items()
+            if url
+        }
+
+    def flush_writes(self):
+        """Write all buffered cell updates to the sheet"""
+        with self._write_buffers_lock:
+            buffers = list(self._write_buffers.values())
+
+        written = 0
+        for buffer in buffers:
+            written += buffer.flush()
+        return written
+
+    def get_all_items(self, worksheet=None):
+        """Get all items from the shopping list (the main worksheet by default)"""
+        worksheet = worksheet or self.worksheet
         try:
-            # Get all values from the worksheet
-            all_values = self.worksheet.get_all_values()
-
-            # Skip header row
-            data_rows = all_values[1:] if len(all_values) > 0 else []
-
-            # Convert to list of dictionaries
-            items = []
-            for i, row in enumerate(data_rows):
-                if len(row) >= 2:  # Ensure row has at least name and target price
-                    # Get the best price and retailer
-                    best_price = None
-                    best_retailer = None
-                    best_url = ""
-
-                    # Check Flipkart price (column 2)
-                    flipkart_price = self._parse_price(row[2]) if len(row) > 2 and row[2] else None
-                    if flipkart_price and (best_price is None or flipkart_price < best_price):
-                        best_price = flipkart_price
-                        best_retailer = "Flipkart"
-                        best_url = row[3] if len(row) > 3 else ""
-
-                    # Check Myntra price (column 4)
-                    myntra_price = self._parse_price(row[4]) if len(row) > 4 and row[4] else None
-                    if myntra_price and (best_price is None or myntra_price < best_price):
-                        best_price = myntra_price
-                        best_retailer = "Myntra"
-                        best_url = row[5] if len(row) > 5 else ""
-
-                    # Check Ajio price (column 6)
-                    ajio_price = self._parse_price(row[6]) if len(row) > 6 and row[6] else None
-                    if ajio_price and (best_price is None or ajio_price < best_price):
-                        best_price = ajio_price
-                        best_retailer = "Ajio"
-                        best_url = row[7] if len(row) > 7 else ""
-
-                    # Use the best price from the sheet if available (column 8)
-                    sheet_best_price = self._parse_price(row[8]) if len(row) > 8 and row[8] else None
-                    sheet_best_retailer = row[9] if len(row) > 9 and row[9] else None
-
-                    if sheet_best_price:
-                        best_price = sheet_best_price
-                        best_retailer = sheet_best_retailer
-
-                    # Add the item to the list
-                    items.append({
-                        "id": i + 2,  # Row number (1-indexed, accounting for header)
-                        "name": row[0],  # Item Name
-                        "target_price": self._parse_price(row[1]),  # Target Price
-                        "current_price": best_price,  # Best Price
-                        "url": best_url,  # URL of the best price
-                        "retailer": best_retailer,  # Retailer with the best price
-                        "last_updated": row[10] if len(row) > 10 else ""  # Last Updated
-                    })
-
-            return items
+            self.syncer(worksheet)
+            return self.store.items(sheet_key(worksheet))
         except Exception as e:
-            logger.error(f"Failed to get items from Google Sheet: {e}")
+            logger.error(f"Failed to get items from the price store: {e}")
             raise
 
     def get_item(self, item_id):
         """Get a specific item by its ID (row number)"""
         try:
-            # Convert item_id to integer
-            row_num = int(item_id)
-
-            # Get the row
-            row = self.worksheet.row_values(row_num)
-
-            # Convert to dictionary
-            if len(row) >= 2:  # Ensure row has at least name and target price
-                # Get the best price and retailer
-                best_price = None
-                best_retailer = None
-                best_url = ""
-
-                # Check Flipkart price (column 2)
-                flipkart_price = self._parse_price(row[2]) if len(row) > 2 and row[2] else None
-                if flipkart_price and (best_price is None or flipkart_price < best_price):
-                    best_price = flipkart_price
-                    best_retailer = "Flipkart"
-                    best_url = row[3] if len(row) > 3 else ""
-
-                # Check Myntra price (column 4)
-                myntra_price = self._parse_price(row[4]) if len(row) > 4 and row[4] else None
-                if myntra_price and (best_price is None or myntra_price < best_price):
-                    best_price = myntra_price
-                    best_retailer = "Myntra"
-                    best_url = row[5] if len(row) > 5 else ""
-
-                # Check Ajio price (column 6)
-                ajio_price = self._parse_price(row[6]) if len(row) > 6 and row[6] else None
-                if ajio_price and (best_price is None or ajio_price < best_price):
-                    best_price = ajio_price
-                    best_retailer = "Ajio"
-                    best_url = row[7] if len(row) > 7 else ""
-
-                # Use the best price from the sheet if available (column 8)
-                sheet_best_price = self._parse_price(row[8]) if len(row) > 8 and row[8] else None
-                sheet_best_retailer = row[9] if len(row) > 9 and row[9] else None
-
-                if sheet_best_price:
-                    best_price = sheet_best_price
-                    best_retailer = sheet_best_retailer
-
-                return {
-                    "id": row_num,
-                    "name": row[0],  # Item Name
-                    "target_price": self._parse_price(row[1]),  # Target Price
-                    "current_price": best_price,  # Best Price
-                    "url": best_url,  # URL of the best price
-                    "retailer": best_retailer,  # Retailer with the best price
-                    "last_updated": row[10] if len(row) > 10 else ""  # Last Updated
-                }
-            return None
+            self.syncer(self.worksheet)
+            return self.store.item(sheet_key(self.worksheet), int(item_id))
         except Exception as e:
-            logger.error(f"Failed to get item {item_id} from Google Sheet: {e}")
+            logger.error(f"Failed to get item {item_id} from the price store: {e}")
             raise
 
     def update_item_price(self, row_num, price, url, retailer):
         """Update an item's price, URL, and retailer"""
         try:
-            # Format the price as string with currency symbol
-            price_str = f"${price:.2f}" if price else ""
-
             # Get current timestamp
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            # Update the cells
-            self.worksheet.update_cell(row_num, config.SHEET_COLUMNS["CURRENT_PRICE"] + 1, price_str)
-            self.worksheet.update_cell(row_num, config.SHEET_COLUMNS["URL"] + 1, url)
-            self.worksheet.update_cell(row_num, config.SHEET_COLUMNS["RETAILER"] + 1, retailer)
-            self.worksheet.update_cell(row_num, config.SHEET_COLUMNS["LAST_UPDATED"] + 1, timestamp)
+            # Recorded locally as the retailer's offer; the syncer writes the changed cells
+            self.syncer(self.worksheet)
+            self.store.record_offer(sheet_key(self.worksheet), row_num, retailer, price, url, timestamp)
+            self.record_observation(row_num, retailer, price)
 
-            logger.info(f"Updated item in row {row_num} with price {price_str} from {retailer}")
+            logger.info(f"Recorded item in row {row_num} with price {format_price(price)} from {retailer}")
             return True
         except Exception as e:
             logger.error(f"Failed to update item in row {row_num}: {e}")
             raise
 
+    def record_observation(self, row_num, retailer, price, worksheet=None):
+        """
+        Add an observed price to the item's history, whether or not it changes the sheet
+
+        Args:
+            row_num (int): Row number of the item
+            retailer (str): Retailer the price was seen at
+            price (float): The observed price
+            worksheet (gspread.Worksheet): Defaults to the shopping list worksheet
+        """
+        if price:
+            self._history(worksheet or self.worksheet).append(row_num, retailer, price)
+
+    def get_price_history(self, item_id, start=None, end=None, retailer=None, worksheet_name=None):
+        """
+        Get an item's observed prices between two times
+
+        Args:
+            item_id (int): Row number of the item
+            start (float): Earliest epoch seconds included
+            end (float): Latest epoch seconds included
+            retailer (str): Only this retailer's prices
+            worksheet_name (str): Worksheet the item is on; defaults to the shopping list
+
+        Returns:
+            dict: The observations, oldest first, and the lowest of them
+        """
+        history = self._history(self.find_worksheet(worksheet_name))
+        records = history.query(int(item_id), start, end, retailer)
+        lowest = history.lowest(int(item_id), start, end, retailer)
+        return {
+            "observations": history.to_dicts(records),
+            "lowest": history.to_dicts([lowest])[0] if lowest is not None else None
+        }
+
+    def find_worksheet(self, worksheet_name=None):
+        """
+        Return a worksheet by name without creating it
+
+        Raises:
+            gspread.exceptions.WorksheetNotFound: If the spreadsheet has no such worksheet
+        """
+        if not worksheet_name or worksheet_name == self.worksheet.title:
+            return self.worksheet
+
+        if worksheet_name not in self._shopping_worksheets:
+            self._shopping_worksheets[worksheet_name] = self.spreadsheet.worksheet(worksheet_name)
+        return self._shopping_worksheets[worksheet_name]
+
+    def _history(self, worksheet):
+        """Return the price history of a worksheet"""
+        return get_price_history(worksheet.spreadsheet.id, worksheet.id)
+
     def check_for_price_drops(self):
         """Check for price drops and return items with significant drops"""
         try:
-            items = self.get_all_items()
-            price_drops = []
-
-            for item in items:
-                # Skip items without prices
-                if not item["current_price"] or not item["target_price"]:
-                    continue
-
-                # Calculate price drop percentage
-                if item["current_price"] < item["target_price"]:
-                    drop_percent = (item["target_price"] - item["current_price"]) / item["target_price"] * 100
-
-                    # Check if drop exceeds threshold
-                    if drop_percent >= config.PRICE_DROP_THRESHOLD_PERCENT:
-                        price_drops.append(item)
-
-            return price_drops
+            self.syncer(self.worksheet)
+            return self.store.price_drops(sheet_key(self.worksheet), config.PRICE_DROP_THRESHOLD_PERCENT)
         except Exception as e:
             logger.error(f"Failed to check for price drops: {e}")
             raise
 
-    def _parse_price(self, price_str):
-        """Parse a price string to float"""
-        if not price_str:
-            return None
-
-        try:
-            # Remove currency symbols and commas
-            cleaned = price_str.replace('$', '').replace('£', '').replace('€', '').replace('₹', '').replace(',', '')
-            return float(cleaned)
-        except ValueError:
-            return None
-
     def create_shopping_worksheet(self, worksheet_name="Mens Shopping"):
         """Create a new worksheet with the proper columns for the shopping assistant"""
+        if worksheet_name in self._shopping_worksheets:
+            return self._shopping_worksheets[worksheet_name]
+
         try:
             # Check if worksheet already exists
             try:
                 existing_worksheet = self.spreadsheet.worksheet(worksheet_name)
                 logger.info(f"Worksheet '{worksheet_name}' already exists")
+                self._shopping_worksheets[worksheet_name] = existing_worksheet
                 return existing_worksheet
             except gspread.exceptions.WorksheetNotFound:
                 # Create new worksheet
@@ -250,11 +250,12 @@ class GoogleSheetsService:
                     "Ajio URL",
                     "Best Price (₹)",
                     "Best Retailer",
-                    "Last Updated"
+                    "Last Updated",
+                    CHECKED_AT_HEADER
                 ]
 
                 # Update header row
-                new_worksheet.update('A1:K1', [headers])
+                new_worksheet.update('A1:L1', [headers])
 
                 # Format header row
                 header_format = {
@@ -264,84 +265,70 @@ class GoogleSheetsService:
                 }
 
                 # Apply formatting to header row
-                format_range = f'A1:K1'
+                format_range = f'A1:L1'
                 new_worksheet.format(format_range, header_format)
 
                 # Resize columns to fit content
                 for i in range(1, len(headers) + 1):
                     new_worksheet.columns_auto_resize(i - 1, i)
 
+                self._shopping_worksheets[worksheet_name] = new_worksheet
                 return new_worksheet
         except Exception as e:
             logger.error(f"Failed to create worksheet '{worksheet_name}': {e}")
             raise
 
-    def update_retailer_price(self, worksheet, row_num, retailer, price, url):
-        """Update a specific retailer's price and URL for an item"""
-        try:
-            # Format the price as string with currency symbol
-            price_str = f"₹{price:.2f}" if price else ""
+    def add_items(self, worksheet, items):
+        """
+        Append items that are not on the worksheet yet
 
-            # Get current timestamp
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        Args:
+            worksheet (gspread.Worksheet): The shopping worksheet
+            items (list): (name, target_price) pairs
 
-            # Determine which columns to update based on retailer
-            if retailer == "Flipkart":
-                price_col = 3  # Column C
-                url_col = 4    # Column D
-            elif retailer == "Myntra":
-                price_col = 5  # Column E
-                url_col = 6    # Column F
-            elif retailer == "Ajio":
-                price_col = 7  # Column G
-                url_col = 8    # Column H
-            else:
-                logger.warning(f"Unknown retailer: {retailer}")
-                return False
+        Returns:
+            int: Number of items added
+        """
+        # Get existing items to avoid duplicates
+        all_values = self.snapshot(worksheet).values()
+        existing_items = {row[0] for row in all_values[1:] if row}
+        next_row = len(all_values) + 1
 
-            # Update the cells
-            worksheet.update_cell(row_num, price_col, price_str)
-            worksheet.update_cell(row_num, url_col, url)
-            worksheet.update_cell(row_num, 11, timestamp)  # Last updated column
+        # Add new items; the rows are queued and written in one batch
+        write_buffer = self.write_buffer(worksheet)
+        added_count = 0
+        for name, target_price in items:
+            if name in existing_items:
+                continue
 
-            # Check if this is the new best price
-            self._update_best_price(worksheet, row_num)
+            write_buffer.set(next_row + added_count, 1, name)
+            write_buffer.set(next_row + added_count, 2, format_price(target_price))
+            existing_items.add(name)
+            added_count += 1
 
-            logger.info(f"Updated {retailer} price for item in row {row_num} with price {price_str}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to update {retailer} price for item in row {row_num}: {e}")
-            raise
+        write_buffer.flush()
+
+        # Bring the new rows into the local price store
+        self.sync_now(worksheet)
+        return added_count
 
-    def _update_best_price(self, worksheet, row_num):
-        """Update the best price and retailer for an item based on all retailer prices"""
+    def update_retailer_price(self, worksheet, row_num, retailer, price, url):
+        """Update a specific retailer's price and URL for an item, and its best price"""
         try:
-            # Get all prices
-            row_data = worksheet.row_values(row_num)
-
-            # Parse prices
-            prices = {
-                "Flipkart": self._parse_price(row_data[2]) if len(row_data) > 2 else None,
-                "Myntra": self._parse_price(row_data[4]) if len(row_data) > 4 else None,
-                "Ajio": self._parse_price(row_data[6]) if len(row_data) > 6 else None
-            }
-
-            # Find the best price
-            best_price = None
-            best_retailer = None
-
-            for retailer, price in prices.items():
-                if price is not None and (best_price is None or price < best_price):
-                    best_price = price
-                    best_retailer = retailer
-
-            # Update best price and retailer
-            if best_price is not None:
-                price_str = f"₹{best_price:.2f}"
-                worksheet.update_cell(row_num, 9, price_str)  # Best Price column
-                worksheet.update_cell(row_num, 10, best_retailer)  # Best Retailer column
+            if retailer not in RETAILER_COLUMNS:
+                logger.warning(f"Unknown retailer: {retailer}")
+                return False
+
+            # Get current timestamp
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+            # The best price is computed in the local store; the syncer writes the changed cells
+            self.syncer(worksheet)
+            best_price, best_retailer = self.store.record_offer(sheet_key(worksheet), row_num, retailer, price, url, timestamp)
+            self.record_observation(row_num, retailer, price, worksheet)
+
+            logger.info(f"Recorded {retailer} price for item in row {row_num} with price {format_price(price)} (best: {best_retailer})")
             return True
         except Exception as e:
-            logger.error(f"Failed to update best price for item in row {row_num}: {e}")
+            logger.error(f"Failed to update {retailer} price for item in row {row_num}: {e}")
             raise
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+
+from gspread.utils import rowcol_to_a1
+from loguru import logger
+
+import config
+
+class SheetWriteBuffer:
+    """Collects cell updates for one worksheet and writes them with batch_update"""
+
+    def __init__(self, worksheet, max_cells=None, max_age=None, max_request_bytes=None, snapshot=None):
+        """
+        Initialize the buffer
+
+        Args:
+            worksheet (gspread.Worksheet): The worksheet the cells belong to, wrapped in QuotaPaced so requests respect the Sheets quota
+            max_cells (int): Pending cells that trigger a flush
+            max_age (float): Seconds the oldest pending cell may wait before a flush; checked
+                on every set and by flush_if_due, which the owner calls on a timer
+            max_request_bytes (int): Approximate payload size of one batch_update request
+            snapshot (WorksheetSnapshot): Cached copy of the worksheet to keep in step with our writes
+        """
+        self.worksheet = worksheet
+        self.max_cells = max_cells or config.SHEETS_WRITE_BUFFER_MAX_CELLS
+        self.max_age = max_age if max_age is not None else config.SHEETS_WRITE_BUFFER_MAX_SECONDS
+        self.max_request_bytes = max_request_bytes or config.SHEETS_BATCH_MAX_BYTES
+        self.snapshot = snapshot
+
+        self._pending = {}
+        self._oldest = None
+        # Columns queued with set_column, merged top to bottom instead of left to right
+        self._column_runs = set()
+        self._lock = threading.RLock()
+
+    def set(self, row, col, value):
+        """Queue a cell value; a later value for the same cell replaces the earlier one"""
+        with self._lock:
+            self._queue(row, col, value)
+            self._flush_if_due()
+
+    def set_if_changed(self, row, col, value):
+        """
+        Queue a cell value unless the sheet already shows it
+
+        Returns:
+            bool: True if the cell was queued
+        """
+        with self._lock:
+            text = "" if value is None else str(value)
+            if (row, col) in self._pending:
+                current = "" if self._pending[(row, col)] is None else str(self._pending[(row, col)])
+            elif self.snapshot is not None:
+                cells = self.snapshot.row(row)
+                current = cells[col - 1] if len(cells) >= col else ""
+            else:
+                current = None
+
+            if current == text:
+                return False
+
+            self.set(row, col, value)
+            return True
+
+    def set_column(self, col, start_row, values):
+        """Queue a run of cells down one column, written as a single range"""
+        with self._lock:
+            self._column_runs.add(col)
+            for row, value in enumerate(values, start=start_row):
+                self._queue(row, col, value)
+            # Checked only once the whole run is queued, so a flush never splits it
+            self._flush_if_due()
+
+    def get(self, row, col, default=None):
+        """Return the queued value for a cell, or `default` when none is pending"""
+        with self._lock:
+            return self._pending.get((row, col), default)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Write every pending cell in as few batch_update calls as the request size allows
+
+        Returns:
+            int: Number of cells written
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+
+            pending = self._pending
+            column_runs = self._column_runs
+            self._pending = {}
+            self._oldest = None
+            self._column_runs = set()
+
+            try:
+                for data in self._chunk(self._ranges(pending, column_runs)):
+                    self.worksheet.batch_update(data, value_input_option="USER_ENTERED")
+            except Exception:
+                # Keep the cells so a later flush can retry; newer values win
+                self._pending = {**pending, **self._pending}
+                self._column_runs |= column_runs
+                self._oldest = time.monotonic()
+                raise
+
+            logger.debug(f"Flushed {len(pending)} cells to '{self.worksheet.title}'")
+            return len(pending)
+
+    def flush_if_due(self):
+        """
+        Flush if the pending cells reached max_cells or the oldest has waited max_age
+
+        The buffer has no thread of its own, so a lone pending cell only goes out by
+        age when something calls this; SheetSyncer does on every tick.
+
+        Returns:
+            int: Number of cells written
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            return self._flush_if_due()
+
+    def _queue(self, row, col, value):
+        self._pending[(row, col)] = value
+        if self.snapshot is not None:
+            self.snapshot.patch(row, col, value)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def _flush_if_due(self):
+        if len(self._pending) >= self.max_cells or time.monotonic() - self._oldest >= self.max_age:
+            return self.flush()
+        return 0
+
+    def _ranges(self, pending, column_runs=()):
+        """Merge adjacent cells into single A1 ranges: down the columns queued with
+        set_column, along the row everywhere else"""
+        runs = []
+
+        for row, col in sorted(cell for cell in pending if cell[1] not in column_runs):
+            last = runs[-1] if runs else None
+            if last and last["start_row"] == row and last["end_col"] + 1 == col:
+                last["values"][0].append(pending[(row, col)])
+                last["end_col"] = col
+                continue
+            runs.append({"start_row": row, "end_row": row, "start_col": col, "end_col": col, "values": [[pending[(row, col)]]]})
+
+        vertical_start = len(runs)
+        for row, col in sorted((cell for cell in pending if cell[1] in column_runs), key=lambda cell: (cell[1], cell[0])):
+            last = runs[-1] if len(runs) > vertical_start else None
+            if last and last["start_col"] == col and last["end_row"] + 1 == row:
+                last["values"].append([pending[(row, col)]])
+                last["end_row"] = row
+                continue
+            runs.append({"start_row": row, "end_row": row, "start_col": col, "end_col": col, "values": [[pending[(row, col)]]]})
+
+        return [
+            {
+                "range": f"{rowcol_to_a1(run['start_row'], run['start_col'])}:{rowcol_to_a1(run['end_row'], run['end_col'])}",
+                "values": run["values"]
+            }
+            for run in runs
+        ]
+
+    def _chunk(self, data):
+        """Split value ranges into requests that stay under the payload limit"""
+        chunk = []
+        size = 0
+        for value_range in data:
+            range_size = len(json.dumps(value_range, ensure_ascii=False).encode("utf-8"))
+            if chunk and size + range_size > self.max_request_bytes:
+                yield chunk
+                chunk = []
+                size = 0
+            chunk.append(value_range)
+            size += range_size
+
+        if chunk:
+            yield chunk
@@ -1,28 +1,14 @@
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
 import random
-import time
+
+from services.sheet_rows import SheetRowModel, format_price
+from services.sheets_backend import get_sheets_backend
+from services.sheets_write_buffer import SheetWriteBuffer
 
 def main():
-    # Define the scope
-    scope = [
-        'https://www.googleapis.com/auth/spreadsheets',
-        'https://www.googleapis.com/auth/drive'
-    ]
-
-    # Get credentials
-    credentials = Credentials.from_service_account_file(
-        'credentials.json',
-        scopes=scope
-    )
-
-    # Authorize with gspread
-    client = gspread.authorize(credentials)
-
-    # Open the spreadsheet
+    # Open the spreadsheet through the configured Sheets backend; every call is paced against the API quota
     sheet_id = '1FksmcoA6tXpIqVgW8PWPZHZcGz7nUKOgk8S6O1KulAg'
-    spreadsheet = client.open_by_key(sheet_id)
+    spreadsheet = get_sheets_backend().open_spreadsheet(sheet_id)
 
     # Get the worksheet
     worksheet_name = 'Mens Shopping'
@@ -31,6 +17,11 @@ def main():
     # Get all values from the worksheet
     all_values = worksheet.get_all_values()
 
+    # Keep every row's retailer prices in memory and queue cell updates for batch writes
+    rows = SheetRowModel(worksheet).load(all_values)
+    write_buffer = SheetWriteBuffer(worksheet)
+    checked_rows = []
+
     # Skip header row
     data_rows = all_values[1:] if len(all_values) > 0 else []
 
@@ -115,99 +106,35 @@ def main():
         ajio_url = retailer_urls["Ajio"].format(item_query)
 
         # Update Flipkart price
-        update_retailer_price(worksheet, row_num, "Flipkart", flipkart_price, flipkart_url)
-
-        # Add a longer delay to avoid rate limiting
-        time.sleep(5)
+        update_retailer_price(rows, write_buffer, row_num, "Flipkart", flipkart_price, flipkart_url)
 
         # Update Myntra price
-        update_retailer_price(worksheet, row_num, "Myntra", myntra_price, myntra_url)
-
-        # Add a longer delay to avoid rate limiting
-        time.sleep(5)
+        update_retailer_price(rows, write_buffer, row_num, "Myntra", myntra_price, myntra_url)
 
         # Update Ajio price
-        update_retailer_price(worksheet, row_num, "Ajio", ajio_price, ajio_url)
+        update_retailer_price(rows, write_buffer, row_num, "Ajio", ajio_price, ajio_url)
 
-        # Add a longer delay between items to avoid quota limits
-        print(f"Waiting 10 seconds before processing next item...")
-        time.sleep(10)
+        checked_rows.append(row_num)
 
-    print("All prices updated successfully!")
+    # Stamp the refreshed rows as one Checked At range, then write the remaining queued updates
+    rows.mark_checked(write_buffer, checked_rows, datetime.now().strftime("%Y-%m-%d %H:%M"))
+    write_buffer.flush()
 
-def update_retailer_price(worksheet, row_num, retailer, price, url):
-    """Update a specific retailer's price and URL for an item"""
-    # Format the price as string with currency symbol
-    price_str = f"₹{price:.2f}" if price else ""
+    print("All prices updated successfully!")
 
+def update_retailer_price(rows, write_buffer, row_num, retailer, price, url):
+    """Update a specific retailer's price and URL for an item, and its best price"""
     # Get current timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    # Determine which columns to update based on retailer
-    if retailer == "Flipkart":
-        price_col = 3  # Column C
-        url_col = 4    # Column D
-    elif retailer == "Myntra":
-        price_col = 5  # Column E
-        url_col = 6    # Column F
-    elif retailer == "Ajio":
-        price_col = 7  # Column G
-        url_col = 8    # Column H
-    else:
-        print(f"Unknown retailer: {retailer}")
+    # The row model computes the best price in memory; all of the row's cells are
+    # queued in the write buffer and written in one batch
+    best_price, best_retailer = rows.record_price(write_buffer, row_num, retailer, price, url, timestamp)
+    if best_retailer is None:
         return False
 
-    # Update the cells
-    worksheet.update_cell(row_num, price_col, price_str)
-    worksheet.update_cell(row_num, url_col, url)
-    worksheet.update_cell(row_num, 11, timestamp)  # Last updated column
-
-    # Update best price
-    update_best_price(worksheet, row_num)
-
-    print(f"Updated {retailer} price for row {row_num} with price {price_str}")
+    print(f"Updated {retailer} price for row {row_num} with price {format_price(price)}")
     return True
 
-def update_best_price(worksheet, row_num):
-    """Update the best price and retailer for an item based on all retailer prices"""
-    # Get all prices
-    row_data = worksheet.row_values(row_num)
-
-    # Parse prices
-    prices = {
-        "Flipkart": parse_price(row_data[2]) if len(row_data) > 2 else None,
-        "Myntra": parse_price(row_data[4]) if len(row_data) > 4 else None,
-        "Ajio": parse_price(row_data[6]) if len(row_data) > 6 else None
-    }
-
-    # Find the best price
-    best_price = None
-    best_retailer = None
-
-    for retailer, price in prices.items():
-        if price is not None and (best_price is None or price < best_price):
-            best_price = price
-            best_retailer = retailer
-
-    # Update best price and retailer
-    if best_price is not None:
-        price_str = f"₹{best_price:.2f}"
-        worksheet.update_cell(row_num, 9, price_str)  # Best Price column
-        worksheet.update_cell(row_num, 10, best_retailer)  # Best Retailer column
-
-    return True
-
-def parse_price(price_str):
-    """Parse a price string to float"""
-    if not price_str:
-        return None
-
-    try:
-        # Remove currency symbols and commas
-        cleaned = price_str.replace('$', '').replace('£', '').replace('€', '').replace('₹', '').replace(',', '')
-        return float(cleaned)
-    except ValueError:
-        return None
-
 if __name__ == "__main__":
     main()